@@ -1 +1,11 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import WorkingHours
+
+
+@admin.register(WorkingHours)
+class WorkingHoursAdmin(admin.ModelAdmin):
+    """Admin of the vets working hours."""
+
+    list_display = ["vet", "weekday", "start", "end"]
+    list_filter = ["weekday"]
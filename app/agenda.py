@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from django.db.models import F
+
+from .models import Appointment
+
+# Number of days shown by each view of the agenda.
+VIEWS = {"day": 1, "week": 7}
+
+# Dates the agenda can be opened on: the shown week and the links to the
+# previous and next ones stay within the dates Python can represent.
+FIRST_DAY = date.min + timedelta(days=14)
+LAST_DAY = date.max - timedelta(days=7)
+
+WEEKDAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+def agenda_range(day, view):
+    """Returns the first and last dates shown by a view; weeks start on Monday."""
+    if view == "week":
+        day -= timedelta(days=day.weekday())
+    return day, day + timedelta(days=VIEWS[view] - 1)
+
+
+def agenda_rows(start, end):
+    """
+    Appointments between two dates (both included) with the names of their
+    pet and vet, sorted by date and time.
+
+    The range and the order are both served by appointment_date_time_idx, so
+    the query only reads the rows of the shown days no matter how many years
+    of history the table holds.
+    """
+    return (
+        Appointment.objects.filter(date__gte=start, date__lte=end)
+        .annotate(pet_name=F("pet__name"), vet_name=F("vet__name"))
+        .order_by("date", "time", "id")
+        .values_list(
+            "id", "date", "time", "duration", "vet_id", "vet_name", "pet_name",
+            named=True,
+        )
+    )
+
+
+class Agenda:
+    """
+    The appointments of a day or a week laid out as a grid: a row per vet with
+    appointments in the range and a column per day.
+    """
+
+    def __init__(self, day, view):
+        self.view = view
+        day = min(max(day, FIRST_DAY), LAST_DAY)
+        self.start, self.end = agenda_range(day, view)
+        self.days = [self.start + timedelta(days=i) for i in range(VIEWS[view])]
+        self.previous = self.start - timedelta(days=VIEWS[view])
+        self.next = self.start + timedelta(days=VIEWS[view])
+
+        columns = {day: i for i, day in enumerate(self.days)}
+        vets = {}
+        for row in agenda_rows(self.start, self.end):
+            vet = vets.get(row.vet_id)
+            if vet is None:
+                vet = vets[row.vet_id] = {
+                    "id": row.vet_id,
+                    "name": row.vet_name,
+                    "days": [[] for _ in self.days],
+                }
+            vet["days"][columns[row.date]].append(row)
+
+        self.vets = sorted(vets.values(), key=lambda vet: (vet["name"], vet["id"]))
+
+    @property
+    def headers(self):
+        """(weekday name, date) of every column."""
+        return [(WEEKDAY_NAMES[day.weekday()], day) for day in self.days]
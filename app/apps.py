@@ -6,3 +6,7 @@ class AppConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self):
+        """Connects the signal receivers of the app."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,259 @@
+import re
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client as HttpClient
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+
+from . import search, urls
+from .models import (
+    Appointment,
+    Client,
+    Medicine,
+    Pet,
+    Product,
+    Provider,
+    Vet,
+    WorkingHours,
+)
+
+# Model and singular name of the resource prefix of the URL names.
+RESOURCES = {
+    "clients": (Client, "client"),
+    "pets": (Pet, "pet"),
+    "vets": (Vet, "vet"),
+    "appointments": (Appointment, "appointment"),
+    "medicines": (Medicine, "medicine"),
+    "providers": (Provider, "provider"),
+    "products": (Product, "product"),
+}
+
+# Statements that read or filter rows, the ones with a query plan worth
+# checking.
+AUDITED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+# Issues inherent to a view, reported but not counted as problems.
+EXPECTED_ISSUES = {
+    # Exports stream every row of the table in id order.
+    "_export": "full_scan",
+    # The bm25() rank of the search can't come from an index.
+    "search": "temp_btree",
+}
+
+SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+AUTOMATIC_INDEX_RE = re.compile(r"^SEARCH (\w+).* USING AUTOMATIC (?:COVERING )?INDEX")
+TEMP_BTREE_RE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+WHERE_RE = re.compile(r"\bWHERE\b(.*?)(?:\bORDER BY\b|\bGROUP BY\b|\bLIMIT\b|$)", re.S)
+
+
+def seed():
+    """Creates a few objects of every model so every view has rows to read."""
+    clients = Client.objects.bulk_create(
+        [
+            Client(
+                name=f"Cliente {i}",
+                phone=54221555232,
+                email=f"cliente{i}@vetsoft.com",
+                address="13 y 44",
+            )
+            for i in range(20)
+        ],
+    )
+    pets = Pet.objects.bulk_create(
+        [
+            Pet(name=f"Mascota {i}", breed="Labrador", birthday="2020-01-01", client=client)
+            for i, client in enumerate(clients * 2)
+        ],
+    )
+    vets = Vet.objects.bulk_create(
+        [Vet(name=f"Veterinario {i}", phone="221555232", email="vet@vetsoft.com") for i in range(5)],
+    )
+    WorkingHours.objects.bulk_create(
+        [WorkingHours(vet=vets[0], weekday=weekday, start="09:00", end="17:00") for weekday in range(5)],
+    )
+    today = date.today()
+    Appointment.objects.bulk_create(
+        [
+            Appointment(
+                pet=pet,
+                vet=vets[i % len(vets)],
+                date=today + timedelta(days=i // 4),
+                time=f"{9 + i % 8:02d}:00",
+            )
+            for i, pet in enumerate(pets)
+        ],
+    )
+    Provider.objects.bulk_create(
+        [Provider(name=f"Proveedor {i}", email="p@vetsoft.com", address="7 y 50") for i in range(5)],
+    )
+    Product.objects.bulk_create(
+        [Product(name=f"Producto {i}", type="Alimento", price=100) for i in range(5)],
+    )
+    Medicine.objects.bulk_create(
+        [Medicine(name=f"Medicamento {i}", description="Uso oral", dose=5) for i in range(5)],
+    )
+    search.index_objects([*clients, *pets, *vets])
+
+
+def audit_requests():
+    """
+    Returns (url name, method, path, data) for every URL of app/urls.py.
+
+    Edit and delete views get the id of an existing object of their model and
+    the views that need query params get sample ones.
+    """
+    today = date.today()
+    params = {
+        "search": {"q": "cli"},
+        "vets_availability": {"from": today, "to": today + timedelta(days=6)},
+        "appointments_agenda": {"view": "week", "date": today},
+    }
+
+    requests = []
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+
+        name = pattern.name
+        prefix = name.split("_")[0]
+        kwargs = {}
+        if "id" in pattern.pattern.converters:
+            kwargs["id"] = RESOURCES[prefix][0].objects.values_list("id", flat=True).first()
+
+        path = reverse(name, kwargs=kwargs)
+        if name.endswith("_delete"):
+            model, singular = RESOURCES[prefix]
+            data = {f"{singular}_id": model.objects.values_list("id", flat=True).first()}
+            requests.append((name, "POST", path, data))
+        elif name.endswith("_autocomplete"):
+            requests.append((name, "GET", path, {"q": "a"}))
+        elif name.endswith("_export"):
+            requests.append((name, "GET", path, {"format": "csv"}))
+        else:
+            requests.append((name, "GET", path, params.get(name, {})))
+    return requests
+
+
+def plan_issues(sql, plan):
+    """
+    Returns the issues of the query plan of a statement: full table scans,
+    temporary B-trees for sorting/grouping and automatic indexes, which
+    SQLite builds when a join or filter has no index to use.
+    """
+    issues = []
+    where = WHERE_RE.search(sql)
+    for detail in plan:
+        if match := SCAN_RE.match(detail):
+            table = match.group(1)
+            columns = []
+            if where:
+                columns = sorted(
+                    set(re.findall(rf'"{table}"\."(\w+)"', where.group(1))),
+                )
+            issues.append(
+                {
+                    "kind": "missing_index" if columns else "full_scan",
+                    "table": table,
+                    "columns": columns,
+                    "detail": detail,
+                },
+            )
+        elif match := AUTOMATIC_INDEX_RE.match(detail):
+            issues.append(
+                {
+                    "kind": "missing_index",
+                    "table": match.group(1),
+                    "columns": [],
+                    "detail": detail,
+                },
+            )
+        elif TEMP_BTREE_RE.search(detail):
+            issues.append(
+                {
+                    "kind": "temp_btree",
+                    "table": None,
+                    "columns": [],
+                    "detail": detail,
+                },
+            )
+    return issues
+
+
+def is_expected(name, issue):
+    """Whether an issue is inherent to the view with the given URL name."""
+    return any(
+        (name == suffix or name.endswith(suffix)) and issue["kind"] == kind
+        for suffix, kind in EXPECTED_ISSUES.items()
+    )
+
+
+def explain(sql):
+    """Returns the detail lines of the query plan of a statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def audit_request(http, name, method, path, data):
+    """
+    Requests a URL capturing its SQL statements, then explains each distinct
+    statement. Changes made by the view are rolled back.
+    """
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            if method == "POST":
+                response = http.post(path, data)
+            else:
+                response = http.get(path, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        statements = []
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if sql.lstrip().upper().startswith(AUDITED_STATEMENTS) and sql not in statements:
+                statements.append(sql)
+
+        report = {
+            "name": name,
+            "method": method,
+            "path": path,
+            "status": response.status_code,
+            "queries": len(queries.captured_queries),
+            "statements": [],
+        }
+        for sql in statements:
+            plan = explain(sql)
+            issues = plan_issues(sql, plan)
+            for issue in issues:
+                issue["expected"] = is_expected(name, issue)
+            report["statements"].append({"sql": sql, "plan": plan, "issues": issues})
+        transaction.set_rollback(True)
+    return report
+
+
+def audit():
+    """Audits the query plans of every URL of the app, returns a report per URL."""
+    http = HttpClient()
+    # The requests of the test client come from the "testserver" host. The
+    # page and row caches are shared with the server: with them on, the
+    # audit would store the pages of its throwaway database there and skip
+    # the queries of the pages already cached.
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        REPOSITORY_CACHE_TIMEOUT=0,
+        FRAGMENT_CACHE_TIMEOUT=0,
+    ):
+        return [audit_request(http, *request) for request in audit_requests()]
+
+
+def unexpected_issues(reports):
+    """Number of issues of the reports that aren't inherent to their view."""
+    return sum(
+        not issue["expected"]
+        for report in reports
+        for statement in report["statements"]
+        for issue in statement["issues"]
+    )
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Collate, Concat
+
+from .models import Client, Pet, Vet
+
+# Label shown for the suggestions of each resource.
+AUTOCOMPLETE = {
+    "clients": {"model": Client, "label": F("name")},
+    "pets": {
+        "model": Pet,
+        "label": Concat("name", Value(" ("), "client__name", Value(")")),
+    },
+    "vets": {"model": Vet, "label": F("name")},
+}
+
+
+def suggestions(resource, text, limit=None):
+    """
+    Returns the first objects of a resource whose name starts with the text,
+    as {"id", "label"} dicts sorted by name.
+
+    The case insensitive prefix match (LIKE 'text%') and the order are both
+    served by the NOCASE name index of the model, so only the returned rows
+    are read whatever the size of the table.
+    """
+    source = AUTOCOMPLETE[resource]
+    limit = min(limit or settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_LIMIT)
+
+    queryset = source["model"].objects.all()
+    text = text.strip()
+    if text:
+        queryset = queryset.filter(name__istartswith=text)
+
+    return list(
+        queryset.order_by(Collate("name", "NOCASE"), "id")
+        .annotate(label=source["label"])
+        .values("id", "label")[:limit],
+    )
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Appointment, WorkingHours
+from .validation import APPOINTMENT_DEFAULT_DURATION
+
+# Free slots start at multiples of this many minutes (09:00, 09:15, ...).
+SLOT_STEP = 15
+
+
+def to_minutes(value):
+    """Minutes since midnight of a time."""
+    return value.hour * 60 + value.minute
+
+
+# Time objects of every minute of the day, shared by all the slots.
+TIMES = [time(minute // 60, minute % 60) for minute in range(24 * 60)]
+
+
+def load_working_hours(vet_ids):
+    """
+    Returns {vet_id: {weekday: [(start, end), ...]}} in minutes since midnight.
+
+    Vets without working hours get the VET_DEFAULT_WORKING_HOURS schedule.
+    """
+    hours = defaultdict(lambda: defaultdict(list))
+    for vet_id, weekday, start, end in WorkingHours.objects.filter(
+        vet_id__in=vet_ids,
+    ).values_list("vet_id", "weekday", "start", "end"):
+        hours[vet_id][weekday].append((to_minutes(start), to_minutes(end)))
+
+    default = defaultdict(list)
+    for weekday, start, end in settings.VET_DEFAULT_WORKING_HOURS:
+        default[weekday].append(
+            (to_minutes(time.fromisoformat(start)), to_minutes(time.fromisoformat(end))),
+        )
+
+    schedules = {}
+    for vet_id in vet_ids:
+        schedule = hours.get(vet_id, default)
+        schedules[vet_id] = {
+            weekday: sorted(intervals) for weekday, intervals in schedule.items()
+        }
+    return schedules
+
+
+def load_busy(vet_ids, start_date, end_date):
+    """
+    Returns {(vet_id, iso date): [(start, end), ...]} of the appointments in
+    the range, sorted and in minutes since midnight, read with a single query
+    on the (vet, date, time) index.
+
+    SQLite computes the start minute, and the date is cast to text so the
+    driver doesn't parse it: building a date and a time object per row took
+    most of the time of a month-long query.
+    """
+    placeholders = ", ".join(["%s"] * len(vet_ids))
+    sql = (
+        "SELECT vet_id, CAST(date AS text),"
+        " CAST(substr(time, 1, 2) AS integer) * 60"
+        " + CAST(substr(time, 4, 2) AS integer), duration"
+        f" FROM {Appointment._meta.db_table}"
+        f" WHERE vet_id IN ({placeholders}) AND date >= %s AND date <= %s"
+        " ORDER BY vet_id, date, time"
+    )
+    params = [*vet_ids, start_date.isoformat(), end_date.isoformat()]
+
+    busy = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for vet_id, day, start, duration in cursor.fetchall():
+            busy[(vet_id, day)].append((start, start + duration))
+    return busy
+
+
+def free_intervals(working, busy):
+    """
+    Sweeps the sorted working and busy intervals of a day and returns the
+    intervals where the vet works and has no appointment.
+    """
+    free = []
+    i = 0
+    for work_start, work_end in working:
+        cursor = work_start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+
+        j = i
+        while j < len(busy) and busy[j][0] < work_end:
+            busy_start, busy_end = busy[j]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            j += 1
+
+        if cursor < work_end:
+            free.append((cursor, work_end))
+    return free
+
+
+def slot_starts(free, duration, not_before=0):
+    """Start minutes of the slots of the given duration that fit in the free intervals."""
+    starts = []
+    for free_start, free_end in free:
+        start = max(free_start, not_before)
+        start += -start % SLOT_STEP
+        while start + duration <= free_end:
+            starts.append(start)
+            start += SLOT_STEP
+    return starts
+
+
+def free_slots(vet_ids, start_date, end_date, duration=None, now=None):
+    """
+    Computes the free slots of the vets between two dates (both included).
+
+    Returns {vet_id: {date: [time, ...]}} with the start times where an
+    appointment of the given duration (minutes) fits in the working hours of
+    the vet without overlapping an existing appointment. Slots in the past
+    are left out.
+    """
+    duration = duration or APPOINTMENT_DEFAULT_DURATION
+    now = now or datetime.now()
+    vet_ids = list(vet_ids)
+
+    schedules = load_working_hours(vet_ids)
+    busy = load_busy(vet_ids, start_date, end_date)
+
+    slots = {}
+    for vet_id in vet_ids:
+        schedule = schedules[vet_id]
+        days = slots[vet_id] = {}
+
+        day = start_date
+        while day <= end_date:
+            working = schedule.get(day.weekday())
+            if working and day >= now.date():
+                not_before = to_minutes(now.time()) if day == now.date() else 0
+                free = free_intervals(
+                    working, busy.get((vet_id, day.isoformat()), []),
+                )
+                days[day] = [
+                    TIMES[start] for start in slot_starts(free, duration, not_before)
+                ]
+            day += timedelta(days=1)
+
+    return slots
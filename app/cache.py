@@ -0,0 +1,162 @@
+import hashlib
+import re
+import uuid
+from functools import cache as memoize
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template import engines
+
+from .metrics import registry
+
+VERSION_KEY = "version:{}"
+PAGE_KEY = "page:{}:{}:{}:{}"
+
+# The CSRF tokens of the delete forms are per user, so they are replaced
+# with the token of the current request when a cached page is served.
+CSRF_TOKEN_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+@memoize
+def build_version():
+    """
+    Hash of the deployed code: BUILD_VERSION, the source of the templates of
+    the project and the manifest of the hashed static files. Computed once
+    per process, the code doesn't change while it runs.
+    """
+    from .warmup import project_template_names
+
+    digest = hashlib.md5(settings.BUILD_VERSION.encode())
+    engine = engines["django"].engine
+    for name in project_template_names():
+        digest.update(name.encode())
+        digest.update(engine.get_template(name).source.encode())
+    read_manifest = getattr(staticfiles_storage, "read_manifest", None)
+    if read_manifest:
+        digest.update((read_manifest() or "").encode())
+    return digest.hexdigest()[:12]
+
+
+def version_key(model):
+    """Cache key of the version of a model."""
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def new_version():
+    """
+    A fresh, unique version. Versions are random rather than counters so a
+    counter evicted from the cache can't come back with a value that old
+    pages are still stored under.
+    """
+    return uuid.uuid4().hex
+
+
+def get_versions(models):
+    """Returns the current versions of the models, creating the missing ones."""
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            # Another process may have added it first, its version wins.
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    """Invalidates every cached page that depends on the model."""
+    cache.set(version_key(model), new_version(), None)
+
+
+def with_csrf_token(request, content):
+    """Puts the CSRF token of the request in the forms of a cached page."""
+    token = get_token(request).encode()
+    return CSRF_TOKEN_RE.sub(rb"\g<1>" + token + rb"\g<2>", content)
+
+
+def page_key(request, view, models):
+    """
+    Cache key of the page of the request, under the current versions of the
+    models and of the code, so a deploy doesn't serve pages of the old one.
+    """
+    versions = ".".join(get_versions(models))
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(build_version(), view.__name__, versions, path)
+
+
+def cached_response(request, key):
+    """The cached page stored under the key as a response, or None."""
+    cached = cache.get(key)
+    registry.inc("vetsoft_page_cache_requests_total", result="miss" if cached is None else "hit")
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(with_csrf_token(request, content), content_type=content_type)
+
+
+def store_response(key, response, timeout):
+    """Caches a successful, non-streamed response under the key."""
+    if response.status_code == 200 and not response.streaming:
+        cache.set(key, (response.content, response["Content-Type"]), timeout)
+
+
+def cached_page(*models):
+    """
+    Caches the GET responses of a view under the versions of the given models
+    (the model of the page and the related models it displays) and the full
+    path, so every page and filter variant has its own entry.
+
+    Saving or deleting any of the models bumps its version (see
+    app.signals.invalidate_cached_pages), which makes the stored pages
+    unreachable in every process sharing the cache.
+
+    Async views read and write the cache in a worker thread, so a slow cache
+    backend doesn't block the event loop.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                timeout = settings.REPOSITORY_CACHE_TIMEOUT
+                if request.method != "GET" or not timeout:
+                    return await view(request, *args, **kwargs)
+
+                key = await sync_to_async(page_key, thread_sensitive=False)(
+                    request, view, models,
+                )
+                response = await sync_to_async(cached_response, thread_sensitive=False)(
+                    request, key,
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store_response, thread_sensitive=False)(
+                        key, response, timeout,
+                    )
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.REPOSITORY_CACHE_TIMEOUT
+            if request.method != "GET" or not timeout:
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, view, models)
+            response = cached_response(request, key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                store_response(key, response, timeout)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,225 @@
+import logging
+import re
+import threading
+import time
+from gzip import GzipFile
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer, compress_string
+
+logger = logging.getLogger(__name__)
+
+ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
+
+# Random bytes added to the gzip header of every response, so the size of
+# the compressed pages can't be used to guess their secrets (BREACH).
+MAX_RANDOM_BYTES = 100
+
+
+class CompressionMetrics:
+    """
+    Counters of the compressed responses of the process: how many, their
+    size before and after compression and the CPU time spent compressing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Sets every counter back to zero."""
+        with self._lock:
+            self.responses = 0
+            self.original_bytes = 0
+            self.compressed_bytes = 0
+            self.cpu_time = 0.0
+
+    def record(self, original_bytes, compressed_bytes, cpu_time):
+        """Records a compressed response."""
+        with self._lock:
+            self.responses += 1
+            self.original_bytes += original_bytes
+            self.compressed_bytes += compressed_bytes
+            self.cpu_time += cpu_time
+
+    def snapshot(self):
+        """Returns the counters and the overall compression ratio as a dict."""
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "original_bytes": self.original_bytes,
+                "compressed_bytes": self.compressed_bytes,
+                "ratio": (
+                    self.compressed_bytes / self.original_bytes if self.original_bytes else 0.0
+                ),
+                "cpu_time": self.cpu_time,
+            }
+
+
+compression_metrics = CompressionMetrics()
+
+
+def report(request, original_bytes, compressed_bytes, cpu_time):
+    """Records and logs the compression of a response."""
+    compression_metrics.record(original_bytes, compressed_bytes, cpu_time)
+    logger.debug(
+        "%s %s: %d -> %d bytes (%.0f%%), %.2f ms CPU",
+        request.method,
+        request.path,
+        original_bytes,
+        compressed_bytes,
+        compressed_bytes / original_bytes * 100 if original_bytes else 0,
+        cpu_time * 1000,
+    )
+
+
+class GzipStream:
+    """
+    A single gzip stream compressed chunk by chunk, flushed after every chunk
+    so the client gets them as they're produced.
+
+    Only the time spent compressing is measured, not the time the view spends
+    producing the chunks. thread_time, since other threads of the server
+    share the process.
+    """
+
+    def __init__(self):
+        self.buffer = StreamingBuffer()
+        self.zfile = None
+        self.original_bytes = self.compressed_bytes = 0
+        self.cpu_time = 0.0
+
+    def _read(self, start):
+        data = self.buffer.read()
+        self.cpu_time += time.thread_time() - start
+        self.compressed_bytes += len(data)
+        return data
+
+    def open(self):
+        """Starts the stream, returns the gzip header."""
+        start = time.thread_time()
+        self.zfile = GzipFile(mode="wb", compresslevel=6, fileobj=self.buffer, mtime=0)
+        return self._read(start)
+
+    def compress(self, chunk):
+        """Compresses a chunk, returns the compressed bytes (maybe none)."""
+        start = time.thread_time()
+        self.zfile.write(chunk)
+        self.zfile.flush()
+        self.original_bytes += len(chunk)
+        return self._read(start)
+
+    def close(self):
+        """Ends the stream, returns the gzip trailer."""
+        start = time.thread_time()
+        self.zfile.close()
+        return self._read(start)
+
+
+def compress_chunks(request, chunks):
+    """
+    Compresses a streamed response into a single gzip stream. Streams are
+    exports without secrets, so they get no random header bytes.
+    """
+    stream = GzipStream()
+    try:
+        yield stream.open()
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.close()
+    finally:
+        report(request, stream.original_bytes, stream.compressed_bytes, stream.cpu_time)
+
+
+async def compress_async_chunks(request, chunks):
+    """compress_chunks for async streamed responses."""
+    stream = GzipStream()
+    try:
+        yield stream.open()
+        async for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.close()
+    finally:
+        report(request, stream.original_bytes, stream.compressed_bytes, stream.cpu_time)
+
+
+def is_compressible(response):
+    """Whether the content type of a response is one of COMPRESSION_TYPES."""
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    return content_type in settings.COMPRESSION_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Gzips the HTML, JSON and CSV responses when the browser accepts it: the
+    ones of at least COMPRESSION_MIN_SIZE bytes and every streamed one, chunk
+    by chunk. Responses that already have a Content-Encoding are left as
+    they are.
+
+    The sizes and CPU time of every compressed response are recorded in
+    compression_metrics and logged at DEBUG level.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Compresses the response of the request if it's worth it."""
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        """__call__ under ASGI, the chain of middlewares stays async."""
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        """Compresses the response, or returns it as it is."""
+        if response.has_header("Content-Encoding") or not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not ACCEPTS_GZIP_RE.search(request.headers.get("Accept-Encoding", "")):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_chunks(
+                    request, response.streaming_content,
+                )
+            else:
+                response.streaming_content = compress_chunks(
+                    request, response.streaming_content,
+                )
+            # The compressed size isn't known until the last chunk.
+            del response.headers["Content-Length"]
+        else:
+            start = time.thread_time()
+            compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+            cpu_time = time.thread_time() - start
+            if len(compressed) >= len(response.content):
+                return response
+            report(request, len(response.content), len(compressed), cpu_time)
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The compressed content isn't byte for byte the one of a strong ETag.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = f"W/{etag}"
+        response.headers["Content-Encoding"] = "gzip"
+        return response
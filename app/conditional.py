@@ -0,0 +1,146 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import build_version
+from .models import TableChange
+
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def table_key(model):
+    """Key of a model in the TableChange table."""
+    return model._meta.label_lower
+
+
+def record_change(model):
+    """
+    Records that rows of the model changed now, in the current transaction.
+    A single upsert, so it costs one statement per write.
+    """
+    TableChange.objects.bulk_create(
+        [TableChange(table=table_key(model), updated_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=["table"],
+        update_fields=["updated_at"],
+    )
+
+
+def last_changed(*models):
+    """Time of the last change of the rows of any of the models, or None."""
+    return TableChange.objects.filter(
+        table__in=[table_key(model) for model in models],
+    ).aggregate(updated_at=Max("updated_at"))["updated_at"]
+
+
+def object_last_changed(model, id, related):
+    """
+    Time of the last change of an object and the related objects it's
+    displayed with (the names of the autocomplete fields), or None.
+    """
+    fields = ["updated_at", *(f"{name}__updated_at" for name in related)]
+    values = model.objects.filter(pk=id).values_list(*fields).first()
+    if values is None:
+        return None
+    return max(value for value in values if value is not None)
+
+
+def validators(changed):
+    """
+    The ETag and Last-Modified of a page last changed at the given time.
+    Last-Modified has a resolution of seconds, the ETag tells apart changes
+    made within the same second. The ETag also holds the build version, so
+    after a deploy the browsers get the pages of the new templates and
+    static files instead of a 304 (they ignore Last-Modified when they
+    send an ETag).
+    """
+    etag = quote_etag(f"{build_version()}-{changed.timestamp():.6f}")
+    return etag, int(changed.timestamp())
+
+
+def not_modified(request, changed):
+    """The 304 Not Modified response when the client has the current page."""
+    if changed is None:
+        return None
+    etag, last_modified = validators(changed)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def with_validators(response, changed):
+    """Adds the validators to a successful response (or a 304)."""
+    if changed is None or response.status_code not in (200, 304):
+        return response
+
+    etag, last_modified = validators(changed)
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    # Revalidate on every use instead of letting the browser guess how long
+    # the page stays fresh.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(get_last_changed):
+    """
+    Adds ETag and Last-Modified headers to the GET responses of a view and
+    answers 304 Not Modified when the client already has the current page,
+    before the view fetches any row or renders any template.
+
+    get_last_changed(request, *args, **kwargs) returns the time of the last
+    change of the data the page displays, or None when it isn't known. For
+    async views it runs in the thread of the database connection.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in CONDITIONAL_METHODS:
+                    return await view(request, *args, **kwargs)
+
+                changed = await sync_to_async(get_last_changed)(request, *args, **kwargs)
+                response = not_modified(request, changed)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return with_validators(response, changed)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in CONDITIONAL_METHODS:
+                return view(request, *args, **kwargs)
+
+            changed = get_last_changed(request, *args, **kwargs)
+            response = not_modified(request, changed)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return with_validators(response, changed)
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_repository(*models):
+    """Conditional GET of a page listing the rows of the given models."""
+    return conditional(lambda request, *args, **kwargs: last_changed(*models))
+
+
+def conditional_object(model, *related):
+    """
+    Conditional GET of the edit page of an object of the model, taken from
+    the "id" URL param. The page of a new object is always rendered.
+    """
+
+    def get_last_changed(request, id=None):
+        if id is None:
+            return None
+        return object_last_changed(model, id, related)
+
+    return conditional(get_last_changed)
@@ -0,0 +1,176 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class WriteMetrics:
+    """
+    Counters of the write transactions of the process: how many took the
+    write lock, how long they waited for it, how many were retried because
+    the database was locked and how many gave up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Sets every counter back to zero."""
+        with self._lock:
+            self.transactions = 0
+            self.lock_wait = 0.0
+            self.max_lock_wait = 0.0
+            self.retries = 0
+            self.failures = 0
+
+    def record_lock_wait(self, seconds):
+        """Records a transaction that waited the given seconds for the write lock."""
+        with self._lock:
+            self.transactions += 1
+            self.lock_wait += seconds
+            self.max_lock_wait = max(self.max_lock_wait, seconds)
+
+    def record_retry(self):
+        """Records a transaction retried because the database was locked."""
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self):
+        """Records a transaction that ran out of retries."""
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self):
+        """Returns the counters as a dict."""
+        with self._lock:
+            return {
+                "transactions": self.transactions,
+                "lock_wait": self.lock_wait,
+                "max_lock_wait": self.max_lock_wait,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+write_metrics = WriteMetrics()
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    Like transaction.atomic(), but when it opens the transaction on SQLite
+    the write lock is taken upfront (BEGIN IMMEDIATE).
+
+    Use it for read-then-write sequences such as "check the slot is free,
+    then book it": concurrent writers queue on the lock instead of both
+    reading the old state, and nobody fails with "database is locked".
+    Nested inside another atomic block it is a plain savepoint.
+    """
+    connection = transaction.get_connection(using)
+    outermost = not connection.in_atomic_block and hasattr(
+        connection, "transaction_mode",
+    )
+
+    if not outermost:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    previous_mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous_mode
+            yield
+    finally:
+        connection.transaction_mode = previous_mode
+
+
+def is_locked_error(error):
+    """Whether an error is SQLite failing to get the lock within the busy timeout."""
+    return isinstance(error, OperationalError) and "database is locked" in str(error)
+
+
+def backoff_delay(attempt):
+    """
+    Seconds to wait before retrying after the given failed attempt (0 based):
+    a random delay up to an exponentially growing cap ("full jitter"), so
+    the writers that collided don't retry in lockstep.
+    """
+    cap = min(
+        settings.WRITE_RETRY_MAX_BACKOFF,
+        settings.WRITE_RETRY_BACKOFF * 2 ** attempt,
+    )
+    return random.uniform(0, cap)
+
+
+def retry_on_lock(func, *args, using=None, **kwargs):
+    """
+    Calls func inside an immediate_atomic() transaction and retries it, up to
+    WRITE_RETRY_ATTEMPTS times with jittered backoff, when the database is
+    locked. The last error is raised once the attempts are exhausted.
+
+    Inside an existing transaction func just runs in a savepoint: retrying
+    it alone would replay part of the outer transaction.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        with immediate_atomic(using=using):
+            return func(*args, **kwargs)
+
+    attempts = settings.WRITE_RETRY_ATTEMPTS
+    for attempt in range(attempts):
+        try:
+            with immediate_atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_locked_error(e) or attempt == attempts - 1:
+                if is_locked_error(e):
+                    write_metrics.record_failure()
+                raise
+            write_metrics.record_retry()
+            delay = backoff_delay(attempt)
+            logger.warning(
+                "Database locked, retrying in %.3f s (attempt %d of %d)",
+                delay,
+                attempt + 1,
+                attempts,
+            )
+            time.sleep(delay)
+
+
+def serialized_writes(view):
+    """
+    Runs the unsafe requests (POST, ...) of a view in an immediate write
+    transaction retried on "database is locked", so concurrent writers
+    queue on the lock. When the lock can't be taken after every retry the
+    response is a 503 asking to retry instead of a 500.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        try:
+            return retry_on_lock(view, request, *args, **kwargs)
+        except OperationalError as e:
+            if not is_locked_error(e):
+                raise
+            response = HttpResponse(
+                "El sistema está ocupado, por favor intente nuevamente.",
+                status=503,
+            )
+            response["Retry-After"] = "1"
+            return response
+
+    return wrapper
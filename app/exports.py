@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+from .filters import apply_filters
+from .models import Appointment, Client, Medicine, Pet, Product, Provider, Vet
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def pets_with_client():
+    """Pets annotated with the name of their owner."""
+    return Pet.objects.annotate(client_name=F("client__name"))
+
+
+def appointments_with_names():
+    """Appointments annotated with the names of their pet and vet."""
+    return Appointment.objects.annotate(
+        pet_name=F("pet__name"), vet_name=F("vet__name"),
+    )
+
+
+EXPORTS = {
+    "clients": {
+        "filename": "clientes",
+        "queryset": Client.objects.all,
+        "columns": ["id", "name", "phone", "email", "address"],
+    },
+    "pets": {
+        "filename": "mascotas",
+        "queryset": pets_with_client,
+        "columns": ["id", "name", "breed", "birthday", "client_id", "client_name"],
+    },
+    "appointments": {
+        "filename": "citas",
+        "queryset": appointments_with_names,
+        "columns": [
+            "id", "date", "time", "pet_id", "pet_name", "vet_id", "vet_name",
+        ],
+    },
+    "vets": {
+        "filename": "veterinarios",
+        "queryset": Vet.objects.all,
+        "columns": ["id", "name", "phone", "email"],
+    },
+    "providers": {
+        "filename": "proveedores",
+        "queryset": Provider.objects.all,
+        "columns": ["id", "name", "email", "address"],
+    },
+    "products": {
+        "filename": "productos",
+        "queryset": Product.objects.all,
+        "columns": ["id", "name", "type", "price"],
+    },
+    "medicines": {
+        "filename": "medicamentos",
+        "queryset": Medicine.objects.all,
+        "columns": ["id", "name", "description", "dose"],
+    },
+}
+
+
+def batched(rows, size):
+    """Groups an iterable of rows into lists of at most size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def abatched(rows, size):
+    """batched for async iterables."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_text(rows):
+    """Serializes rows as CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def csv_chunks(columns, batches):
+    """Serializes batches of rows as CSV, one chunk of text per batch."""
+    # The header goes out on its own so the first byte doesn't wait for a
+    # whole batch of rows.
+    yield csv_text([columns])
+    for batch in batches:
+        yield csv_text(batch)
+
+
+async def acsv_chunks(columns, batches):
+    """csv_chunks for async iterables of batches."""
+    yield csv_text([columns])
+    async for batch in batches:
+        yield csv_text(batch)
+
+
+def ndjson_text(columns, rows):
+    """Serializes rows as newline delimited JSON objects."""
+    return "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+
+
+def ndjson_chunks(columns, batches):
+    """Serializes batches of rows as newline delimited JSON objects."""
+    for batch in batches:
+        yield ndjson_text(columns, batch)
+
+
+async def andjson_chunks(columns, batches):
+    """ndjson_chunks for async iterables of batches."""
+    async for batch in batches:
+        yield ndjson_text(columns, batch)
+
+
+def export_stream(queryset, columns, export_format):
+    """
+    Streams the given columns of a queryset in the given format.
+
+    Rows are read with a chunked cursor, EXPORT_CHUNK_SIZE at a time, so
+    memory stays flat regardless of the number of rows exported.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    rows = queryset.values_list(*columns).order_by("id").iterator(
+        chunk_size=chunk_size,
+    )
+    batches = batched(rows, chunk_size)
+
+    if export_format == "ndjson":
+        return ndjson_chunks(columns, batches)
+    return csv_chunks(columns, batches)
+
+
+def aexport_stream(queryset, columns, export_format):
+    """
+    export_stream for ASGI: the rows are read with the async ORM, so the
+    event loop serves other requests while the database fetches a chunk.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    # Named rows: the plain values_list iterable runs its query as soon as
+    # aiterator creates it, in the event loop, which Django forbids.
+    rows = queryset.values_list(*columns, named=True).order_by("id").aiterator(
+        chunk_size=chunk_size,
+    )
+    batches = abatched(rows, chunk_size)
+
+    if export_format == "ndjson":
+        return andjson_chunks(columns, batches)
+    return acsv_chunks(columns, batches)
+
+
+def export_response(request, resource):
+    """
+    Builds the streaming response of the export of a resource.
+
+    Under ASGI the response streams asynchronously. Under WSGI it keeps a
+    synchronous stream: Django would read a whole async stream into memory
+    before sending it.
+    """
+    export_format = request.GET.get("format", "csv")
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest("Formato de exportación inválido")
+
+    export = EXPORTS[resource]
+    queryset = apply_filters(request, export["queryset"](), resource)
+    stream = aexport_stream if isinstance(request, ASGIRequest) else export_stream
+
+    response = StreamingHttpResponse(
+        stream(queryset, export["columns"], export_format),
+        content_type=FORMATS[export_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{export["filename"]}.{export_format}"'
+    )
+    return response
@@ -0,0 +1,49 @@
+from django.core.exceptions import ValidationError
+
+from .validation import INTEGER_MAX, INTEGER_MIN
+
+# Query params accepted by the repository and export views of each resource,
+# mapped to the lookup they apply.
+FILTERS = {
+    "clients": {"name": "name__istartswith", "email": "email__iexact"},
+    "pets": {
+        "name": "name__istartswith",
+        "breed": "breed__iexact",
+        "client": "client_id",
+    },
+    "vets": {"name": "name__istartswith"},
+    "providers": {"name": "name__istartswith"},
+    "products": {"name": "name__istartswith", "type": "type__iexact"},
+    "medicines": {"name": "name__istartswith"},
+    "appointments": {
+        "pet": "pet_id",
+        "vet": "vet_id",
+        "date_from": "date__gte",
+        "date_to": "date__lte",
+    },
+}
+
+
+def apply_filters(request, queryset, resource):
+    """
+    Applies the filters of a resource present in the request query params.
+
+    Filters with a value that doesn't fit the field (e.g. a malformed date,
+    or an id larger than SQLite integers) are ignored instead of failing the
+    whole request.
+    """
+    for param, lookup in FILTERS[resource].items():
+        value = request.GET.get(param, "").strip()
+        if value == "":
+            continue
+
+        field = queryset.model._meta.get_field(lookup.split("__")[0])
+        try:
+            value = field.to_python(value)
+            if isinstance(value, int) and not INTEGER_MIN <= value <= INTEGER_MAX:
+                continue
+            queryset = queryset.filter(**{lookup: value})
+        except (ValueError, ValidationError):
+            continue
+
+    return queryset
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+ROW_KEY = "row:{}:{}:{}:{}"
+
+# Rows are cached with this token in their delete forms, it's replaced with
+# the token of the request when the rows are put in a page. Only inside the
+# hidden input of {% csrf_token %}: the quotes around it can't come from
+# (escaped) user data, so a name with the placeholder isn't replaced.
+CSRF_PLACEHOLDER = "__csrf_token__"
+CSRF_INPUT = 'name="csrfmiddlewaretoken" value="{}"'
+
+
+class FragmentMetrics:
+    """
+    Counters of the row fragments of the process: how many were served from
+    the cache and how many had to be rendered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Sets every counter back to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def record(self, hits, misses):
+        """Records the cache hits and misses of a rendered table."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def snapshot(self):
+        """Returns the counters and the hit ratio as a dict."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+fragment_metrics = FragmentMetrics()
+
+
+def template_version(template):
+    """Hash of the source of a template, so changes to it don't serve old rows."""
+    return hashlib.md5(template.template.source.encode()).hexdigest()
+
+
+def row_key(version, obj):
+    """
+    Cache key of the fragment of a row: the template version, the object and
+    the time it was last updated.
+    """
+    return ROW_KEY.format(version, obj._meta.label_lower, obj.pk, obj.updated_at.timestamp())
+
+
+def render_rows(context, objects, template_name, name):
+    """
+    Renders every object with the row template, reusing the fragments of the
+    objects that didn't change since they were last rendered.
+
+    The template gets the object as the name variable. Every fragment is read
+    with a single get_many and the new ones are stored with a single
+    set_many, so a table with one edited row renders one fragment.
+    FRAGMENT_CACHE_TIMEOUT=0 renders every row.
+    """
+    objects = list(objects)
+    cache = caches["fragments"]
+    timeout = settings.FRAGMENT_CACHE_TIMEOUT
+    template = get_template(template_name)
+    version = template_version(template)
+    keys = [row_key(version, obj) for obj in objects]
+    fragments = cache.get_many(keys) if timeout else {}
+
+    missing = {}
+    for key, obj in zip(keys, objects):
+        if key not in fragments and key not in missing:
+            missing[key] = template.render({name: obj, "csrf_token": CSRF_PLACEHOLDER})
+    if missing and timeout:
+        cache.set_many(missing, timeout)
+
+    hits = len(keys) - len(missing)
+    fragment_metrics.record(hits, len(missing))
+    logger.debug("%s: %d cached rows, %d rendered", template_name, hits, len(missing))
+
+    html = "".join(fragments[key] if key in fragments else missing[key] for key in keys)
+    token = str(context.get("csrf_token", ""))
+    return mark_safe(
+        html.replace(CSRF_INPUT.format(CSRF_PLACEHOLDER), CSRF_INPUT.format(token)),
+    )
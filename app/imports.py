@@ -0,0 +1,188 @@
+import codecs
+import csv
+import io
+
+from django.conf import settings
+from django.db import transaction
+
+from . import search
+from .cache import bump_version
+from .conditional import record_change
+from .db import retry_on_lock
+from .models import Client, Pet
+from .validation import CLIENT_SCHEMA, INTEGER_MAX, PET_SCHEMA, to_date
+
+# Encoding of the lines that aren't UTF-8: Excel saves CSV files in the
+# Windows code page of the locale, Windows-1252 for Spanish.
+FALLBACK_ENCODING = "cp1252"
+
+
+def build_client(row):
+    """Builds an unsaved client from a CSV row."""
+    return Client(
+        name=row.get("name"),
+        phone=row.get("phone"),
+        email=row.get("email"),
+        address=row.get("address") or "",
+    )
+
+
+def build_pet(row):
+    """Builds an unsaved pet from a CSV row."""
+    return Pet(
+        name=row.get("name"),
+        breed=row.get("breed"),
+        birthday=to_date(row.get("birthday")),
+        client_id=row.get("client"),
+    )
+
+
+def check_pet_clients(rows):
+    """
+    Returns the errors of the pets whose client doesn't exist, looking up all
+    the clients of a batch in a single query.
+    """
+    client_ids = {
+        int(row["client"])
+        for _, row in rows
+        if row.get("client", "").isdecimal() and int(row["client"]) <= INTEGER_MAX
+    }
+    existing = set(
+        Client.objects.filter(id__in=client_ids).values_list("id", flat=True),
+    )
+
+    errors = {}
+    for line, row in rows:
+        client = row.get("client", "")
+        if not client.isdecimal() or int(client) not in existing:
+            errors[line] = {"client": "El cliente seleccionado no existe."}
+    return errors
+
+
+IMPORTERS = {
+    "clients": {
+        "model": Client,
+        "schema": CLIENT_SCHEMA,
+        "build": build_client,
+        "check_batch": None,
+    },
+    "pets": {
+        "model": Pet,
+        "schema": PET_SCHEMA,
+        "build": build_pet,
+        "check_batch": check_pet_clients,
+    },
+}
+
+
+class ImportResult:
+    """Summary of an import: number of rows created and errors per line."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        """Number of rows that were not imported."""
+        return len(self.errors)
+
+    def add_errors(self, line, errors):
+        """Records the validation errors of a CSV line."""
+        self.errors.append({"line": line, "errors": errors})
+
+
+def decode_lines(file):
+    """
+    Decodes the lines of a binary file as UTF-8, or FALLBACK_ENCODING the
+    ones that aren't, so the files saved by Excel are read too.
+    """
+    for number, line in enumerate(file):
+        if number == 0 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield line.decode(FALLBACK_ENCODING, errors="replace")
+
+
+def read_csv(file):
+    """Reads a CSV file (text or binary) yielding (line number, row) pairs."""
+    if not isinstance(file, io.TextIOBase):
+        file = decode_lines(file)
+
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, {
+            key.strip(): (value or "").strip() for key, value in row.items() if key
+        }
+
+
+def insert_batch(model, objs):
+    """
+    Inserts a batch of objects, adds them to the search index, records the
+    change of the table and invalidates the cached pages of the model.
+    """
+    created = model.objects.bulk_create(objs)
+    # bulk_create doesn't send post_save, so the search index, the change
+    # time and the cache are updated here.
+    search.index_objects(created)
+    record_change(model)
+    transaction.on_commit(lambda: bump_version(model))
+    return created
+
+
+def import_batch(importer, rows, result):
+    """
+    Validates a batch of rows and inserts the valid ones in one write
+    transaction, retried if the database is locked.
+    """
+    valid = []
+    rows_errors = importer["schema"].validate_many(row for _, row in rows)
+    for (line, row), errors in zip(rows, rows_errors):
+        if errors:
+            result.add_errors(line, errors)
+        else:
+            valid.append((line, row))
+
+    if importer["check_batch"] and valid:
+        batch_errors = importer["check_batch"](valid)
+        for line, errors in batch_errors.items():
+            result.add_errors(line, errors)
+        valid = [(line, row) for line, row in valid if line not in batch_errors]
+
+    if not valid:
+        return
+
+    objs = [importer["build"](row) for _, row in valid]
+    created = retry_on_lock(insert_batch, importer["model"], objs)
+    result.created += len(created)
+
+
+def import_csv(resource, file, batch_size=None):
+    """
+    Imports the rows of a CSV file as objects of a resource ("clients" or
+    "pets").
+
+    The file is read as a stream and processed in batches of batch_size rows
+    (IMPORT_BATCH_SIZE by default): every row is validated with the same
+    rules as the forms and the valid rows of a batch are inserted with a
+    single bulk_create inside a transaction. Invalid rows are skipped and
+    reported by line number in the result.
+    """
+    importer = IMPORTERS[resource]
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    result = ImportResult()
+
+    batch = []
+    for line, row in read_csv(file):
+        batch.append((line, row))
+        if len(batch) == batch_size:
+            import_batch(importer, batch, result)
+            batch = []
+
+    if batch:
+        import_batch(importer, batch, result)
+
+    result.errors.sort(key=lambda error: error["line"])
+    return result
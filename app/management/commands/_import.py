@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.imports import import_csv
+
+
+class ImportCommand(BaseCommand):
+    """Base command that imports a CSV file into a resource."""
+
+    resource = None
+    label = None
+
+    def add_arguments(self, parser):
+        """Adds the CSV path and batch size arguments."""
+        parser.add_argument("path", help="Ruta del archivo CSV")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Filas validadas e insertadas por transacción",
+        )
+
+    def handle(self, *args, **options):
+        """Imports the file and reports the rows with errors."""
+        try:
+            # Binary, read_csv decodes the lines that aren't UTF-8 too.
+            with open(options["path"], "rb") as file:
+                result = import_csv(self.resource, file, options["batch_size"])
+        except OSError as e:
+            raise CommandError(e) from e
+
+        for error in result.errors:
+            messages = "; ".join(
+                f"{field}: {message}" for field, message in error["errors"].items()
+            )
+            self.stderr.write(f"Línea {error['line']}: {messages}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} {self.label} importados, "
+                f"{result.failed} filas con errores",
+            ),
+        )
@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.audit import audit, seed, unexpected_issues
+
+LABELS = {
+    "full_scan": "Recorrido completo",
+    "missing_index": "Falta índice",
+    "temp_btree": "B-tree temporal",
+}
+
+
+class Command(BaseCommand):
+    """
+    Requests every URL of the app, runs EXPLAIN QUERY PLAN on the SQL
+    statements of each view and reports full scans, temporary B-trees and
+    missing indexes.
+    """
+
+    help = "Audita los planes de consulta de todas las vistas"
+
+    def add_arguments(self, parser):
+        """Adds the output format, database and strict arguments."""
+        parser.add_argument(
+            "--format",
+            choices=["text", "json"],
+            default="text",
+            help="Formato del reporte",
+        )
+        parser.add_argument(
+            "--use-existing",
+            action="store_true",
+            help="Audita la base de datos configurada en vez de una de prueba con datos generados",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Termina con error si se encuentran problemas",
+        )
+
+    def handle(self, *args, **options):
+        """Audits the views and writes the report."""
+        if options["use_existing"]:
+            reports = audit()
+        else:
+            # A throwaway database, so the audit never depends on (or
+            # touches) the data of the configured one.
+            old_name = connection.creation.create_test_db(verbosity=0)
+            try:
+                seed()
+                reports = audit()
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps(reports, indent=2, default=str))
+        else:
+            self.write_text(reports)
+
+        issues = unexpected_issues(reports)
+        if options["strict"] and issues:
+            raise CommandError(f"{issues} problemas en los planes de consulta")
+
+    def write_text(self, reports):
+        """Writes the report of every view and a summary."""
+        for report in reports:
+            self.stdout.write(
+                f"{report['name']} {report['method']} {report['path']} "
+                f"[{report['status']}] {report['queries']} consultas",
+            )
+            for statement in report["statements"]:
+                for issue in statement["issues"]:
+                    columns = ", ".join(issue["columns"])
+                    table = f" {issue['table']}({columns})" if issue["table"] else ""
+                    line = f"  {LABELS[issue['kind']]}{table}: {issue['detail']}"
+                    if issue["expected"]:
+                        self.stdout.write(f"{line} (esperado)")
+                    else:
+                        self.stdout.write(self.style.WARNING(line))
+                        self.stdout.write(f"    {statement['sql']}")
+
+        issues = unexpected_issues(reports)
+        summary = f"{len(reports)} vistas auditadas, {issues} problemas"
+        style = self.style.WARNING if issues else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,9 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    """Imports clients from a CSV file with name, phone, email and address columns."""
+
+    help = "Importa clientes desde un archivo CSV"
+    resource = "clients"
+    label = "clientes"
@@ -0,0 +1,9 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    """Imports pets from a CSV file with name, breed, birthday and client columns."""
+
+    help = "Importa mascotas desde un archivo CSV"
+    resource = "pets"
+    label = "mascotas"
@@ -0,0 +1,88 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.models import Appointment, Client, Medicine, Pet, Product, Provider, Vet
+from app.seeding import seed_data
+
+LABELS = {
+    Client: "Clientes",
+    Pet: "Mascotas",
+    Vet: "Veterinarios",
+    Appointment: "Citas",
+    Provider: "Proveedores",
+    Product: "Productos",
+    Medicine: "Medicamentos",
+}
+
+
+class Command(BaseCommand):
+    """
+    Fills the database with synthetic clinic data (see app.seeding) to run the
+    benchmarks against a realistic volume: clients and their pets, vets with
+    their schedules filled with appointments, providers, products and
+    medicines. The same arguments give the same data.
+    """
+
+    help = "Genera datos sintéticos de una clínica para los benchmarks"
+
+    def add_arguments(self, parser):
+        """Adds the number of rows of every model, the seed and the batch size."""
+        for name, default, label in [
+            ("clients", 1000, "Cantidad de clientes"),
+            ("pets-per-client", 2, "Mascotas por cliente"),
+            ("vets", 20, "Cantidad de veterinarios"),
+            ("appointments", 10000, "Cantidad de citas"),
+            ("providers", 50, "Cantidad de proveedores"),
+            ("products", 200, "Cantidad de productos"),
+            ("medicines", 100, "Cantidad de medicamentos"),
+        ]:
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"{label} (por defecto %(default)s)",
+            )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Semilla de los datos generados (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="Fecha de la primera cita, AAAA-MM-DD (por defecto hoy)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Filas por transacción (por defecto %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        """Generates the data and prints the rows and time of every model."""
+        def progress(model, count, seconds):
+            self.stdout.write(f"{LABELS[model]:<14} {count:>9}  {seconds:7.1f} s")
+
+        started = time.perf_counter()
+        counts = seed_data(
+            clients=options["clients"],
+            pets_per_client=options["pets_per_client"],
+            vets=options["vets"],
+            appointments=options["appointments"],
+            providers=options["providers"],
+            products=options["products"],
+            medicines=options["medicines"],
+            seed=options["seed"],
+            start=options["start"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        total = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"{'Total':<14} {sum(counts.values()):>9}  {total:7.1f} s"),
+        )
@@ -0,0 +1,98 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.server import Master
+
+
+class Command(BaseCommand):
+    """
+    Serves the app in production: a master process that preloads the app and
+    forks worker processes of several threads, see app.server.
+    """
+
+    help = "Sirve la aplicación con varios procesos (reemplaza a runserver en producción)"
+
+    # The checks run once in the master, not in every worker.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        """Adds the address and the worker arguments."""
+        parser.add_argument(
+            "addrport",
+            nargs="?",
+            default=settings.SERVER_BIND,
+            help="Dirección y puerto (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SERVER_WORKERS,
+            help="Procesos (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.SERVER_THREADS,
+            help="Hilos por proceso (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=settings.SERVER_MAX_REQUESTS,
+            help="Pedidos tras los que se reinicia un proceso, 0 nunca (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=settings.SERVER_MAX_REQUESTS_JITTER,
+            help="Pedidos extra al azar para que los procesos no se reinicien a la vez",
+        )
+        parser.add_argument(
+            "--no-preload",
+            action="store_false",
+            dest="preload",
+            help="Carga la aplicación en cada proceso en vez de antes de crearlos",
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=settings.SERVER_GRACEFUL_TIMEOUT,
+            help="Segundos para terminar los pedidos en curso al detenerse",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=settings.SERVER_TIMEOUT,
+            help="Segundos sin recibir datos tras los que se cierra una conexión "
+            "(por defecto %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        """Runs the master until SIGTERM or SIGINT."""
+        if not hasattr(os, "fork"):
+            raise CommandError("serve requiere un sistema con fork(), use runserver")
+
+        host, _, port = options["addrport"].rpartition(":")
+        if not port.isdigit():
+            raise CommandError(f"Dirección inválida: {options['addrport']}")
+        if options["workers"] < 1 or options["threads"] < 1:
+            raise CommandError("Se necesita al menos un proceso y un hilo")
+
+        self.check(display_num_errors=False)
+        self.stdout.write(
+            f"Sirviendo en http://{host or '0.0.0.0'}:{port}/ con {options['workers']} "
+            f"procesos de {options['threads']} hilos",
+        )
+        Master(
+            host.strip("[]") or "0.0.0.0",
+            int(port),
+            options["workers"],
+            options["threads"],
+            max_requests=options["max_requests"],
+            max_requests_jitter=options["max_requests_jitter"],
+            preload=options["preload"],
+            graceful_timeout=options["graceful_timeout"],
+            timeout=options["timeout"],
+        ).run()
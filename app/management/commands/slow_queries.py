@@ -0,0 +1,59 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.slow_queries import aggregate, read_log
+
+
+class Command(BaseCommand):
+    """
+    Sums up the slow query log (see app.slow_queries): the statements that
+    took the most time in total, grouped by fingerprint, with the views that
+    ran them.
+    """
+
+    help = "Resume el registro de consultas lentas"
+
+    def add_arguments(self, parser):
+        """Adds the log, top and format arguments."""
+        parser.add_argument(
+            "--log",
+            default=settings.SLOW_QUERY_LOG,
+            help="Archivo del registro, se leen los de todos los procesos (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Cantidad de consultas a mostrar (por defecto %(default)s)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["text", "json"],
+            default="text",
+            help="Formato del reporte",
+        )
+
+    def handle(self, *args, **options):
+        """Aggregates the log and writes the report."""
+        groups = aggregate(read_log(options["log"]))[: options["top"]]
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps(groups, indent=2))
+            return
+        if not groups:
+            self.stdout.write("No hay consultas lentas registradas")
+            return
+
+        for rank, group in enumerate(groups, 1):
+            self.stdout.write(
+                f"{rank}. {group['count']} veces, total {group['total_ms']:.1f} ms, "
+                f"media {group['mean_ms']:.1f} ms, máx {group['max_ms']:.1f} ms",
+            )
+            self.stdout.write(f"   {group['fingerprint']}")
+            views = sorted(group["views"].items(), key=lambda item: -item[1])
+            self.stdout.write("   Vistas: " + ", ".join(f"{view} ({n})" for view, n in views))
+            if group["frames"]:
+                frame = max(group["frames"].items(), key=lambda item: item[1])[0]
+                self.stdout.write(f"   Origen: {frame}")
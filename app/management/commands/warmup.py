@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from app.warmup import warm_up
+
+LABELS = {
+    "templates": "Plantillas",
+    "urls": "URLs",
+    "models": "Modelos",
+}
+
+
+class Command(BaseCommand):
+    """
+    Runs the warm-up the server processes do at startup (see app.warmup) and
+    reports how long every phase took, compiling every template on the way.
+    """
+
+    help = "Precarga las plantillas, URLs y modelos e informa cuánto tarda"
+
+    def handle(self, *args, **options):
+        """Runs the warm-up and prints the time of every phase."""
+        total = 0.0
+        for phase, count, seconds in warm_up():
+            total += seconds
+            self.stdout.write(f"{LABELS[phase]:<12} {count:>4}  {seconds * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{'Total':<12} {'':>4}  {total * 1000:8.1f} ms"))
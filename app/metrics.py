@@ -0,0 +1,399 @@
+"""
+Operational metrics of the app in the Prometheus text format, see
+MetricsMiddleware and the /metrics view.
+
+Every process counts in memory (a Registry) and adds what it counted since
+its last flush to a SQLite file shared by the processes of the server
+(METRICS_DB) at most every METRICS_FLUSH_INTERVAL seconds. /metrics reads
+the sums of every process from that file, so the counters of the workers of
+`manage.py serve`, including the ones that were already replaced, are
+aggregated. The gauges (rows per model, cache hit ratios) are computed when
+/metrics is requested, the rows per model at most every
+METRICS_ROWS_TIMEOUT seconds.
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+from .compression import compression_metrics
+from .db import write_metrics
+from .fragments import fragment_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the buckets of the request latency histogram.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Methods counted by name, the rest (sent by clients, so unbounded) as "other".
+METHODS = frozenset(["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+
+ROWS_KEY = "metrics:model_rows"
+
+# Name: (type, help) of every metric family.
+FAMILIES = {
+    "vetsoft_http_requests_total": (
+        "counter", "Requests handled, by URL name, method and status.",
+    ),
+    "vetsoft_http_request_duration_seconds": (
+        "histogram", "Time to respond to a request, by URL name.",
+    ),
+    "vetsoft_http_errors_total": (
+        "counter", "Requests answered with a 5xx status, by URL name.",
+    ),
+    "vetsoft_db_queries_total": ("counter", "SQL statements executed."),
+    "vetsoft_db_query_duration_seconds_total": (
+        "counter", "Time spent executing SQL statements.",
+    ),
+    "vetsoft_page_cache_requests_total": (
+        "counter", "Lookups of the rendered repository pages cache, by result.",
+    ),
+    "vetsoft_page_cache_hit_ratio": (
+        "gauge", "Fraction of the repository page lookups served from the cache.",
+    ),
+    "vetsoft_fragment_cache_requests_total": (
+        "counter", "Lookups of the rendered table rows cache, by result.",
+    ),
+    "vetsoft_fragment_cache_hit_ratio": (
+        "gauge", "Fraction of the table rows served from the cache.",
+    ),
+    "vetsoft_write_transactions_total": ("counter", "Write transactions started."),
+    "vetsoft_write_lock_wait_seconds_total": (
+        "counter", "Time the write transactions waited for the database lock.",
+    ),
+    "vetsoft_write_retries_total": (
+        "counter", "Write transactions retried because the database was locked.",
+    ),
+    "vetsoft_write_failures_total": (
+        "counter", "Write transactions that gave up because the database was locked.",
+    ),
+    "vetsoft_compression_responses_total": ("counter", "Responses compressed."),
+    "vetsoft_compression_original_bytes_total": (
+        "counter", "Size of the compressed responses before compression.",
+    ),
+    "vetsoft_compression_compressed_bytes_total": (
+        "counter", "Size of the compressed responses after compression.",
+    ),
+    "vetsoft_compression_cpu_seconds_total": ("counter", "CPU time spent compressing."),
+    "vetsoft_model_rows": ("gauge", "Rows of every model of the app."),
+}
+
+# Counters of the process kept by other modules: (metric, labels, source,
+# snapshot key). Their increase is added to the store on every flush.
+SOURCES = [
+    ("vetsoft_fragment_cache_requests_total", (("result", "hit"),), fragment_metrics, "hits"),
+    ("vetsoft_fragment_cache_requests_total", (("result", "miss"),), fragment_metrics, "misses"),
+    ("vetsoft_write_transactions_total", (), write_metrics, "transactions"),
+    ("vetsoft_write_lock_wait_seconds_total", (), write_metrics, "lock_wait"),
+    ("vetsoft_write_retries_total", (), write_metrics, "retries"),
+    ("vetsoft_write_failures_total", (), write_metrics, "failures"),
+    ("vetsoft_compression_responses_total", (), compression_metrics, "responses"),
+    ("vetsoft_compression_original_bytes_total", (), compression_metrics, "original_bytes"),
+    ("vetsoft_compression_compressed_bytes_total", (), compression_metrics, "compressed_bytes"),
+    ("vetsoft_compression_cpu_seconds_total", (), compression_metrics, "cpu_time"),
+]
+
+
+class Store:
+    """
+    The SQLite file where the processes add up their counters. Each process
+    opens its own connection (a connection can't cross a fork).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def connection(self):
+        """The connection of the current process, creating the table if needed."""
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False,
+            )
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = OFF")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics (name TEXT, labels TEXT, value REAL, "
+                "PRIMARY KEY (name, labels))",
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, increments):
+        """Adds the increments {(name, labels): value} in a single transaction."""
+        rows = [(name, encode_labels(labels), value) for (name, labels), value in increments.items()]
+        with self._lock:
+            connection = self.connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                    rows,
+                )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def read(self):
+        """The sums of every process as {(name, labels): value}."""
+        with self._lock:
+            rows = self.connection().execute("SELECT name, labels, value FROM metrics").fetchall()
+        return {(name, decode_labels(labels)): value for name, labels, value in rows}
+
+    def clear(self):
+        """Forgets every counter."""
+        with self._lock:
+            self.connection().execute("DELETE FROM metrics")
+
+
+def encode_labels(labels):
+    """Labels as stored: name=value pairs sorted by name, one per line."""
+    return "\n".join(f"{name}={value}" for name, value in labels)
+
+
+def decode_labels(text):
+    """The labels stored by encode_labels."""
+    return tuple(tuple(pair.split("=", 1)) for pair in text.split("\n")) if text else ()
+
+
+class Registry:
+    """
+    Counters of the process not yet added to the store, and the values of the
+    SOURCES at the last flush.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.pending = {}
+        self.flushed_sources = {}
+        self.last_flush = time.monotonic()
+
+    def add(self, increments):
+        """Adds the [((name, labels), value)] increments to the counters."""
+        with self._lock:
+            for key, value in increments:
+                self.pending[key] = self.pending.get(key, 0) + value
+
+    def inc(self, name, value=1, **labels):
+        """Increments a counter."""
+        self.add([((name, tuple(sorted(labels.items()))), value)])
+
+    def observe_request(self, view, method, status, seconds):
+        """Counts a request and its latency."""
+        labels = (("view", view),)
+        method = method if method in METHODS else "other"
+        # The buckets are cumulative: a request counts in every bucket whose
+        # upper bound it doesn't exceed. The others get 0 so every bucket of
+        # the histogram is listed.
+        first = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        increments = [
+            (("vetsoft_http_requests_total",
+              (("method", method), ("status", str(status)), ("view", view))), 1),
+            (("vetsoft_http_request_duration_seconds_sum", labels), seconds),
+            (("vetsoft_http_request_duration_seconds_count", labels), 1),
+            (("vetsoft_http_request_duration_seconds_bucket", (("le", "+Inf"), *labels)), 1),
+            *(
+                (("vetsoft_http_request_duration_seconds_bucket",
+                  (("le", format_value(bound)), *labels)), int(i >= first))
+                for i, bound in enumerate(LATENCY_BUCKETS)
+            ),
+        ]
+        if status >= 500:
+            increments.append((("vetsoft_http_errors_total", labels), 1))
+        self.add(increments)
+
+    def due(self):
+        """Whether METRICS_FLUSH_INTERVAL seconds passed since the last flush."""
+        return time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL
+
+    def flush(self, force=False):
+        """Adds the pending counters and the increase of the SOURCES to the store, when due."""
+        if not force and not self.due():
+            return
+        now = time.monotonic()
+        snapshots = {}
+        with self._lock:
+            self.last_flush = now
+            increments, self.pending = self.pending, {}
+            for name, labels, source, field in SOURCES:
+                if source not in snapshots:
+                    snapshots[source] = source.snapshot()
+                value = snapshots[source][field]
+                delta = value - self.flushed_sources.get((name, labels), 0)
+                # A reset of the source (the tests) starts it over.
+                if delta < 0:
+                    delta = value
+                self.flushed_sources[(name, labels)] = value
+                if delta:
+                    increments[(name, labels)] = increments.get((name, labels), 0) + delta
+        if increments:
+            self.store.add(increments)
+
+    def forget(self):
+        """
+        Drops what the process counted so far: a forked worker starts with a
+        copy of what the master counted, which isn't its own.
+        """
+        with self._lock:
+            self.pending = {}
+            for name, labels, source, field in SOURCES:
+                self.flushed_sources[(name, labels)] = source.snapshot()[field]
+            self.last_flush = time.monotonic()
+
+
+registry = Registry(Store(settings.METRICS_DB))
+os.register_at_fork(after_in_child=registry.forget)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper of every database connection (see app.sqlite3)."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        registry.add(
+            [
+                (("vetsoft_db_queries_total", ()), 1),
+                (("vetsoft_db_query_duration_seconds_total", ()), time.perf_counter() - start),
+            ],
+        )
+
+
+def count_rows():
+    """Rows of every model of the app as {(name, labels): value}."""
+    return {
+        ("vetsoft_model_rows", (("model", model._meta.label_lower),)): model.objects.count()
+        for model in apps.get_app_config("app").get_models()
+    }
+
+
+def model_rows():
+    """
+    The rows of every model, counted at most every METRICS_ROWS_TIMEOUT
+    seconds (COUNT(*) reads the whole table) by any of the processes sharing
+    the cache.
+    """
+    timeout = settings.METRICS_ROWS_TIMEOUT
+    if not timeout:
+        return count_rows()
+    return cache.get_or_set(ROWS_KEY, count_rows, timeout)
+
+
+def hit_ratios(values):
+    """The hit ratio gauges of the caches, from the summed lookups."""
+    ratios = {}
+    for kind in ("page", "fragment"):
+        name = f"vetsoft_{kind}_cache_requests_total"
+        hits = values.get((name, (("result", "hit"),)), 0)
+        misses = values.get((name, (("result", "miss"),)), 0)
+        total = hits + misses
+        ratios[(f"vetsoft_{kind}_cache_hit_ratio", ())] = hits / total if total else 0.0
+    return ratios
+
+
+def format_value(value):
+    """A sample value as Prometheus expects it."""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape(value):
+    """Escapes a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def family(name):
+    """The family of a sample name (histograms have _bucket, _sum, _count)."""
+    if name in FAMILIES:
+        return name
+    return name.rsplit("_", 1)[0]
+
+
+def exposition(values):
+    """Renders {(name, labels): value} in the Prometheus text format."""
+
+    def sort_key(key):
+        name, labels = key
+        # The buckets of a histogram in increasing order of their bound.
+        le = dict(labels).get("le")
+        bound = float("inf") if le == "+Inf" else float(le or 0)
+        return family(name), name, [pair for pair in labels if pair[0] != "le"], bound
+
+    lines = []
+    current = None
+    for key in sorted(values, key=sort_key):
+        name, labels = key
+        if family(name) != current:
+            current = family(name)
+            kind, help_text = FAMILIES[current]
+            lines.append(f"# HELP {current} {help_text}")
+            lines.append(f"# TYPE {current} {kind}")
+        label_text = ",".join(f'{label}="{escape(value)}"' for label, value in labels)
+        sample = f"{name}{{{label_text}}}" if labels else name
+        lines.append(f"{sample} {format_value(values[key])}")
+    return "\n".join(lines) + "\n"
+
+
+def collect():
+    """Every metric of the app, aggregated across processes."""
+    registry.flush(force=True)
+    values = registry.store.read()
+    values.update(hit_ratios(values))
+    values.update(model_rows())
+    return values
+
+
+class MetricsMiddleware:
+    """
+    Counts every request by URL name (from app/urls.py), method and status,
+    with its latency, and flushes the counters of the process to the store
+    from time to time. Requests that don't match a URL (static files, 404s)
+    are labelled "unmatched".
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Handles the request and counts it."""
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        registry.flush()
+        return response
+
+    async def __acall__(self, request):
+        """Handles the request and counts it, under ASGI."""
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        if registry.due():
+            await sync_to_async(registry.flush, thread_sensitive=False)()
+        return response
+
+    def observe(self, request, response, seconds):
+        """Counts the request."""
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match and match.url_name else "unmatched"
+        registry.observe_request(view, request.method, response.status_code, seconds)
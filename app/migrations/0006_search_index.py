@@ -0,0 +1,33 @@
+from django.db import migrations
+
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE app_search USING fts5(
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# rowid = object id * 8 + kind, see app/search.py
+POPULATE_INDEX = """
+INSERT INTO app_search (rowid, title, body)
+    SELECT id * 8 + 1, name, email || ' ' || address FROM app_client;
+INSERT INTO app_search (rowid, title, body)
+    SELECT id * 8 + 2, name, breed FROM app_pet;
+INSERT INTO app_search (rowid, title, body)
+    SELECT id * 8 + 3, name, '' FROM app_vet;
+INSERT INTO app_search (rowid, title, body)
+    SELECT id * 8 + 4, name, address FROM app_provider;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_repository_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, reverse_sql="DROP TABLE app_search;"),
+        migrations.RunSQL(POPULATE_INDEX, reverse_sql=migrations.RunSQL.noop),
+    ]
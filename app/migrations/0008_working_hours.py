@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_appointment_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('start', models.TimeField()),
+                ('end', models.TimeField()),
+                ('vet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='app.vet')),
+            ],
+        ),
+    ]
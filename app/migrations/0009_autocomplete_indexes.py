@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:31
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_working_hours'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), models.F('id'), name='client_name_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), models.F('id'), name='pet_name_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vet',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), models.F('id'), name='vet_name_nocase_idx'),
+        ),
+    ]
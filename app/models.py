@@ -1,9 +1,28 @@
-import re
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Collate
 from django.http import QueryDict
 
+from .db import immediate_atomic
+from .validation import (
+    APPOINTMENT_DEFAULT_DURATION,
+    APPOINTMENT_MAX_DURATION,
+    APPOINTMENT_SCHEMA,
+    CLIENT_SCHEMA,
+    MEDICINE_SCHEMA,
+    PET_SCHEMA,
+    PRODUCT_SCHEMA,
+    PROVIDER_SCHEMA,
+    VET_SCHEMA,
+    to_date,
+    to_time,
+)
+
+SLOT_TAKEN_MESSAGE = "El veterinario ya tiene una cita en ese horario."
+PAST_MIDNIGHT_MESSAGE = "La cita debe terminar antes de la medianoche."
+
 
 def object_to_querydict(obj):
     """Converts an object to a QueryDict object."""
@@ -19,198 +38,62 @@ def object_to_querydict(obj):
                 querydict.appendlist(attr, str(value))
     return querydict
 
-def can_be_integer(value):
-    """Checks if a value can be converted to an integer."""
-    try:
-        int(value)
-        return True
-    except ValueError:
-        return False
 
 def validate_client(data):
     """Validates the clients data."""
-    errors = {}
-
-    name = data.get("name", "")
-    phone = data.get("phone", "")
-    email = data.get("email", "")
-
-    if name == "":
-        errors["name"] = "Por favor ingrese un nombre"
-    elif not re.match("^[a-zA-Z\s]+$", name):
-        errors["name"] = "El nombre solo puede contener letras y espacios"
-
-    if phone == "":
-        errors["phone"] = "Por favor ingrese un teléfono"
-    elif not str(phone).startswith("54"):
-        errors["phone"] = "El teléfono debe comenzar con 54"
-    elif not can_be_integer(phone):
-        errors["phone"] = "El teléfono debe ser un número" 
-    if email == "":
-        errors["email"] = "Por favor ingrese un email"
-    elif email.count("@") == 0 or email.split("@")[0] == "" or len(email.split("@")) > 2:
-        errors["email"] = "Por favor ingrese un email valido"
-    elif not email.endswith('@vetsoft.com'):
-        errors["email"] = "El email debe ser de dominio vetsoft.com"
-
-    return errors
+    return CLIENT_SCHEMA.validate(data)
 
 
 def validate_pet(data):
     """
     Validates the pets data
     """
-    errors = {}
-
-    name = data.get("name", "")
-    breed = data.get("breed", "")
-    birthday = data.get("birthday", "")
-    client = data.get("client", "")
-
-    if not name:
-        errors["name"] = "Por favor ingrese un nombre para la mascota."
-
-    if not breed:
-        errors["breed"] = "Por favor ingrese una raza para la mascota."
-
-    if not birthday:
-        errors["birthday"] = (
-            "Por favor ingrese una fecha de nacimiento para la mascota."
-        )
-
-    if not client:
-        errors["client"] = "Por favor seleccione un cliente para la mascota."
-
-    today = datetime.now().date()
-    if isinstance(birthday, str) and birthday != "":
-        birthday = datetime.fromisoformat(birthday).date()
-    if birthday >= today:
-        errors["invalid_birthday"] = "Por favor ingrese una fecha de nacimiento valida."
-
-    return errors
+    return PET_SCHEMA.validate(data)
 
 
 def validate_vet(data):
     """
     Validates the vets data
     """
-    errors = {}
-
-    name = data.get("name", "")
-    phone = data.get("phone", "")
-    email = data.get("email", "")
-
-    if name == "":
-        errors["name"] = "Por favor ingrese un nombre"
-
-    if phone == "":
-        errors["phone"] = "Por favor ingrese un teléfono"
-
-    if email == "":
-        errors["email"] = "Por favor ingrese un email"
-    elif email.count("@") == 0:
-        errors["email"] = "Por favor ingrese un email valido"
-
-    return errors
+    return VET_SCHEMA.validate(data)
 
 
 def validate_provider(data):
     """
     Validates the providers data
     """
-    errors = {}
-
-    name = data.get("name", "")
-    email = data.get("email", "")
-    address = data.get("address", "")
-
-    if name == "":
-        errors["name"] = "Por favor ingrese un nombre"
-
-    if email == "":
-        errors["email"] = "Por favor ingrese un email"
-    elif email.count("@") == 0:
-        errors["email"] = "Por favor ingrese un email valido"
-    if address == "":
-        errors["address"] = "Por favor ingrese una dirección"
-
-    return errors
+    return PROVIDER_SCHEMA.validate(data)
 
 
 def validate_product(data):
     """
     Validates the products data
     """
-    errors = {}
-
-    name = data.get("name", "")
-    type = data.get("type", "")
-    price = data.get("price", "")
-
-    if not name:
-        errors["name"] = "Por favor ingrese un nombre del producto."
-
-    if not type:
-        errors["type"] = "Por favor ingrese el tipo de producto."
-
-    if not price:
-        errors["price"] = "Por favor ingrese el precio del producto."
-    elif not float(price) > 0:
-        errors["price"] = "Por favor ingrese un precio mayor a 0."
-
-    return errors
+    return PRODUCT_SCHEMA.validate(data)
 
 
 def validate_appointment(data):
     """
     Validates the appointments data
     """
-    errors = {}
-
-    pet = data.get("pet", "")
-    vet = data.get("vet", "")
-    date = data.get("date", "")
-    time = data.get("time", "")
-
-    if not pet:
-        errors["pet"] = "Por favor seleccione una mascota."
-
-    if not vet:
-        errors["vet"] = "Por favor seleccione un veterinario."
-
-    if not date:
-        errors["date"] = "Por favor seleccione una fecha."
-
-    if not time:
-        errors["time"] = "Por favor seleccione una hora."
-
-    return errors
+    return APPOINTMENT_SCHEMA.validate(data)
 
 
 def validate_medicine(data):
     """
     Validates the medicine data
     """
-    errors = {}
+    return MEDICINE_SCHEMA.validate(data)
 
-    name = data.get("name", "")
-    description = data.get("description", "")
-    dose = data.get("dose", "")
 
-    if not name:
-        errors["name"] = "Por favor ingrese un nombre del medicamento."
+class TableChange(models.Model):
+    """Time of the last change of the rows of a model, see app.conditional"""
 
-    if not description:
-        errors["description"] = "Por favor ingrese la descripción del medicamento."
+    table = models.CharField(max_length=100, primary_key=True)
+    updated_at = models.DateTimeField()
 
-    if not dose:
-        errors["dose"] = "Por favor ingrese la dosis del medicamento."
-    else:
-        dose_value = float(dose)
-        if dose_value < 1.0 or dose_value > 10.0:
-            errors["dose"] = "La dosis debe estar entre 1 y 10."
-
-    return errors
+    def __str__(self):
+        return self.table
 
 
 class Client(models.Model):
@@ -220,6 +103,16 @@ class Client(models.Model):
     phone = models.IntegerField()
     email = models.EmailField()
     address = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "id"], name="client_name_idx"),
+            # Prefix search of the autocomplete, see app.autocomplete.
+            models.Index(
+                Collate("name", "NOCASE"), "id", name="client_name_nocase_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -247,7 +140,7 @@ class Client(models.Model):
         self.email = client_data.get("email", "") or self.email
         self.phone = client_data.get("phone", "") or self.phone
         self.address = client_data.get("address", "") or self.address
-        errors = validate_client(object_to_querydict(self))
+        errors = CLIENT_SCHEMA.validate(self)
 
         if len(errors.keys()) > 0:
             return False, errors
@@ -263,6 +156,16 @@ class Pet(models.Model):
     breed = models.CharField(max_length=20)
     birthday = models.DateField()
     client = models.ForeignKey(Client, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "id"], name="pet_name_idx"),
+            # Prefix search of the autocomplete, see app.autocomplete.
+            models.Index(
+                Collate("name", "NOCASE"), "id", name="pet_name_nocase_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -284,6 +187,16 @@ class Pet(models.Model):
 
         return True, None
 
+    @classmethod
+    def repository_rows(cls):
+        """
+        Returns the pets joined with their owner in a single query, projected
+        to the columns displayed in the repository page.
+        """
+        return cls.objects.annotate(client_name=F("client__name")).values_list(
+            "id", "name", "breed", "birthday", "client_name", named=True,
+        )
+
     def update_pet(self, pet_data):
         """Update an existing pet in the database"""
         self.name = pet_data.get("name", "") or self.name
@@ -300,6 +213,16 @@ class Vet(models.Model):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15)
     email = models.EmailField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "id"], name="vet_name_idx"),
+            # Prefix search of the autocomplete, see app.autocomplete.
+            models.Index(
+                Collate("name", "NOCASE"), "id", name="vet_name_nocase_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -329,12 +252,39 @@ class Vet(models.Model):
         self.save()
 
 
+class WorkingHours(models.Model):
+    """Working hours of a vet on a day of the week"""
+
+    WEEKDAYS = [
+        (0, "Lunes"),
+        (1, "Martes"),
+        (2, "Miércoles"),
+        (3, "Jueves"),
+        (4, "Viernes"),
+        (5, "Sábado"),
+        (6, "Domingo"),
+    ]
+
+    vet = models.ForeignKey(Vet, on_delete=models.CASCADE, related_name="working_hours")
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    start = models.TimeField()
+    end = models.TimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start:%H:%M}-{self.end:%H:%M}"
+
+
 class Provider(models.Model):
     """Provider model"""
 
     name = models.CharField(max_length=100)
     email = models.EmailField()
     address = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "id"], name="provider_name_idx")]
 
     def __str__(self):
         return self.name
@@ -370,6 +320,10 @@ class Product(models.Model):
     name = models.CharField(max_length=20)
     type = models.CharField(max_length=20)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "id"], name="product_name_idx")]
 
     def __str__(self):
         return self.name
@@ -395,7 +349,7 @@ class Product(models.Model):
         self.type = product_data.get("type", "") or self.type
         self.price = product_data.get("price", "") or self.price
 
-        errors = validate_product(object_to_querydict(self))
+        errors = PRODUCT_SCHEMA.validate(self)
 
         if len(errors.keys()) > 0:
             return False, errors
@@ -411,10 +365,85 @@ class Appointment(models.Model):
     vet = models.ForeignKey(Vet, on_delete=models.CASCADE)
     date = models.DateField()
     time = models.TimeField()
+    duration = models.PositiveSmallIntegerField(default=APPOINTMENT_DEFAULT_DURATION)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "time", "id"], name="appointment_date_time_idx"),
+        ]
+        constraints = [
+            # Also the index of the overlap check of find_overlap.
+            models.UniqueConstraint(
+                fields=["vet", "date", "time"], name="appointment_vet_slot_unique",
+            ),
+        ]
 
     def __str__(self):
         return self.pet.name
 
+    @classmethod
+    def find_overlap(cls, vet_id, date, time, duration, exclude_id=None):
+        """
+        Returns the id of an appointment of the vet that overlaps the given
+        slot, or None if the slot is free.
+
+        Only appointments starting less than APPOINTMENT_MAX_DURATION minutes
+        before the slot can reach it, so the candidates are read with a single
+        range query on the (vet, date, time) index.
+        """
+        date = to_date(date)
+        start = datetime.combine(date, to_time(time))
+        end = start + timedelta(minutes=int(duration))
+        earliest = max(
+            start - timedelta(minutes=APPOINTMENT_MAX_DURATION),
+            datetime.combine(date, datetime.min.time()),
+        )
+
+        candidates = cls.objects.filter(
+            vet_id=vet_id, date=date, time__gte=earliest.time(),
+        )
+        if end.date() == date:
+            candidates = candidates.filter(time__lt=end.time())
+        if exclude_id is not None:
+            candidates = candidates.exclude(pk=exclude_id)
+
+        for id, other_time, other_duration in candidates.values_list(
+            "id", "time", "duration",
+        ):
+            other_start = datetime.combine(date, other_time)
+            if other_start + timedelta(minutes=other_duration) > start:
+                return id
+        return None
+
+    def _save_without_overlap(self):
+        """
+        Saves the appointment unless it overlaps another one of the vet.
+
+        The check and the write run in one immediate transaction, so of two
+        receptionists booking the same slot at the same time one gets it and
+        the other gets a validation error. Appointments end the day they
+        start: find_overlap only looks at the appointments of that day.
+        """
+        end = datetime.combine(self.date, self.time) + timedelta(minutes=self.duration)
+        if end > datetime.combine(self.date + timedelta(days=1), datetime.min.time()):
+            return False, {"duration": PAST_MIDNIGHT_MESSAGE}
+
+        with immediate_atomic():
+            overlap = Appointment.find_overlap(
+                self.vet_id, self.date, self.time, self.duration, exclude_id=self.pk,
+            )
+            if overlap is not None:
+                return False, {"time": SLOT_TAKEN_MESSAGE}
+
+            try:
+                with transaction.atomic():
+                    self.save()
+            except IntegrityError:
+                return False, {"time": SLOT_TAKEN_MESSAGE}
+
+        return True, None
+
     @classmethod
     def save_appointment(cls, appointment_data):
         """Save a new appointment to the database"""
@@ -423,23 +452,45 @@ class Appointment(models.Model):
         if len(errors.keys()) > 0:
             return False, errors
 
-        Appointment.objects.create(
+        appointment = Appointment(
             pet_id=appointment_data.get("pet"),
             vet_id=appointment_data.get("vet"),
-            date=appointment_data.get("date"),
-            time=appointment_data.get("time"),
+            date=to_date(appointment_data.get("date")),
+            time=to_time(appointment_data.get("time")),
+            duration=int(
+                appointment_data.get("duration") or APPOINTMENT_DEFAULT_DURATION,
+            ),
         )
 
-        return True, None
+        return appointment._save_without_overlap()
+
+    @classmethod
+    def repository_rows(cls):
+        """
+        Returns the appointments joined with their pet and vet in a single
+        query, projected to the columns displayed in the repository page.
+        """
+        return cls.objects.annotate(
+            pet_name=F("pet__name"), vet_name=F("vet__name"),
+        ).values_list("id", "date", "time", "pet_name", "vet_name", named=True)
 
     def update_appointment(self, appointment_data):
         """Update an existing appointment in the database"""
-        self.pet_id = appointment_data.get("pet", "") or self.pet
-        self.vet_id = appointment_data.get("vet", "") or self.vet
+        self.pet_id = appointment_data.get("pet", "") or self.pet_id
+        self.vet_id = appointment_data.get("vet", "") or self.vet_id
         self.date = appointment_data.get("date", "") or self.date
         self.time = appointment_data.get("time", "") or self.time
+        self.duration = appointment_data.get("duration", "") or self.duration
 
-        self.save()
+        errors = APPOINTMENT_SCHEMA.validate(self)
+
+        if len(errors.keys()) > 0:
+            return False, errors
+
+        self.date = to_date(self.date)
+        self.time = to_time(self.time)
+        self.duration = int(self.duration)
+        return self._save_without_overlap()
 
 
 class Medicine(models.Model):
@@ -448,6 +499,10 @@ class Medicine(models.Model):
     name = models.CharField(max_length=20)
     description = models.CharField(max_length=100)
     dose = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "id"], name="medicine_name_idx")]
 
     def __str__(self):
         return self.name
@@ -474,13 +529,7 @@ class Medicine(models.Model):
         self.description = medicine_data.get("description", self.description)
         self.dose = medicine_data.get("dose", self.dose)
 
-        errors = validate_medicine(
-            {
-                "name": self.name,
-                "description": self.description,
-                "dose": self.dose,
-            },
-        )
+        errors = MEDICINE_SCHEMA.validate(self)
 
         if len(errors.keys()) > 0:
             return False, errors
@@ -0,0 +1,211 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .validation import INTEGER_MAX, INTEGER_MIN
+
+
+def encode_cursor(values):
+    """Encodes the sort key values of a row into an opaque url-safe cursor."""
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor created by encode_cursor, returns None if it is invalid."""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, ValueError):
+        return None
+
+    if not isinstance(values, list):
+        return None
+    return values
+
+
+def clean_key(model, fields, values):
+    """
+    Converts the values of a decoded cursor to the types of the sort fields
+    of the model, returns None if they don't fit them (e.g. an edited cursor
+    with a list for a name, a text for an id or a date that doesn't exist).
+    """
+    if len(values) != len(fields):
+        return None
+    try:
+        key = [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except (TypeError, ValueError, OverflowError, ValidationError):
+        return None
+    # Larger integers can't be bound as SQLite parameters.
+    if any(
+        isinstance(value, int) and not INTEGER_MIN <= value <= INTEGER_MAX
+        for value in key
+    ):
+        return None
+    return key
+
+
+def get_page_size(request):
+    """Reads the page size from the request, bounded by the configured maximum."""
+    try:
+        page_size = int(request.GET.get("page_size", settings.REPOSITORY_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.REPOSITORY_PAGE_SIZE
+
+    return max(1, min(page_size, settings.REPOSITORY_MAX_PAGE_SIZE))
+
+
+def keyset_filter(fields, values, lookup):
+    """
+    Builds the filter that selects the rows after (lookup "gt") or before
+    (lookup "lt") the given key, comparing the fields lexicographically.
+
+    The leading field is always constrained by a plain range condition so the
+    database can seek into the (sort_key, id) index instead of scanning.
+    """
+    field, value = fields[0], values[0]
+    if len(fields) == 1:
+        return Q(**{f"{field}__{lookup}": value})
+
+    return Q(**{f"{field}__{lookup}e": value}) & (
+        Q(**{f"{field}__{lookup}": value})
+        | Q(**{field: value}) & keyset_filter(fields[1:], values[1:], lookup)
+    )
+
+
+def row_key(row, fields):
+    """Returns the sort key values of a row."""
+    return [getattr(row, field) for field in fields]
+
+
+class Page:
+    """A single page of a keyset paginated queryset."""
+
+    def __init__(self, items, next_cursor, previous_cursor, params):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        """Whether there are rows after this page."""
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        """Whether there are rows before this page."""
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        """Whether the navigation links should be displayed."""
+        return self.has_next or self.has_previous
+
+    def _url(self, param, cursor):
+        params = self.params.copy()
+        params.pop("after", None)
+        params.pop("before", None)
+        params[param] = cursor
+        return "?" + params.urlencode()
+
+    @property
+    def next_url(self):
+        """Query string of the next page."""
+        if not self.has_next:
+            return None
+        return self._url("after", self.next_cursor)
+
+    @property
+    def previous_url(self):
+        """Query string of the previous page."""
+        if not self.has_previous:
+            return None
+        return self._url("before", self.previous_cursor)
+
+
+class PageQuery:
+    """
+    The query of a page of a keyset paginated queryset: the rows of the
+    page plus one, which tells whether there are more in that direction.
+    """
+
+    def __init__(self, request, queryset, ordering):
+        self.params = request.GET
+        self.fields = [*ordering, "id"]
+        self.page_size = get_page_size(request)
+
+        self.after = self.key(queryset, "after")
+        before = self.key(queryset, "before")
+
+        self.backwards = before is not None
+        if self.backwards:
+            queryset = queryset.filter(keyset_filter(self.fields, before, "lt"))
+            queryset = queryset.order_by(*[f"-{field}" for field in self.fields])
+        else:
+            if self.after is not None:
+                queryset = queryset.filter(keyset_filter(self.fields, self.after, "gt"))
+            queryset = queryset.order_by(*self.fields)
+        self.queryset = queryset[: self.page_size + 1]
+
+    def key(self, queryset, param):
+        """The key of the cursor of a query param, None if missing or invalid."""
+        values = decode_cursor(self.params.get(param, ""))
+        if values is None:
+            return None
+        return clean_key(queryset.model, self.fields, values)
+
+    def page(self, rows):
+        """Builds the page from the rows fetched with the query."""
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.backwards:
+            rows = rows[::-1]
+            next_cursor = encode_cursor(row_key(rows[-1], self.fields)) if rows else None
+            previous_cursor = (
+                encode_cursor(row_key(rows[0], self.fields)) if has_more else None
+            )
+        else:
+            next_cursor = (
+                encode_cursor(row_key(rows[-1], self.fields)) if has_more else None
+            )
+            previous_cursor = (
+                encode_cursor(row_key(rows[0], self.fields))
+                if self.after and rows
+                else None
+            )
+
+        return Page(rows, next_cursor, previous_cursor, self.params)
+
+
+def paginate(request, queryset, ordering):
+    """
+    Paginates a queryset using the (ordering..., id) key as cursor.
+
+    Instead of OFFSET, every page is fetched by seeking past the key of the
+    last row seen, so the cost of a page does not depend on how deep it is.
+    The "after" and "before" query params hold the cursors of the next and
+    previous pages.
+    """
+    query = PageQuery(request, queryset, ordering)
+    return query.page(list(query.queryset))
+
+
+async def apaginate(request, queryset, ordering):
+    """paginate for async views, the rows are fetched with the async ORM."""
+    query = PageQuery(request, queryset, ordering)
+    return query.page([row async for row in query.queryset])
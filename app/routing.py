@@ -0,0 +1,31 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+class AsyncViewsMiddleware:
+    """
+    Routes the requests of an ASGI server with ASYNC_ROOT_URLCONF, to the
+    async variants of the views. Under WSGI (manage.py serve) the requests
+    keep ROOT_URLCONF and its sync views: Django would run every async view
+    in an event loop of its own there.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Passes the request on, with the async urlconf under ASGI."""
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        """__call__ under ASGI, the chain of middlewares stays async."""
+        request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return await self.get_response(request)
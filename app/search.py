@@ -0,0 +1,129 @@
+import re
+
+from django.db import connection
+from django.urls import reverse
+
+from .models import Client, Pet, Provider, Vet
+
+TABLE = "app_search"
+
+RESULTS_LIMIT = 50
+
+# The FTS5 rowid packs the kind of document and the id of the indexed object
+# (rowid = object_id * KIND_SLOTS + kind), so updating or deleting a document
+# is a rowid lookup instead of a scan over the whole index.
+KIND_SLOTS = 8
+
+KINDS = {
+    1: {"model": Client, "label": "Cliente", "url": "clients_edit"},
+    2: {"model": Pet, "label": "Mascota", "url": "pets_edit"},
+    3: {"model": Vet, "label": "Veterinario", "url": "vets_edit"},
+    4: {"model": Provider, "label": "Proveedor", "url": "providers_edit"},
+}
+
+MODEL_KINDS = {kind["model"]: code for code, kind in KINDS.items()}
+
+# The (title, body) of document() as SQL expressions over the table of the
+# model, to index many rows with a single statement.
+DOCUMENT_SQL = {
+    Client: ("name", "email || ' ' || address"),
+    Pet: ("name", "breed"),
+    Vet: ("name", "''"),
+    Provider: ("name", "address"),
+}
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def document(obj):
+    """Returns the (title, body) indexed for an object."""
+    if isinstance(obj, Client):
+        return obj.name, f"{obj.email} {obj.address or ''}"
+    if isinstance(obj, Pet):
+        return obj.name, obj.breed
+    if isinstance(obj, Provider):
+        return obj.name, obj.address
+    return obj.name, ""
+
+
+def document_rowid(obj):
+    """Returns the rowid of the document of an object."""
+    return obj.pk * KIND_SLOTS + MODEL_KINDS[type(obj)]
+
+
+def is_indexed(model):
+    """Whether the objects of a model are indexed for search."""
+    return model in MODEL_KINDS
+
+
+def index_objects(objs):
+    """Adds or replaces the documents of the given objects in the index."""
+    rows = [(document_rowid(obj), *document(obj)) for obj in objs]
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows,
+        )
+
+
+def index_range(model, first_id, last_id):
+    """
+    Adds the documents of the objects of a model with ids between first_id
+    and last_id, built by the database instead of from model instances.
+    """
+    title, body = DOCUMENT_SQL[model]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, title, body) "
+            f"SELECT id * {KIND_SLOTS} + {MODEL_KINDS[model]}, {title}, {body} "
+            f"FROM {model._meta.db_table} WHERE id BETWEEN %s AND %s",
+            [first_id, last_id],
+        )
+
+
+def remove_object(obj):
+    """Removes the document of an object from the index."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [document_rowid(obj)])
+
+
+def build_query(text):
+    """
+    Converts the user input into an FTS5 query where every word is matched as
+    a prefix, so "jua ver" finds "Juan Sebastian Veron".
+    """
+    tokens = TOKEN_RE.findall(text)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class SearchResult:
+    """A document matched by a search."""
+
+    def __init__(self, rowid, title, body):
+        kind = KINDS[rowid % KIND_SLOTS]
+        self.id = rowid // KIND_SLOTS
+        self.title = title
+        self.body = body
+        self.label = kind["label"]
+        self.url = reverse(kind["url"], kwargs={"id": self.id})
+
+
+def search(text, limit=RESULTS_LIMIT):
+    """Returns the documents matching the text, best ranked first."""
+    query = build_query(text)
+    if not query:
+        return []
+
+    # Matches on the title (the name) weigh more than matches on the body.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, title, body FROM {TABLE} WHERE {TABLE} MATCH %s "
+            f"ORDER BY bm25({TABLE}, 10.0, 1.0) LIMIT %s",
+            [query, limit],
+        )
+        return [SearchResult(*row) for row in cursor.fetchall()]
@@ -0,0 +1,296 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search
+from .cache import bump_version
+from .conditional import record_change
+from .db import immediate_atomic
+from .exports import batched
+from .models import Appointment, Client, Medicine, Pet, Product, Provider, Vet
+
+# Names without accents: the names of the clients only take ASCII letters.
+FIRST_NAMES = [
+    "Juan", "Maria", "Jose", "Ana", "Carlos", "Laura", "Luis", "Sofia", "Jorge",
+    "Lucia", "Diego", "Valentina", "Martin", "Camila", "Pablo", "Florencia",
+    "Santiago", "Julieta", "Facundo", "Agustina", "Nicolas", "Micaela",
+    "Matias", "Carolina", "Federico", "Paula", "Gonzalo", "Victoria", "Tomas",
+    "Rocio", "Ignacio", "Belen", "Lucas", "Natalia", "Franco", "Daniela",
+    "Ezequiel", "Romina", "Marcos", "Silvina",
+]
+LAST_NAMES = [
+    "Gonzalez", "Rodriguez", "Gomez", "Fernandez", "Lopez", "Diaz", "Martinez",
+    "Perez", "Garcia", "Sanchez", "Romero", "Sosa", "Torres", "Alvarez", "Ruiz",
+    "Ramirez", "Flores", "Benitez", "Acosta", "Medina", "Herrera", "Suarez",
+    "Aguirre", "Gimenez", "Gutierrez", "Pereyra", "Rojas", "Molina", "Castro",
+    "Ortiz", "Silva", "Nunez", "Luna", "Juarez", "Cabrera", "Rios", "Ferreyra",
+    "Godoy", "Morales", "Dominguez",
+]
+PET_NAMES = [
+    "Luna", "Simba", "Rocky", "Lola", "Toby", "Mia", "Milo", "Kira", "Coco",
+    "Nina", "Max", "Bella", "Tom", "Olivia", "Bruno", "Frida", "Felix", "Maya",
+    "Thor", "Chispa", "Manchas", "Pelusa", "Negro", "Canela", "Pancho",
+    "Michi", "Oreo", "Tango", "Kiara", "Zeus",
+]
+BREEDS = [
+    "Labrador", "Caniche", "Ovejero Aleman", "Golden Retriever", "Bulldog",
+    "Beagle", "Boxer", "Dogo Argentino", "Chihuahua", "Border Collie",
+    "Mestizo", "Siames", "Persa", "Maine Coon", "Angora", "Europeo",
+]
+STREETS = range(1, 139)
+PROVIDER_NAMES = [
+    "Distribuidora", "Laboratorio", "Droguería", "Insumos", "Farmacia",
+    "Alimentos", "Veterinaria",
+]
+PRODUCTS = {
+    "Alimento": ["Balanceado", "Alimento humedo", "Snack dental", "Galletas"],
+    "Accesorio": ["Collar", "Correa", "Cama", "Comedero", "Transportadora"],
+    "Higiene": ["Shampoo", "Piedras sanitarias", "Cepillo", "Toallitas"],
+    "Juguete": ["Pelota", "Hueso de goma", "Soga", "Raton de tela"],
+    "Medicamento": ["Pipeta", "Antiparasitario", "Collar antipulgas"],
+}
+MEDICINES = [
+    ("Amoxicilina", "Antibiótico de amplio espectro"),
+    ("Meloxicam", "Antiinflamatorio y analgésico"),
+    ("Ivermectina", "Antiparasitario interno y externo"),
+    ("Prednisolona", "Corticoide antiinflamatorio"),
+    ("Metronidazol", "Antibiótico y antiprotozoario"),
+    ("Tramadol", "Analgésico para el dolor moderado"),
+    ("Omeprazol", "Protector gástrico"),
+    ("Furosemida", "Diurético"),
+    ("Enrofloxacina", "Antibiótico para infecciones urinarias"),
+    ("Praziquantel", "Antiparasitario para tenias"),
+]
+
+# Appointments take one of these durations inside slots of SLOT_MINUTES, so
+# the appointments of a vet never overlap.
+SLOT_MINUTES = 30
+DURATIONS = [15, 20, 30, 30, 30]
+
+# Columns of the rows made by Generator, the id and updated_at are set when
+# they are inserted.
+COLUMNS = {
+    Client: ["name", "phone", "email", "address"],
+    Pet: ["name", "breed", "birthday", "client_id"],
+    Vet: ["name", "phone", "email"],
+    Appointment: ["pet_id", "vet_id", "date", "time", "duration"],
+    Provider: ["name", "email", "address"],
+    Product: ["name", "type", "price"],
+    Medicine: ["name", "description", "dose"],
+}
+
+
+class Generator:
+    """
+    Makes the rows of every model (see COLUMNS) with realistic values that
+    pass the validation of the model. The same seed gives the same rows.
+    """
+
+    def __init__(self, seed=0, start=None):
+        self.random = random.Random(seed)
+        self.start = start or date.today()
+
+    def person(self):
+        """A first and last name."""
+        return f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}"
+
+    def address(self):
+        """An address in La Plata (a street and a cross street)."""
+        return f"{self.random.choice(STREETS)} y {self.random.choice(STREETS)}"
+
+    def clients(self, count):
+        """Clients with a phone of Argentina and an email of vetsoft.com."""
+        for i in range(count):
+            name = self.person()
+            yield (
+                name,
+                int(f"54221{self.random.randrange(10**7):07d}"),
+                f"{name.lower().replace(' ', '.')}{i}@vetsoft.com",
+                self.address(),
+            )
+
+    def pets(self, client_ids, per_client):
+        """per_client pets of each client, born in the last 15 years."""
+        for client_id in client_ids:
+            for _ in range(per_client):
+                birthday = self.start - timedelta(days=self.random.randint(30, 15 * 365))
+                yield (
+                    self.random.choice(PET_NAMES),
+                    self.random.choice(BREEDS),
+                    birthday.isoformat(),
+                    client_id,
+                )
+
+    def vets(self, count):
+        """Vets with a phone of La Plata."""
+        for i in range(count):
+            yield (
+                self.person(),
+                f"221{self.random.randrange(10**7):07d}",
+                f"vet{i}@vetsoft.com",
+            )
+
+    def providers(self, count):
+        """Providers named after a kind of business and a last name."""
+        for i in range(count):
+            yield (
+                f"{self.random.choice(PROVIDER_NAMES)} {self.random.choice(LAST_NAMES)}",
+                f"proveedor{i}@vetsoft.com",
+                self.address(),
+            )
+
+    def products(self, count):
+        """Products of every type, priced between 500 and 50000."""
+        types = list(PRODUCTS)
+        for _ in range(count):
+            type = self.random.choice(types)
+            yield (
+                self.random.choice(PRODUCTS[type]),
+                type,
+                str(Decimal(self.random.randrange(50000, 5000000)) / 100),
+            )
+
+    def medicines(self, count):
+        """Medicines with a dose between 1 and 10."""
+        for _ in range(count):
+            name, description = self.random.choice(MEDICINES)
+            yield name, description, self.random.randint(2, 20) / 2
+
+    def slots(self):
+        """
+        The slots of the default schedule of the vets, day by day from the
+        start date on, as (date, time) strings.
+        """
+        schedule = {}
+        for weekday, start, end in settings.VET_DEFAULT_WORKING_HOURS:
+            start = datetime.strptime(start, "%H:%M")
+            end = datetime.strptime(end, "%H:%M")
+            times = schedule.setdefault(weekday, [])
+            while start + timedelta(minutes=SLOT_MINUTES) <= end:
+                times.append(start.time().isoformat())
+                start += timedelta(minutes=SLOT_MINUTES)
+        for times in schedule.values():
+            times.sort()
+        if not any(schedule.values()):
+            return
+
+        day = self.start
+        while True:
+            for slot in schedule.get(day.weekday(), []):
+                yield day.isoformat(), slot
+            day += timedelta(days=1)
+
+    def appointments(self, count, pet_ids, vet_ids):
+        """
+        count appointments of random pets, filling the schedule of all the
+        vets slot by slot from the start date on.
+        """
+        if not count or not pet_ids or not vet_ids:
+            return
+        choice = self.random.choice
+        made = 0
+        for day, slot in self.slots():
+            for vet_id in vet_ids:
+                yield choice(pet_ids), vet_id, day, slot, choice(DURATIONS)
+                made += 1
+                if made == count:
+                    return
+
+
+def insert_rows(model, rows, batch_size, ids=None):
+    """
+    Inserts the rows of a model in batches, one write transaction each, and
+    adds the indexed ones to the search index. The rows get consecutive ids
+    after the last one of the table, added to ids when given. Returns the
+    number of rows.
+
+    bulk_create spends most of its time preparing the values of every field
+    of every instance, plain tuples and executemany are several times faster.
+    """
+    table = model._meta.db_table
+    columns = ["id", *COLUMNS[model], "updated_at"]
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(table)} "
+        f"({', '.join(connection.ops.quote_name(column) for column in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+    count = 0
+    for batch in batched(rows, batch_size):
+        with immediate_atomic(), connection.cursor() as cursor:
+            cursor.execute(f"SELECT coalesce(max(id), 0) FROM {table}")
+            first_id = cursor.fetchone()[0] + 1
+            updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+            cursor.executemany(
+                sql,
+                [(first_id + i, *row, updated_at) for i, row in enumerate(batch)],
+            )
+            last_id = first_id + len(batch) - 1
+            if search.is_indexed(model):
+                search.index_range(model, first_id, last_id)
+        count += len(batch)
+        if ids is not None:
+            ids.extend(range(first_id, last_id + 1))
+
+    if count:
+        # The rows skip post_save: the change time and the cached pages are
+        # updated here, once per model.
+        with transaction.atomic():
+            record_change(model)
+            transaction.on_commit(lambda: bump_version(model))
+    return count
+
+
+def seed_data(
+    clients=1000,
+    pets_per_client=2,
+    vets=20,
+    appointments=10000,
+    providers=50,
+    products=200,
+    medicines=100,
+    seed=0,
+    start=None,
+    batch_size=10000,
+    progress=None,
+):
+    """
+    Fills the database with synthetic data for benchmarks. Calls progress
+    with the model, the number of rows and the seconds it took after each
+    model. Returns the number of rows created per model.
+    """
+    generator = Generator(seed, start)
+    counts = {}
+
+    def step(model, rows, ids=None):
+        started = time.perf_counter()
+        counts[model] = insert_rows(model, rows, batch_size, ids)
+        if progress:
+            progress(model, counts[model], time.perf_counter() - started)
+
+    client_ids, pet_ids, vet_ids = [], [], []
+    # Writes aren't synced to disk while seeding: a crash leaves a database
+    # that is thrown away anyway. SQLite only allows it outside transactions.
+    relaxed = not connection.in_atomic_block
+    if relaxed:
+        with connection.cursor() as cursor:
+            synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+            cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        step(Client, generator.clients(clients), client_ids)
+        step(Pet, generator.pets(client_ids, pets_per_client), pet_ids)
+        step(Vet, generator.vets(vets), vet_ids)
+        step(Appointment, generator.appointments(appointments, pet_ids, vet_ids))
+        step(Provider, generator.providers(providers))
+        step(Product, generator.products(products))
+        step(Medicine, generator.medicines(medicines))
+    finally:
+        if relaxed:
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA synchronous = {synchronous}")
+    return counts
@@ -0,0 +1,303 @@
+"""
+Pre-forking WSGI server of `manage.py serve`.
+
+The master process opens the listening socket, optionally loads and warms
+up the app (so the workers share its memory, copy on write, see
+app.warmup) and forks the workers.
+Every worker accepts connections on the shared socket and handles them
+with a pool of threads, and exits after max_requests requests so the
+master replaces it with a fresh one.
+
+Signals of the master:
+
+- SIGTERM / SIGINT: graceful shutdown, the workers finish their requests.
+- SIGHUP: graceful reload, new workers are started and the old ones finish
+  their requests and exit. The workers are forked from the master, which
+  has already imported the code of the app (with or without preload), so
+  deploying new code needs a restart of the master.
+- SIGTTIN / SIGTTOU: one worker more / less.
+"""
+
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.servers.basehttp import (
+    WSGIRequestHandler,
+    WSGIServer,
+    get_internal_wsgi_application,
+)
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds between the checks of the master for exited workers and signals.
+MASTER_INTERVAL = 0.2
+
+
+def create_socket(host, port, backlog):
+    """Opens the listening socket shared by every worker."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class WorkerServer(WSGIServer):
+    """
+    WSGI server of a worker: serves the app on the inherited listening
+    socket with a fixed pool of threads, and stops accepting connections
+    after max_requests requests (0 never).
+
+    Every connection takes a thread until it's closed, so the connections
+    of clients that send nothing for timeout seconds (slow or silent ones)
+    are dropped to give their thread back.
+    """
+
+    def __init__(self, sock, app, threads, max_requests, timeout=None):
+        super().__init__(sock.getsockname()[:2], WSGIRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name = socket.getfqdn(sock.getsockname()[0])
+        self.server_port = sock.getsockname()[1]
+        self.setup_environ()
+        self.set_app(app)
+
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.requests = 0
+        self._lock = threading.Lock()
+        # A connection is only accepted when a thread is free to handle it,
+        # otherwise it's left to the other workers.
+        self._slots = threading.BoundedSemaphore(threads)
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="worker")
+
+    def process_request(self, request, client_address):
+        """Handles the connection in a thread of the pool."""
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        """Handles a connection, then counts it towards max_requests."""
+        try:
+            self.finish_request(request, client_address)
+        except (TimeoutError, ConnectionResetError):
+            # A client that went silent or hung up, nothing to report.
+            pass
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+            self.count_request()
+
+    def get_request(self):
+        """
+        Accepts a connection once a thread is free. The listening socket is
+        non-blocking: the workers woken up for a connection another one
+        accepted go back to waiting instead of blocking in accept().
+        """
+        self._slots.acquire()
+        try:
+            request, client_address = super().get_request()
+        except OSError:
+            self._slots.release()
+            raise
+        # Blocking reads, up to timeout seconds each.
+        request.settimeout(self.timeout)
+        return request, client_address
+
+    def count_request(self):
+        """Stops the worker once it handled max_requests requests."""
+        with self._lock:
+            self.requests += 1
+            recycle = self.requests == self.max_requests
+        if recycle:
+            logger.info("Worker %s handled %s requests, restarting", os.getpid(), self.requests)
+            self.stop()
+
+    def stop(self):
+        """Stops accepting connections, serve_forever returns."""
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def server_close(self):
+        """Waits for the requests in progress."""
+        self._executor.shutdown(wait=True)
+
+
+def run_worker(sock, app, threads, max_requests, timeout):
+    """Body of a forked worker, never returns."""
+    status = 0
+    try:
+        # The signals of the master are for the master (Ctrl+C reaches the
+        # whole process group), the workers only stop on SIGTERM.
+        for signum in (signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_IGN)
+        if app is None:
+            app = get_internal_wsgi_application()
+        server = WorkerServer(sock, app, threads, max_requests, timeout)
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            # What the worker counted since its last flush, before it's gone.
+            registry.flush(force=True)
+    except BaseException:
+        logger.exception("Worker %s failed", os.getpid())
+        status = 1
+    finally:
+        os._exit(status)
+
+
+class Master:
+    """Starts and supervises the workers."""
+
+    def __init__(
+        self,
+        host,
+        port,
+        workers,
+        threads,
+        max_requests=0,
+        max_requests_jitter=0,
+        preload=True,
+        graceful_timeout=30,
+        timeout=10,
+        backlog=2048,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.timeout = timeout
+        self.backlog = backlog
+        # Running workers and the ones asked to stop, by pid.
+        self.children = set()
+        self.stopping = set()
+        self.signals = []
+
+    def run(self):
+        """Serves until SIGTERM or SIGINT."""
+        self.socket = create_socket(self.host, self.port, self.backlog)
+        self.app = get_internal_wsgi_application() if self.preload else None
+        for signum in (
+            signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU,
+        ):
+            signal.signal(signum, lambda signum, frame: self.signals.append(signum))
+
+        logger.info(
+            "Serving on %s:%s with %s workers of %s threads",
+            self.host, self.port, self.workers, self.threads,
+        )
+        try:
+            self.spawn_workers()
+            while True:
+                self.reap_workers()
+                signum = self.signals.pop(0) if self.signals else None
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    break
+                if signum == signal.SIGHUP:
+                    self.reload()
+                elif signum == signal.SIGTTIN:
+                    self.workers += 1
+                elif signum == signal.SIGTTOU and self.workers > 1:
+                    self.workers -= 1
+                    self.stop_workers([next(iter(self.children))])
+                self.spawn_workers()
+                time.sleep(MASTER_INTERVAL)
+        finally:
+            self.stop_workers(list(self.children))
+            self.wait_workers()
+            self.socket.close()
+
+    def spawn_worker(self):
+        """Forks a worker."""
+        max_requests = self.max_requests
+        if max_requests:
+            # So the workers don't all restart at once.
+            max_requests += random.randint(0, self.max_requests_jitter)
+        # Connections opened by the master must not be shared with the worker.
+        connections.close_all()
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.socket, self.app, self.threads, max_requests, self.timeout)
+        self.children.add(pid)
+
+    def spawn_workers(self):
+        """Starts workers until there are as many as configured."""
+        while len(self.children) < self.workers:
+            self.spawn_worker()
+
+    def reap_workers(self):
+        """Forgets the workers that exited, returns whether any did."""
+        reaped = False
+        while self.children or self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                self.stopping.clear()
+                return True
+            if pid == 0:
+                break
+            reaped = True
+            self.stopping.discard(pid)
+            if pid in self.children:
+                self.children.discard(pid)
+                code = os.waitstatus_to_exitcode(status)
+                if code:
+                    logger.warning("Worker %s exited with status %s", pid, code)
+        return reaped
+
+    def reload(self):
+        """Replaces every worker with a new one, the old ones finish their requests."""
+        logger.info("Reloading the workers")
+        old = list(self.children)
+        self.children.clear()
+        self.stopping.update(old)
+        self.spawn_workers()
+        self.stop_workers(old)
+
+    def stop_workers(self, pids):
+        """Asks the workers to finish their requests and exit."""
+        for pid in pids:
+            self.children.discard(pid)
+            self.stopping.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def wait_workers(self):
+        """
+        Waits for the stopped workers, kills the ones still running after
+        graceful_timeout seconds.
+        """
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.stopping and time.monotonic() < deadline:
+            if not self.reap_workers():
+                time.sleep(MASTER_INTERVAL / 4)
+        for pid in self.stopping:
+            logger.warning(
+                "Worker %s didn't stop in %s s, killing it", pid, self.graceful_timeout,
+            )
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.stopping.clear()
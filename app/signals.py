@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import bump_version
+from .conditional import record_change
+from .metrics import Store, registry
+from .models import TableChange
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keeps the search document of a saved object up to date."""
+    if raw or not search.is_indexed(sender):
+        return
+    search.index_objects([instance])
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Removes the search document of a deleted object."""
+    if not search.is_indexed(sender):
+        return
+    search.remove_object(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_pages(sender, **kwargs):
+    """
+    Bumps the cache version of a saved or deleted model once the transaction
+    commits: bumping earlier would let another process cache the page with
+    the old rows under the new version.
+    """
+    if sender._meta.app_label != "app":
+        return
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def record_table_change(sender, raw=False, **kwargs):
+    """
+    Records the change time of the table of a saved or deleted model, in the
+    same transaction as the write.
+    """
+    if raw or sender._meta.app_label != "app" or sender is TableChange:
+        return
+    record_change(sender)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Applies the SQLITE_PRAGMAS of the production profile to a new connection."""
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver(setting_changed)
+def reopen_metrics_store(setting, value, **kwargs):
+    """Adds the counters to the store of METRICS_DB when it's overridden."""
+    if setting == "METRICS_DB":
+        registry.store = Store(value)
@@ -0,0 +1,278 @@
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# The slow queries go to their own file, not to the console of the app.
+logger = logging.getLogger(__name__)
+logger.propagate = False
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Frames of the app that only pass the queries along.
+IGNORED_FILES = (
+    os.path.abspath(__file__),
+    os.path.join(APP_DIR, "sqlite3", ""),
+    os.path.join(APP_DIR, "metrics.py"),
+    os.path.join(APP_DIR, "timing.py"),
+)
+
+handler_lock = threading.Lock()
+
+# Request being handled, set by SlowQueryMiddleware.
+current_request = ContextVar("current_request", default=None)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_RE = re.compile(r"%s|\?")
+LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    Normalizes a statement so the ones that only differ in their values are
+    the same: literals and placeholders become ?, lists of them (?, ...).
+    """
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = PLACEHOLDER_RE.sub("?", sql)
+    sql = LIST_RE.sub("(?, ...)", sql)
+    return SPACE_RE.sub(" ", sql).strip()
+
+
+def app_frame():
+    """The innermost frame of the app code that ran the query, or None."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(APP_DIR) and not filename.startswith(IGNORED_FILES):
+            path = os.path.relpath(filename, os.path.dirname(APP_DIR))
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def process_log_path(path, pid=None):
+    """
+    The file of the log written by a process (the current one by default):
+    slow_queries.jsonl becomes slow_queries-<pid>.jsonl. Rotation renames
+    the file, which only works with a single process writing it.
+    """
+    stem, suffix = os.path.splitext(path)
+    return f"{stem}-{pid or os.getpid()}{suffix}"
+
+
+def is_running(pid):
+    """Whether a process with the pid is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user.
+        return True
+    return True
+
+
+def adopt_log(path):
+    """
+    Renames the files of the log of an exited process (a recycled worker) to
+    the ones of the current process, which goes on writing them. The log
+    keeps every entry, and the number of files stays bounded by how many
+    processes run at once instead of growing with every new worker.
+    """
+    own = process_log_path(path)
+    if os.path.exists(own):
+        return
+    stem, suffix = os.path.splitext(os.path.basename(path))
+    name_re = re.compile(rf"{re.escape(stem)}-(\d+){re.escape(suffix)}\Z")
+    directory = os.path.dirname(path)
+    for name in sorted(os.listdir(directory)):
+        match = name_re.match(name)
+        if match is None or is_running(int(match[1])):
+            continue
+        old = os.path.join(directory, name)
+        try:
+            os.rename(old, own)
+        except FileNotFoundError:
+            # Adopted by another process starting at the same time.
+            continue
+        for n in range(1, settings.SLOW_QUERY_LOG_BACKUPS + 1):
+            if os.path.exists(f"{old}.{n}"):
+                os.rename(f"{old}.{n}", f"{own}.{n}")
+        return
+
+
+def get_handler():
+    """
+    The rotating file handler of the log of the process, created on first
+    use (and again when SLOW_QUERY_LOG changes or in a forked worker) on the
+    files of an exited process if there are any, see adopt_log.
+    """
+    base = os.path.abspath(settings.SLOW_QUERY_LOG)
+    path = process_log_path(base)
+    with handler_lock:
+        for handler in logger.handlers:
+            if isinstance(handler, RotatingFileHandler):
+                if handler.baseFilename == path:
+                    return handler
+                logger.removeHandler(handler)
+                handler.close()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        adopt_log(base)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+            encoding="utf-8",
+        )
+        logger.addHandler(handler)
+        return handler
+
+
+def record(sql, duration):
+    """Writes a slow query to the log."""
+    request = current_request.get()
+    match = getattr(request, "resolver_match", None)
+    get_handler()
+    logger.warning(
+        json.dumps(
+            {
+                "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "duration_ms": round(duration * 1000, 2),
+                "fingerprint": fingerprint(sql),
+                "sql": sql,
+                "view": match.url_name if match else None,
+                "path": request.path if request else None,
+                "frame": app_frame(),
+            },
+        ),
+    )
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper of every database connection (see app.sqlite3), logs the
+    statements slower than SLOW_QUERY_THRESHOLD_MS.
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if not threshold:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if duration * 1000 >= threshold:
+            record(sql, duration)
+
+
+def log_files(path):
+    """
+    The files of the log: the one of every process (and the path itself),
+    each preceded by its rotated files, oldest first.
+    """
+    stem, suffix = os.path.splitext(str(path))
+    for name in [str(path), *sorted(glob.glob(f"{glob.escape(stem)}-*{suffix}"))]:
+        for n in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1):
+            yield f"{name}.{n}"
+        yield name
+
+
+def read_log(path):
+    """
+    The entries of the log of every process. Lines that aren't valid JSON
+    (cut by a crash) are skipped.
+    """
+    for name in log_files(path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def aggregate(entries):
+    """
+    Groups the entries by fingerprint: how many, their total, mean and
+    maximum duration, the views that ran them and an app frame of each.
+    Sorted by total duration, slowest first.
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(
+            entry["fingerprint"],
+            {
+                "fingerprint": entry["fingerprint"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "views": {},
+                "frames": {},
+            },
+        )
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+        view = entry.get("view") or "-"
+        group["views"][view] = group["views"].get(view, 0) + 1
+        if entry.get("frame"):
+            group["frames"][entry["frame"]] = group["frames"].get(entry["frame"], 0) + 1
+
+    for group in groups.values():
+        group["mean_ms"] = group["total_ms"] / group["count"]
+    return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+
+
+class SlowQueryMiddleware:
+    """
+    Makes the request available to the slow query log, which attributes every
+    slow query to the URL name of its view. Left out of the middleware chain
+    when SLOW_QUERY_THRESHOLD_MS is 0.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Handles the request with it set as the current one."""
+        if self.async_mode:
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        """Handles the request with it set as the current one, under ASGI."""
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
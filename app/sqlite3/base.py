@@ -0,0 +1,41 @@
+import time
+
+from django.db.backends.sqlite3 import base
+
+from app.db import write_metrics
+from app.metrics import count_queries
+from app.slow_queries import log_slow_queries
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend whose transactions can start with BEGIN IMMEDIATE.
+
+    Django 5.0 always opens transactions with a deferred BEGIN, so two
+    connections that read and then write inside atomic() can both hold a
+    read lock, and the second one to write fails right away with "database
+    is locked". While transaction_mode is "IMMEDIATE" the transaction takes
+    the write lock when it starts and waits for it up to the busy timeout;
+    the wait is recorded in app.db.write_metrics.
+
+    Every statement is counted by app.metrics.count_queries and goes through
+    app.slow_queries.log_slow_queries.
+    """
+
+    transaction_mode = "DEFERRED"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.extend([count_queries, log_slow_queries])
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode != "IMMEDIATE":
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+            return
+
+        start = time.perf_counter()
+        try:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        finally:
+            # Waits that end with "database is locked" count too.
+            write_metrics.record_lock_wait(time.perf_counter() - start)
@@ -0,0 +1,78 @@
+// Autocomplete fields rendered by partials/autocomplete.html: the text input
+// queries the JSON endpoint of the field and the id of the chosen option is
+// stored in the hidden input, which fires "change" when it's updated.
+(() => {
+    const DELAY = 150;
+
+    for (const field of document.querySelectorAll("[data-autocomplete]")) {
+        const input = field.querySelector('[role="combobox"]');
+        const value = field.querySelector("[data-autocomplete-value]");
+        const options = field.querySelector('[role="listbox"]');
+        let timer;
+        let controller;
+
+        function setValue(id) {
+            value.value = id;
+            value.dispatchEvent(new Event("change"));
+        }
+
+        function close() {
+            options.replaceChildren();
+            input.setAttribute("aria-expanded", "false");
+        }
+
+        function show(results) {
+            options.replaceChildren(
+                ...results.map((result) => {
+                    const option = document.createElement("button");
+                    option.type = "button";
+                    option.className = "list-group-item list-group-item-action";
+                    option.setAttribute("role", "option");
+                    option.textContent = result.label;
+                    // mousedown runs before the input loses the focus.
+                    option.addEventListener("mousedown", (event) => {
+                        event.preventDefault();
+                        input.value = result.label;
+                        setValue(result.id);
+                        close();
+                    });
+                    return option;
+                }),
+            );
+            input.setAttribute("aria-expanded", String(results.length > 0));
+        }
+
+        async function search() {
+            controller?.abort();
+            controller = new AbortController();
+            const params = new URLSearchParams({ q: input.value });
+            try {
+                const response = await fetch(`${field.dataset.autocomplete}?${params}`, {
+                    signal: controller.signal,
+                });
+                if (response.ok) {
+                    show((await response.json()).results);
+                }
+            } catch (error) {
+                if (error.name !== "AbortError") {
+                    throw error;
+                }
+            }
+        }
+
+        input.addEventListener("input", () => {
+            if (value.value) {
+                setValue("");
+            }
+            clearTimeout(timer);
+            timer = setTimeout(search, DELAY);
+        });
+        input.addEventListener("focus", search);
+        input.addEventListener("blur", close);
+        input.addEventListener("keydown", (event) => {
+            if (event.key === "Escape") {
+                close();
+            }
+        });
+    }
+})();
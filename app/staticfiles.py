@@ -0,0 +1,182 @@
+import gzip
+import mimetypes
+import os
+from email.utils import parsedate_to_datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+# Text assets worth compressing, fonts and images are already compressed.
+COMPRESSED_EXTENSIONS = (".css", ".js", ".map", ".svg", ".json", ".txt", ".html")
+
+# Smaller files aren't worth the extra request header, larger gzip variants
+# than this fraction of the original are discarded.
+COMPRESS_MIN_SIZE = 256
+COMPRESS_MAX_RATIO = 0.95
+
+# Fingerprinted files never change, so browsers can keep them for a year
+# without revalidating. The other files are revalidated on every use.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def compress_file(path):
+    """
+    Writes the gzip variant of a file next to it (path + ".gz") when it's
+    worth it, returns whether it was written.
+    """
+    with open(path, "rb") as file:
+        content = file.read()
+    gz_path = f"{path}.gz"
+    if len(content) >= COMPRESS_MIN_SIZE:
+        # mtime=0 so collecting the same files gives the same variants.
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) <= len(content) * COMPRESS_MAX_RATIO:
+            with open(gz_path, "wb") as file:
+                file.write(compressed)
+            return True
+    if os.path.exists(gz_path):
+        os.remove(gz_path)
+    return False
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage (file names with the hash of their content, references
+    between CSS files rewritten) that also writes the gzip variants of the
+    text files at collectstatic time, served by StaticFilesMiddleware.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Fingerprints the collected files, then compresses them."""
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = {*paths, *self.hashed_files.values()}
+        for name in sorted(names):
+            if name.endswith(COMPRESSED_EXTENSIONS):
+                compress_file(self.path(name))
+
+    def url(self, name, force=False):
+        """
+        The fingerprinted URL of a file whenever collectstatic wrote a
+        manifest, so DEBUG only decides it when the files weren't collected.
+        """
+        return super().url(name, force=force or bool(self.hashed_files))
+
+
+class StaticFile:
+    """A collected file and its gzip variant, if any."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.gz_path = f"{path}.gz" if os.path.exists(f"{path}.gz") else None
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.last_modified = int(os.stat(path).st_mtime)
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        )
+
+
+def collected_files():
+    """
+    Maps the URL path of every file of STATIC_ROOT to its StaticFile. Files
+    named in the manifest of the storage are the fingerprinted ones.
+    """
+    root = settings.STATIC_ROOT
+    if not root or not os.path.isdir(root):
+        return {}
+
+    hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(".gz"):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            files[settings.STATIC_URL + name] = StaticFile(path, name in hashed)
+    return files
+
+
+def was_modified_since(request, last_modified):
+    """Whether the file changed after the If-Modified-Since date of the request."""
+    header = request.headers.get("If-Modified-Since")
+    if header is None:
+        return True
+    try:
+        return int(parsedate_to_datetime(header).timestamp()) < last_modified
+    except (TypeError, ValueError):
+        return True
+
+
+class StaticFilesMiddleware:
+    """
+    Serves the collected static files from the app, without a separate web
+    server: the gzip variant when the browser accepts it and far-future
+    immutable cache headers for the fingerprinted names.
+
+    The files of STATIC_ROOT are listed once when the server starts, so a
+    request for a static file is a dict lookup and never touches paths
+    built from the URL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.files = collected_files()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Serves the request if it's for a collected file."""
+        if self.async_mode:
+            return self.__acall__(request)
+        static_file = self.find(request)
+        if static_file is None:
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    async def __acall__(self, request):
+        """__call__ under ASGI, the chain of middlewares stays async."""
+        static_file = self.find(request)
+        if static_file is None:
+            return await self.get_response(request)
+        return self.serve(request, static_file)
+
+    def find(self, request):
+        """The collected file the request is for, or None."""
+        if request.method not in ("GET", "HEAD"):
+            return None
+        return self.files.get(request.path)
+
+    def serve(self, request, static_file):
+        """Responds with the file, its gzip variant or 304 Not Modified."""
+        if not was_modified_since(request, static_file.last_modified):
+            response = HttpResponseNotModified()
+        else:
+            path = static_file.path
+            encoding = None
+            if static_file.gz_path and "gzip" in request.headers.get("Accept-Encoding", ""):
+                path = static_file.gz_path
+                encoding = "gzip"
+            response = FileResponse(open(path, "rb"), content_type=static_file.content_type)
+            if encoding:
+                response["Content-Encoding"] = encoding
+            # The file object has the name of the file on disk.
+            response.headers.pop("Content-Disposition", None)
+
+        response["Last-Modified"] = http_date(static_file.last_modified)
+        response["Cache-Control"] = static_file.cache_control
+        if static_file.gz_path:
+            response["Vary"] = "Accept-Encoding"
+        return response
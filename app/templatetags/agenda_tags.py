@@ -0,0 +1,42 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+# An id no other part of the URL of an appointment can contain.
+URL_ID_PLACEHOLDER = 9876543210123
+
+APPOINTMENT_HTML = (
+    '<a class="d-block text-decoration-none" href="{}">'
+    '<span class="badge text-bg-primary">{}</span> {} '
+    '<small class="text-muted">{} min</small></a>'
+)
+
+
+@register.simple_tag
+def agenda_cell(appointments):
+    """
+    Renders the appointments of a cell of the agenda.
+
+    A busy week has thousands of appointments, so they are formatted here in
+    one pass instead of with a template loop per appointment.
+    """
+    # Reversing the URL of every appointment took as long as the rest of the
+    # page: it's reversed once with a placeholder id, replaced by every id.
+    before, _, after = reverse(
+        "appointments_edit", kwargs={"id": URL_ID_PLACEHOLDER},
+    ).rpartition(str(URL_ID_PLACEHOLDER))
+    return format_html_join(
+        "",
+        APPOINTMENT_HTML,
+        (
+            (
+                f"{before}{row.id}{after}",
+                f"{row.time:%H:%M}",
+                row.pet_name,
+                row.duration,
+            )
+            for row in appointments
+        ),
+    )
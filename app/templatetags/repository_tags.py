@@ -0,0 +1,15 @@
+from django import template
+
+from app.fragments import render_rows
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cached_rows(context, objects, template_name, name):
+    """
+    Renders the rows of a repository table with the template_name template,
+    reusing the cached fragments of the unchanged objects, see
+    app.fragments.render_rows.
+    """
+    return render_rows(context, objects, template_name, name)
@@ -0,0 +1,32 @@
+"""
+Test cases of the app, with the settings every test runs with: caches that
+keep nothing between tests, the static files served from the app
+directories (the tests don't collect them), the metrics kept in memory and
+no slow query log. A test case can still override any of them.
+"""
+
+from django import test
+from django.conf import settings
+
+test_settings = test.override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "fragments": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    },
+    STORAGES={
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+    METRICS_DB=":memory:",
+    SLOW_QUERY_THRESHOLD_MS=0,
+)
+
+
+@test_settings
+class TestCase(test.TestCase):
+    """TestCase with the test settings."""
+
+
+@test_settings
+class TransactionTestCase(test.TransactionTestCase):
+    """TransactionTestCase with the test settings."""
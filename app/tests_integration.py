@@ -1,12 +1,66 @@
 # Imports de módulos estándar de Python
-from datetime import datetime, timedelta
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from unittest import mock
 
 # Imports de terceros
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.http import HttpResponse
 from django.shortcuts import reverse
-from django.test import TestCase
+from django.test import Client as HttpClient
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 
 # Imports de módulos locales o del propio proyecto
-from app.models import Client, Medicine, Pet, Provider
+from app import views
+from app.models import Appointment, Client, Medicine, Pet, Product, Provider, Vet, WorkingHours
+from app.agenda import VIEWS as AGENDA_VIEWS
+from app.agenda import Agenda
+from app.templatetags.agenda_tags import agenda_cell
+from app.audit import audit, seed, unexpected_issues
+from app.compression import CompressionMiddleware, compression_metrics
+from app.fragments import fragment_metrics
+from app.db import retry_on_lock, serialized_writes, write_metrics
+from app.availability import free_slots
+from app.imports import import_csv
+from app.metrics import Registry as MetricsRegistry
+from app.metrics import Store as MetricsStore
+from app.metrics import exposition, registry
+from app.pagination import encode_cursor
+from app.routing import AsyncViewsMiddleware
+from app.search import search
+from app.seeding import Generator, seed_data
+from app.signals import configure_sqlite
+from app.slow_queries import fingerprint, process_log_path
+from app.slow_queries import read_log as read_slow_query_log
+from app.staticfiles import StaticFilesMiddleware
+from app.testing import TestCase, TransactionTestCase
+from app.urls import urlpatterns
+from app.urls_async import urlpatterns as async_urlpatterns
+from app.validation import (
+    APPOINTMENT_SCHEMA,
+    CLIENT_SCHEMA,
+    MEDICINE_SCHEMA,
+    PET_SCHEMA,
+    PRODUCT_SCHEMA,
+    PROVIDER_SCHEMA,
+    VET_SCHEMA,
+)
 
 
 class HomePageTest(TestCase):
@@ -421,3 +475,1861 @@ class ProviderIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 302)
         editedProvider = Provider.objects.get(pk=provider.id)
         self.assertEqual(editedProvider.name, "Servicios Veterinarios SA")
+
+
+class RepositoryPaginationTest(TestCase):
+    """Test the keyset pagination of the repository pages"""
+
+    def setUp(self):
+        Client.objects.bulk_create(
+            [
+                Client(
+                    name=f"Cliente {i:02d}",
+                    phone=54221555232,
+                    email=f"cliente{i}@vetsoft.com",
+                )
+                for i in range(12)
+            ],
+        )
+
+    def test_first_page_is_limited_by_page_size(self):
+        response = self.client.get(reverse("clients_repo"), {"page_size": 5})
+        page = response.context["page"]
+
+        self.assertEqual([c.name for c in page], [f"Cliente {i:02d}" for i in range(5)])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertContains(response, "Siguiente")
+
+    def test_can_walk_forward_and_back(self):
+        response = self.client.get(reverse("clients_repo"), {"page_size": 5})
+        next_url = response.context["page"].next_url
+
+        response = self.client.get(reverse("clients_repo") + next_url)
+        page = response.context["page"]
+        self.assertEqual([c.name for c in page], [f"Cliente {i:02d}" for i in range(5, 10)])
+        self.assertTrue(page.has_previous)
+
+        response = self.client.get(reverse("clients_repo") + page.next_url)
+        page = response.context["page"]
+        self.assertEqual([c.name for c in page], ["Cliente 10", "Cliente 11"])
+        self.assertFalse(page.has_next)
+
+        response = self.client.get(reverse("clients_repo") + page.previous_url)
+        page = response.context["page"]
+        self.assertEqual([c.name for c in page], [f"Cliente {i:02d}" for i in range(5, 10)])
+        self.assertTrue(page.has_next)
+        self.assertTrue(page.has_previous)
+
+    def test_ties_on_sort_key_are_broken_by_id(self):
+        Client.objects.all().update(name="Juan")
+        ids = list(Client.objects.order_by("id").values_list("id", flat=True))
+
+        response = self.client.get(reverse("clients_repo"), {"page_size": 7})
+        response = self.client.get(
+            reverse("clients_repo") + response.context["page"].next_url,
+        )
+
+        self.assertEqual([c.id for c in response.context["page"]], ids[7:])
+
+    def test_page_fetch_uses_a_single_query(self):
+        cursor = encode_cursor(["Cliente 05", Client.objects.get(name="Cliente 05").id])
+
+        # The change time lookup of the conditional GET and the page.
+        with self.assertNumQueries(2):
+            self.client.get(reverse("clients_repo"), {"after": cursor, "page_size": 3})
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get(reverse("clients_repo"), {"after": "???"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page"].items[0].name, "Cliente 00")
+
+    def test_cursor_with_wrong_types_returns_first_page(self):
+        for url, values in [
+            (reverse("clients_repo"), ["Cliente 05", "abc"]),
+            (reverse("clients_repo"), [["Cliente 05"], 1]),
+            (reverse("clients_repo"), ["Cliente 05", 10**20]),
+            (reverse("appointments_repo"), ["2024-02-30", "10:00", 1]),
+            (reverse("appointments_repo"), ["2024-06-01", "25:00", 1]),
+        ]:
+            for param in ["after", "before"]:
+                with self.subTest(url=url, values=values, param=param):
+                    response = self.client.get(url, {param: encode_cursor(values)})
+
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(response.context["page"].has_previous)
+
+    def test_appointments_are_paginated_by_date_and_time(self):
+        response = self.client.get(reverse("appointments_repo"))
+
+        self.assertContains(response, "No existen Citas")
+        self.assertFalse(response.context["page"].has_other_pages)
+
+
+class RepositoryQueryCountTest(TestCase):
+    """Test the pets and appointments listings don't issue a query per row"""
+
+    ROWS = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(
+            name="Juan Sebastian Veron",
+            phone=54221555232,
+            email="brujita75@vetsoft.com",
+        )
+        vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+        pets = Pet.objects.bulk_create(
+            [
+                Pet(name=f"Mascota {i}", breed="Labrador", birthday="2020-01-01", client=client)
+                for i in range(cls.ROWS)
+            ],
+        )
+        Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    pet=pet,
+                    vet=vet,
+                    date=datetime(2024, 1, 1).date() + timedelta(days=i),
+                    time="10:00",
+                )
+                for i, pet in enumerate(pets)
+            ],
+        )
+
+    def test_pet_rows_are_fetched_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(Pet.repository_rows())
+
+        self.assertEqual(len(rows), self.ROWS)
+        self.assertEqual(rows[0].client_name, "Juan Sebastian Veron")
+
+    def test_appointment_rows_are_fetched_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(Appointment.repository_rows())
+
+        self.assertEqual(len(rows), self.ROWS)
+        self.assertEqual(rows[0].vet_name, "Dr. Pérez")
+        self.assertTrue(rows[0].pet_name.startswith("Mascota"))
+
+    def test_pets_repository_query_count_does_not_depend_on_rows(self):
+        # The change time lookup of the conditional GET and the rows.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("pets_repo"), {"page_size": 1})
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("pets_repo"), {"page_size": 500})
+
+        self.assertContains(response, "Juan Sebastian Veron", count=500)
+
+    def test_appointments_repository_query_count_does_not_depend_on_rows(self):
+        # The change time lookup of the conditional GET and the rows.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("appointments_repo"), {"page_size": 1})
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("appointments_repo"), {"page_size": 500})
+
+        self.assertContains(response, "Dr. Pérez", count=500)
+
+
+class SearchTest(TestCase):
+    """Test the full-text search index and page"""
+
+    def setUp(self):
+        self.client_veron = Client.objects.create(
+            name="Juan Sebastian Veron",
+            phone=54221555232,
+            address="13 y 44",
+            email="brujita75@vetsoft.com",
+        )
+        self.pet = Pet.objects.create(
+            name="Fido",
+            breed="Labrador",
+            birthday="2020-01-01",
+            client=self.client_veron,
+        )
+        Provider.objects.create(
+            name="Laboratorio Roemmers",
+            email="roemmers@gmail.com",
+            address="Calle Veron 123",
+        )
+
+    def test_finds_saved_objects_by_prefix(self):
+        results = search("vero")
+
+        self.assertEqual([r.title for r in results][0], "Juan Sebastian Veron")
+        self.assertEqual(results[0].url, reverse("clients_edit", kwargs={"id": self.client_veron.id}))
+        self.assertIn("Laboratorio Roemmers", [r.title for r in results])
+
+    def test_searches_breed_and_email(self):
+        self.assertEqual([r.title for r in search("labra")], ["Fido"])
+        self.assertEqual([r.title for r in search("brujita75")], ["Juan Sebastian Veron"])
+
+    def test_index_follows_updates(self):
+        self.client_veron.update_client({"name": "Guido Carrillo"})
+
+        self.assertEqual(search("juan"), [])
+        self.assertEqual([r.title for r in search("guido")], ["Guido Carrillo"])
+
+    def test_index_follows_deletes(self):
+        self.client_veron.delete()
+
+        self.assertEqual(search("fido"), [])
+        self.assertEqual([r.title for r in search("veron")], ["Laboratorio Roemmers"])
+
+    def test_ignores_query_syntax(self):
+        self.assertEqual(search('" OR *'), [])
+
+    def test_search_page_renders_results(self):
+        response = self.client.get(reverse("search"), {"q": "fido"})
+
+        self.assertTemplateUsed(response, "search/results.html")
+        self.assertContains(response, "Mascota")
+        self.assertContains(response, reverse("pets_edit", kwargs={"id": self.pet.id}))
+
+    def test_search_page_without_results(self):
+        response = self.client.get(reverse("search"), {"q": "zzz"})
+
+        self.assertContains(response, "No se encontraron resultados")
+
+
+class ExportTest(TestCase):
+    """Test the streaming CSV and NDJSON exports"""
+
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Juan Sebastian Veron",
+            phone=54221555232,
+            address="13 y 44",
+            email="brujita75@vetsoft.com",
+        )
+        self.vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=self.owner,
+        )
+        Appointment.objects.create(pet=self.pet, vet=self.vet, date="2024-06-01", time="10:00")
+        Appointment.objects.create(pet=self.pet, vet=self.vet, date="2024-07-01", time="11:30")
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_clients_csv_export(self):
+        response = self.client.get(reverse("clients_export"), {"format": "csv"})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="clientes.csv"', response["Content-Disposition"])
+        self.assertEqual(
+            self.read(response).splitlines(),
+            [
+                "id,name,phone,email,address",
+                f"{self.owner.id},Juan Sebastian Veron,54221555232,brujita75@vetsoft.com,13 y 44",
+            ],
+        )
+
+    def test_appointments_ndjson_export(self):
+        response = self.client.get(reverse("appointments_export"), {"format": "ndjson"})
+
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["date"], "2024-06-01")
+        self.assertEqual(rows[0]["time"], "10:00:00")
+        self.assertEqual(rows[0]["pet_name"], "Fido")
+        self.assertEqual(rows[0]["vet_name"], "Dr. Pérez")
+
+    def test_export_applies_list_filters(self):
+        response = self.client.get(
+            reverse("appointments_export"),
+            {"format": "ndjson", "date_from": "2024-07-01"},
+        )
+
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row["date"] for row in rows], ["2024-07-01"])
+
+    def test_export_ignores_malformed_filters(self):
+        response = self.client.get(
+            reverse("appointments_export"),
+            {"format": "ndjson", "date_from": "ayer", "vet": "abc"},
+        )
+
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+
+    def test_out_of_range_ids_are_ignored(self):
+        response = self.client.get(
+            reverse("appointments_export"), {"format": "ndjson", "vet": "9" * 20},
+        )
+        pets = self.client.get(reverse("pets_repo"), {"client": "9" * 20})
+
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+        self.assertEqual([pet.name for pet in pets.context["page"]], ["Fido"])
+
+    def test_export_streams_in_chunks(self):
+        with self.settings(EXPORT_CHUNK_SIZE=1):
+            response = self.client.get(reverse("appointments_export"))
+            chunks = list(response.streaming_content)
+
+        # header + one chunk per row
+        self.assertEqual(len(chunks), 3)
+
+    def test_invalid_format_is_rejected(self):
+        response = self.client.get(reverse("pets_export"), {"format": "xml"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_repository_applies_same_filters(self):
+        Client.objects.create(name="Guido Carrillo", phone=54221232555, email="goleador@vetsoft.com")
+
+        response = self.client.get(reverse("clients_repo"), {"name": "gui"})
+
+        self.assertEqual([c.name for c in response.context["page"]], ["Guido Carrillo"])
+
+
+class ImportTest(TestCase):
+    """Test the CSV imports of clients and pets"""
+
+    CLIENTS_CSV = (
+        "name,phone,email,address\n"
+        "Juan Sebastian Veron,54221555232,brujita75@vetsoft.com,13 y 44\n"
+        "pepito12,54221555232,pepito@vetsoft.com,\n"
+        "Guido Carrillo,54221232555,goleador@vetsoft.com,1 y 57\n"
+    )
+
+    def test_imports_valid_clients_and_reports_errors(self):
+        result = import_csv("clients", io.StringIO(self.CLIENTS_CSV), batch_size=2)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            result.errors,
+            [{"line": 3, "errors": {"name": "El nombre solo puede contener letras y espacios"}}],
+        )
+        self.assertEqual(
+            list(Client.objects.order_by("name").values_list("name", flat=True)),
+            ["Guido Carrillo", "Juan Sebastian Veron"],
+        )
+
+    def test_imported_clients_are_searchable(self):
+        import_csv("clients", io.StringIO(self.CLIENTS_CSV))
+
+        self.assertEqual([r.title for r in search("goleador")], ["Guido Carrillo"])
+
+    def test_imports_pets_checking_their_client(self):
+        owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        csv_file = io.StringIO(
+            "name,breed,birthday,client\n"
+            f"Fido,Labrador,2020-01-01,{owner.id}\n"
+            f"Rex,Caniche,2020-01-01,{owner.id + 100}\n"
+            f"Toby,Beagle,01/01/2020,{owner.id}\n"
+            f"Luna,,2020-01-01,{owner.id}\n",
+        )
+
+        result = import_csv("pets", csv_file)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error["line"] for error in result.errors], [3, 4, 5])
+        self.assertIn("client", result.errors[0]["errors"])
+        self.assertIn("invalid_birthday", result.errors[1]["errors"])
+        self.assertIn("breed", result.errors[2]["errors"])
+        self.assertEqual(Pet.objects.get().client, owner)
+
+    def test_import_form_uploads_csv(self):
+        response = self.client.post(
+            reverse("clients_import"),
+            {"file": SimpleUploadedFile("clientes.csv", self.CLIENTS_CSV.encode())},
+        )
+
+        self.assertTemplateUsed(response, "imports/form.html")
+        self.assertContains(response, "Se importaron 2 filas, 1 con errores.")
+        self.assertEqual(Client.objects.count(), 2)
+
+    def test_import_form_reads_windows_1252_files(self):
+        content = "name,phone,email,address\nGuido Carrillo,54221232555,goleador@vetsoft.com,Güemes 1\n"
+
+        response = self.client.post(
+            reverse("clients_import"),
+            {"file": SimpleUploadedFile("clientes.csv", content.encode("cp1252"))},
+        )
+
+        self.assertContains(response, "Se importaron 1 filas, 0 con errores.")
+        self.assertEqual(Client.objects.get().address, "Güemes 1")
+
+    def test_out_of_range_numbers_are_reported(self):
+        csv_file = io.StringIO(
+            "name,phone,email,address\n"
+            "Guido Carrillo,5422123255500000000000,goleador@vetsoft.com,1 y 57\n"
+            "Juan Sebastian Veron,54221555232,brujita75@vetsoft.com,13 y 44\n",
+        )
+
+        result = import_csv("clients", csv_file)
+        pets = import_csv(
+            "pets", io.StringIO(f"name,breed,birthday,client\nFido,Labrador,2020-01-01,{10**22}\n"),
+        )
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [{"line": 2, "errors": {"phone": "El teléfono es demasiado largo"}}])
+        self.assertEqual(pets.errors[0]["errors"], {"client": "El cliente seleccionado no existe."})
+
+    def test_pets_with_odd_clients_and_birthdays(self):
+        owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        csv_file = io.StringIO(
+            "name,breed,birthday,client\n"
+            "Fido,Labrador,2020-01-01,²\n"
+            f"Rex,Caniche,2020-01-01 10:00,{owner.id}\n",
+        )
+
+        result = import_csv("pets", csv_file)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            result.errors, [{"line": 2, "errors": {"client": "El cliente seleccionado no existe."}}],
+        )
+        self.assertEqual(Pet.objects.get().birthday, date(2020, 1, 1))
+
+    def test_import_form_requires_file(self):
+        response = self.client.post(reverse("pets_import"))
+
+        self.assertContains(response, "Por favor seleccione un archivo CSV")
+
+    def test_import_clients_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(self.CLIENTS_CSV)
+        self.addCleanup(os.unlink, file.name)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_clients", file.name, "--batch-size", "1", stdout=stdout, stderr=stderr)
+
+        self.assertIn("2 clientes importados, 1 filas con errores", stdout.getvalue())
+        self.assertIn("Línea 3", stderr.getvalue())
+        self.assertEqual(Client.objects.count(), 2)
+
+
+class AppointmentSlotTest(TestCase):
+    """Test vets can't be double-booked"""
+
+    def setUp(self):
+        owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=owner,
+        )
+        self.vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+        self.other_vet = Vet.objects.create(name="Dra. Gómez", phone="221555233", email="vet2@vetsoft.com")
+
+    def book(self, time, duration=30, vet=None):
+        return Appointment.save_appointment(
+            {
+                "pet": self.pet.id,
+                "vet": (vet or self.vet).id,
+                "date": "2024-06-01",
+                "time": time,
+                "duration": duration,
+            },
+        )
+
+    def test_overlapping_appointment_is_rejected(self):
+        self.assertEqual(self.book("10:00", 60), (True, None))
+
+        self.assertEqual(
+            self.book("10:45"),
+            (False, {"time": "El veterinario ya tiene una cita en ese horario."}),
+        )
+        self.assertEqual(
+            self.book("09:45"),
+            (False, {"time": "El veterinario ya tiene una cita en ese horario."}),
+        )
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_fractional_duration_is_a_validation_error(self):
+        response = self.client.post(
+            reverse("appointments_form"),
+            data={
+                "pet": self.pet.id,
+                "vet": self.vet.id,
+                "date": "2024-06-01",
+                "time": "10:00",
+                "duration": "30.5",
+            },
+        )
+
+        self.assertContains(response, "La duración debe ser un número entero de minutos.")
+        self.assertEqual(Appointment.objects.count(), 0)
+
+    def test_appointments_end_before_midnight(self):
+        self.assertEqual(
+            self.book("23:00", 90),
+            (False, {"duration": "La cita debe terminar antes de la medianoche."}),
+        )
+        self.assertEqual(self.book("23:30", 30), (True, None))
+
+    def test_adjacent_slots_and_other_vets_are_free(self):
+        self.assertEqual(self.book("10:00"), (True, None))
+        self.assertEqual(self.book("10:30"), (True, None))
+        self.assertEqual(self.book("09:30"), (True, None))
+        self.assertEqual(self.book("10:00", vet=self.other_vet), (True, None))
+
+    def test_duration_defaults_and_is_validated(self):
+        saved, errors = Appointment.save_appointment(
+            {"pet": self.pet.id, "vet": self.vet.id, "date": "2024-06-01", "time": "10:00"},
+        )
+        self.assertTrue(saved)
+        self.assertEqual(Appointment.objects.get().duration, 30)
+
+        self.assertEqual(
+            self.book("12:00", 500),
+            (False, {"duration": "La duración debe estar entre 5 y 240 minutos."}),
+        )
+
+    def test_update_checks_overlap_excluding_itself(self):
+        self.book("10:00")
+        self.book("11:00")
+        first, second = Appointment.objects.order_by("time")
+
+        self.assertEqual(first.update_appointment({"duration": "45"}), (True, None))
+        self.assertEqual(
+            second.update_appointment({"time": "10:15"}),
+            (False, {"time": "El veterinario ya tiene una cita en ese horario."}),
+        )
+
+    def test_unique_slot_constraint_is_reported_as_validation_error(self):
+        self.book("10:00")
+
+        # Simulates a concurrent booking that passed the overlap check.
+        with mock.patch.object(Appointment, "find_overlap", return_value=None):
+            saved, errors = self.book("10:00")
+
+        self.assertFalse(saved)
+        self.assertEqual(errors, {"time": "El veterinario ya tiene una cita en ese horario."})
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_form_shows_slot_error(self):
+        self.book("10:00")
+
+        response = self.client.post(
+            reverse("appointments_form"),
+            data={
+                "pet": self.pet.id,
+                "vet": self.vet.id,
+                "date": "2024-06-01",
+                "time": "10:10",
+                "duration": 30,
+            },
+        )
+
+        self.assertContains(response, "El veterinario ya tiene una cita en ese horario.")
+
+
+class AvailabilityTest(TestCase):
+    """Test the free slots of the vets"""
+
+    MONDAY = datetime(2030, 6, 3).date()
+
+    def setUp(self):
+        owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=owner,
+        )
+        self.vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+        WorkingHours.objects.create(vet=self.vet, weekday=0, start="09:00", end="11:00")
+        self.default_vet = Vet.objects.create(name="Dra. Gómez", phone="221555233", email="vet2@vetsoft.com")
+
+    def slots(self, days):
+        return [f"{slot:%H:%M}" for slot in days]
+
+    def test_appointments_are_not_free(self):
+        Appointment.objects.create(pet=self.pet, vet=self.vet, date=self.MONDAY, time="09:30", duration=45)
+
+        slots = free_slots([self.vet.id], self.MONDAY, self.MONDAY, duration=30)
+
+        self.assertEqual(self.slots(slots[self.vet.id][self.MONDAY]), ["09:00", "10:15", "10:30"])
+
+    def test_days_without_working_hours_have_no_slots(self):
+        tuesday = self.MONDAY + timedelta(days=1)
+
+        slots = free_slots([self.vet.id], self.MONDAY, tuesday)
+
+        self.assertNotIn(tuesday, slots[self.vet.id])
+
+    def test_vets_without_working_hours_use_default_schedule(self):
+        with self.settings(VET_DEFAULT_WORKING_HOURS=[(0, "16:00", "17:00")]):
+            slots = free_slots([self.default_vet.id], self.MONDAY, self.MONDAY, duration=60)
+
+        self.assertEqual(self.slots(slots[self.default_vet.id][self.MONDAY]), ["16:00"])
+
+    def test_past_slots_are_left_out(self):
+        now = datetime.combine(self.MONDAY, datetime.min.time()).replace(hour=10, minute=5)
+
+        slots = free_slots([self.vet.id], self.MONDAY, self.MONDAY, duration=30, now=now)
+
+        self.assertEqual(self.slots(slots[self.vet.id][self.MONDAY]), ["10:15", "10:30"])
+
+    def test_query_count_does_not_depend_on_vets_or_days(self):
+        with self.assertNumQueries(2):
+            free_slots(
+                [self.vet.id, self.default_vet.id],
+                self.MONDAY,
+                self.MONDAY + timedelta(days=29),
+            )
+
+    def test_availability_endpoint(self):
+        Appointment.objects.create(pet=self.pet, vet=self.vet, date=self.MONDAY, time="09:00", duration=60)
+
+        response = self.client.get(
+            reverse("vets_availability"),
+            {"vet": self.vet.id, "from": self.MONDAY.isoformat(), "duration": 60},
+        )
+
+        self.assertEqual(
+            response.json(),
+            {"vets": [{"id": self.vet.id, "days": {"2030-06-03": ["10:00"]}}]},
+        )
+
+    def test_availability_endpoint_rejects_invalid_params(self):
+        url = reverse("vets_availability")
+
+        self.assertEqual(self.client.get(url, {"from": "mañana"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(url, {"from": "2030-06-03", "to": "2030-01-01"}).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(url, {"from": "2030-06-03", "duration": "1000"}).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(url, {"from": "2030-06-03", "vet": "9" * 20}).status_code,
+            400,
+        )
+
+
+class AgendaTest(TestCase):
+    """Test the day and week agenda of the appointments"""
+
+    MONDAY = datetime(2030, 6, 3).date()
+
+    def setUp(self):
+        owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=owner,
+        )
+        self.vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+        self.other_vet = Vet.objects.create(name="Dra. Gómez", phone="221555233", email="vet2@vetsoft.com")
+
+    def create(self, vet, day, time):
+        return Appointment.objects.create(pet=self.pet, vet=vet, date=day, time=time)
+
+    def test_week_groups_appointments_by_vet_and_day(self):
+        wednesday = self.MONDAY + timedelta(days=2)
+        self.create(self.vet, wednesday, "11:00")
+        self.create(self.vet, wednesday, "09:00")
+        self.create(self.other_vet, self.MONDAY, "10:00")
+
+        agenda = Agenda(wednesday, "week")
+
+        self.assertEqual(agenda.days[0], self.MONDAY)
+        self.assertEqual(len(agenda.days), 7)
+        self.assertEqual([vet["name"] for vet in agenda.vets], ["Dr. Pérez", "Dra. Gómez"])
+        self.assertEqual(
+            [f"{row.time:%H:%M}" for row in agenda.vets[0]["days"][2]], ["09:00", "11:00"],
+        )
+        self.assertEqual(len(agenda.vets[1]["days"][0]), 1)
+
+    def test_appointments_outside_the_range_are_left_out(self):
+        self.create(self.vet, self.MONDAY - timedelta(days=1), "09:00")
+        self.create(self.vet, self.MONDAY + timedelta(days=7), "09:00")
+        self.create(self.vet, self.MONDAY + timedelta(days=1), "09:00")
+
+        self.assertEqual(Agenda(self.MONDAY, "week").vets[0]["days"][1][0].vet_name, "Dr. Pérez")
+        self.assertEqual(Agenda(self.MONDAY, "day").vets, [])
+
+    def test_agenda_is_a_single_query(self):
+        for day in range(7):
+            self.create(self.vet, self.MONDAY + timedelta(days=day), "09:00")
+            self.create(self.other_vet, self.MONDAY + timedelta(days=day), "09:00")
+
+        with self.assertNumQueries(1):
+            Agenda(self.MONDAY, "week")
+
+    def test_agenda_page(self):
+        appointment = self.create(self.vet, self.MONDAY, "09:00")
+
+        response = self.client.get(
+            reverse("appointments_agenda"), {"view": "day", "date": "2030-06-03"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Dr. Pérez")
+        self.assertContains(response, "Fido")
+        self.assertContains(response, reverse("appointments_edit", kwargs={"id": appointment.id}))
+        self.assertContains(response, "date=2030-06-04")
+
+    def test_links_follow_any_shape_of_the_edit_route(self):
+        appointment = self.create(self.vet, self.MONDAY, "09:00")
+        rows = Appointment.objects.annotate(pet_name=F("pet__name"))
+
+        with mock.patch(
+            "app.templatetags.agenda_tags.reverse",
+            lambda name, kwargs: f"/citas/{kwargs['id']}/editar",
+        ):
+            html = agenda_cell(rows)
+
+        self.assertIn(f'href="/citas/{appointment.id}/editar"', html)
+
+    def test_agenda_page_ignores_invalid_params(self):
+        response = self.client.get(
+            reverse("appointments_agenda"), {"view": "year", "date": "mañana"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["agenda"].view, "week")
+
+    def test_agenda_page_at_the_ends_of_the_calendar(self):
+        for day in ["0001-01-01", "9999-12-31"]:
+            for view in AGENDA_VIEWS:
+                with self.subTest(day=day, view=view):
+                    response = self.client.get(
+                        reverse("appointments_agenda"), {"view": view, "date": day},
+                    )
+
+                    self.assertEqual(response.status_code, 200)
+
+
+class AutocompleteTest(TestCase):
+    """Test the autocomplete endpoints and the forms that use them"""
+
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        Client.objects.create(name="Guido Carrillo", phone=54221555233, email="guido@vetsoft.com")
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=self.owner,
+        )
+        self.vet = Vet.objects.create(name="Dr. Pérez", phone="221555232", email="vet@vetsoft.com")
+
+    def test_prefix_match_is_case_insensitive(self):
+        response = self.client.get(reverse("clients_autocomplete"), {"q": "jua"})
+
+        self.assertEqual(
+            response.json(),
+            {"results": [{"id": self.owner.id, "label": "Juan Sebastian Veron"}]},
+        )
+
+    def test_only_prefixes_match(self):
+        response = self.client.get(reverse("clients_autocomplete"), {"q": "veron"})
+
+        self.assertEqual(response.json(), {"results": []})
+
+    def test_pets_label_includes_owner(self):
+        response = self.client.get(reverse("pets_autocomplete"), {"q": "fi"})
+
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.pet.id, "label": "Fido (Juan Sebastian Veron)"}],
+        )
+
+    def test_results_are_limited_and_sorted(self):
+        Vet.objects.bulk_create(
+            [Vet(name=f"dr. {i:02d}", phone="221555232", email="vet@vetsoft.com") for i in range(30)],
+        )
+
+        with self.settings(AUTOCOMPLETE_LIMIT=5):
+            response = self.client.get(reverse("vets_autocomplete"), {"q": "DR"})
+
+        self.assertEqual(
+            [result["label"] for result in response.json()["results"]],
+            ["dr. 00", "dr. 01", "dr. 02", "dr. 03", "dr. 04"],
+        )
+
+    def test_like_wildcards_are_escaped(self):
+        response = self.client.get(reverse("clients_autocomplete"), {"q": "%"})
+
+        self.assertEqual(response.json(), {"results": []})
+
+    def test_forms_do_not_load_every_option(self):
+        Client.objects.bulk_create(
+            [Client(name=f"Cliente {i}", phone=54221555232, email="c@vetsoft.com") for i in range(50)],
+        )
+
+        response = self.client.get(reverse("pets_form"))
+
+        self.assertNotContains(response, "Cliente 1")
+        self.assertContains(response, reverse("clients_autocomplete"))
+
+    def test_edit_forms_show_the_selected_options(self):
+        appointment = Appointment.objects.create(
+            pet=self.pet, vet=self.vet, date="2030-06-03", time="09:00",
+        )
+
+        pet_response = self.client.get(reverse("pets_edit", kwargs={"id": self.pet.id}))
+        # The change time lookup of the conditional GET and the appointment.
+        with self.assertNumQueries(2):
+            appointment_response = self.client.get(
+                reverse("appointments_edit", kwargs={"id": appointment.id}),
+            )
+
+        self.assertContains(pet_response, 'value="Juan Sebastian Veron"')
+        self.assertContains(pet_response, f'name="client" value="{self.owner.id}"')
+        self.assertContains(appointment_response, 'value="Fido"')
+        self.assertContains(appointment_response, 'value="Dr. Pérez"')
+        self.assertContains(appointment_response, f'name="vet" value="{self.vet.id}"')
+
+
+class AuditQueriesTest(TestCase):
+    """Test the query plan audit of the views"""
+
+    def setUp(self):
+        seed()
+
+    def test_every_url_is_audited(self):
+        reports = audit()
+
+        self.assertEqual(
+            {report["name"] for report in reports},
+            {pattern.name for pattern in urlpatterns},
+        )
+        self.assertTrue(all(report["status"] < 500 for report in reports))
+
+    def test_views_have_no_unexpected_issues(self):
+        reports = audit()
+
+        problems = [
+            (report["name"], issue["detail"])
+            for report in reports
+            for statement in report["statements"]
+            for issue in statement["issues"]
+            if not issue["expected"]
+        ]
+        self.assertEqual(problems, [])
+        self.assertEqual(unexpected_issues(reports), 0)
+
+    def test_audit_rolls_back_the_changes_of_the_views(self):
+        clients = Client.objects.count()
+
+        audit()
+
+        self.assertEqual(Client.objects.count(), clients)
+
+    def test_audit_bypasses_the_page_cache(self):
+        self.client.get(reverse("clients_repo"))
+
+        with mock.patch("app.cache.store_response") as store_response:
+            reports = {report["name"]: report for report in audit()}
+
+        # The page query ran (and was explained) although the page was
+        # cached, and no page of the audit went to the cache.
+        self.assertEqual(reports["clients_repo"]["queries"], 2)
+        store_response.assert_not_called()
+
+    def test_command_outputs_json(self):
+        out = io.StringIO()
+
+        call_command("audit_queries", "--use-existing", "--format", "json", stdout=out)
+
+        reports = json.loads(out.getvalue())
+        self.assertIn("clients_repo", [report["name"] for report in reports])
+
+
+class SQLiteProfileTest(TestCase):
+    """Test the pragmas of the production SQLite profile"""
+
+    def setUp(self):
+        self.defaults = {name: self.pragma(name) for name in ("cache_size", "busy_timeout")}
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            for name, value in self.defaults.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        with self.settings(SQLITE_PRAGMAS={"cache_size": -1234, "busy_timeout": 4321}):
+            configure_sqlite(sender=None, connection=connection)
+
+        self.assertEqual(self.pragma("cache_size"), -1234)
+        self.assertEqual(self.pragma("busy_timeout"), 4321)
+
+    def test_default_profile_leaves_connections_alone(self):
+        cache_size = self.pragma("cache_size")
+
+        with self.settings(SQLITE_PRAGMAS={}):
+            configure_sqlite(sender=None, connection=connection)
+
+        self.assertEqual(self.pragma("cache_size"), cache_size)
+
+
+class WriteRetryTest(TransactionTestCase):
+    """Test the retries of the write transactions on a locked database"""
+
+    def setUp(self):
+        write_metrics.reset()
+
+    def flaky(self, failures):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError("database is locked")
+            return Client.objects.create(
+                name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+            )
+
+        return func, calls
+
+    def test_locked_writes_are_retried(self):
+        func, calls = self.flaky(failures=2)
+
+        with self.settings(WRITE_RETRY_BACKOFF=0):
+            retry_on_lock(func)
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(write_metrics.snapshot()["retries"], 2)
+        self.assertEqual(write_metrics.snapshot()["transactions"], 3)
+
+    def test_retries_are_bounded(self):
+        func, calls = self.flaky(failures=10)
+
+        with self.settings(WRITE_RETRY_BACKOFF=0, WRITE_RETRY_ATTEMPTS=3):
+            with self.assertRaises(OperationalError):
+                retry_on_lock(func)
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(write_metrics.snapshot()["failures"], 1)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise OperationalError("no such table: app_client")
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(func)
+
+        self.assertEqual(len(calls), 1)
+
+    def test_locked_view_answers_service_unavailable(self):
+        @serialized_writes
+        def view(request):
+            raise OperationalError("database is locked")
+
+        with self.settings(WRITE_RETRY_BACKOFF=0):
+            response = view(RequestFactory().post("/clientes/nuevo/"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_mutating_views_take_the_write_lock(self):
+        self.client.post(
+            reverse("clients_form"),
+            data={
+                "name": "Juan Sebastian Veron",
+                "phone": "54221555232",
+                "address": "13 y 44",
+                "email": "brujita75@vetsoft.com",
+            },
+        )
+        self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(write_metrics.snapshot()["transactions"], 1)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "fragments": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    },
+)
+class CachedPageTest(TestCase):
+    """Test the versioned cache of the repository pages"""
+
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        Pet.objects.create(name="Fido", breed="Labrador", birthday="2020-01-01", client=self.owner)
+        Product.objects.create(name="Alimento", type="Perro", price=100)
+
+    def create_client(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("clients_form"),
+                data={
+                    "name": name,
+                    "phone": "54221555232",
+                    "address": "13 y 44",
+                    "email": "guido@vetsoft.com",
+                },
+            )
+
+    def test_cache_hits_only_look_up_the_change_time(self):
+        first = self.client.get(reverse("clients_repo"))
+
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse("clients_repo"))
+
+        self.assertContains(second, "Juan Sebastian Veron")
+        self.assertEqual(len(first.content), len(second.content))
+
+    def test_deploys_do_not_serve_pages_of_the_old_code(self):
+        self.client.get(reverse("clients_repo"))
+
+        with mock.patch("app.cache.build_version", return_value="new"):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse("clients_repo"))
+
+        self.assertGreater(len(queries), 1)
+
+    def test_saving_invalidates_the_page_of_the_model(self):
+        self.client.get(reverse("clients_repo"))
+
+        self.create_client("Guido Carrillo")
+
+        self.assertContains(self.client.get(reverse("clients_repo")), "Guido Carrillo")
+
+    def test_saving_invalidates_pages_of_related_models_only(self):
+        self.client.get(reverse("pets_repo"))
+        self.client.get(reverse("products_repo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.name = "Guido Carrillo"
+            self.owner.save()
+
+        self.assertContains(self.client.get(reverse("pets_repo")), "Guido Carrillo")
+        with self.assertNumQueries(1):
+            self.client.get(reverse("products_repo"))
+
+    def test_query_strings_are_cached_separately(self):
+        self.create_client("Guido Carrillo")
+        self.client.get(reverse("clients_repo"))
+
+        response = self.client.get(reverse("clients_repo"), {"name": "guido"})
+
+        self.assertContains(response, "Guido Carrillo")
+        self.assertNotContains(response, "Juan Sebastian Veron")
+
+    def test_cached_forms_get_the_csrf_token_of_the_request(self):
+        HttpClient(enforce_csrf_checks=True).get(reverse("clients_repo"))
+        other = HttpClient(enforce_csrf_checks=True)
+
+        response = other.get(reverse("clients_repo"))
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode())
+
+        response = other.post(
+            reverse("clients_delete"),
+            {"client_id": self.owner.id, "csrfmiddlewaretoken": token.group(1)},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_imports_invalidate_the_page(self):
+        self.client.get(reverse("clients_repo"))
+        file = io.StringIO(
+            "name,phone,email,address\nGuido Carrillo,54221555232,guido@vetsoft.com,1 y 57\n",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            import_csv("clients", file)
+
+        self.assertContains(self.client.get(reverse("clients_repo")), "Guido Carrillo")
+
+
+class ConditionalGetTest(TestCase):
+    """Test the ETag and Last-Modified headers of the repository and edit pages"""
+
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com",
+        )
+        self.pet = Pet.objects.create(
+            name="Fido", breed="Labrador", birthday="2020-01-01", client=self.owner,
+        )
+
+    def test_unchanged_repository_returns_not_modified(self):
+        response = self.client.get(reverse("clients_repo"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(1), self.assertTemplateNotUsed("clients/repository.html"):
+            response = self.client.get(
+                reverse("clients_repo"), headers={"if-none-match": response["ETag"]},
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_not_modified(self):
+        response = self.client.get(reverse("clients_repo"))
+
+        response = self.client.get(
+            reverse("clients_repo"),
+            headers={"if-modified-since": response["Last-Modified"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_of_the_table_change_the_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        Client.objects.create(name="Guido Carrillo", phone=54221555232, email="guido@vetsoft.com")
+
+        response = self.client.get(reverse("clients_repo"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Guido Carrillo")
+
+    def test_deploys_change_the_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        with mock.patch("app.conditional.build_version", return_value="new"):
+            response = self.client.get(reverse("clients_repo"), headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_deletes_change_the_etag(self):
+        etag = self.client.get(reverse("pets_repo"))["ETag"]
+
+        self.pet.delete()
+
+        response = self.client.get(reverse("pets_repo"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_of_related_tables_change_the_etag(self):
+        etag = self.client.get(reverse("pets_repo"))["ETag"]
+
+        self.owner.name = "Guido Carrillo"
+        self.owner.save()
+
+        response = self.client.get(reverse("pets_repo"), headers={"if-none-match": etag})
+        self.assertContains(response, "Guido Carrillo")
+
+    def test_changes_of_unrelated_tables_keep_the_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        Product.objects.create(name="Alimento", type="Perro", price=100)
+
+        response = self.client.get(reverse("clients_repo"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_imports_change_the_etag(self):
+        etag = self.client.get(reverse("clients_repo"))["ETag"]
+
+        import_csv(
+            "clients",
+            io.StringIO("name,phone,email,address\nGuido Carrillo,54221555232,g@vetsoft.com,1 y 57\n"),
+        )
+
+        response = self.client.get(reverse("clients_repo"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_edit_page_returns_not_modified(self):
+        url = reverse("pets_edit", kwargs={"id": self.pet.id})
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1), self.assertTemplateNotUsed("pets/form.html"):
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_page_etag_follows_the_object_and_its_relations(self):
+        url = reverse("pets_edit", kwargs={"id": self.pet.id})
+        etag = self.client.get(url)["ETag"]
+
+        self.owner.name = "Guido Carrillo"
+        self.owner.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertContains(response, "Guido Carrillo")
+
+        Pet.objects.create(name="Rex", breed="Beagle", birthday="2020-01-01", client=self.owner)
+        response = self.client.get(url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_object_form_is_always_rendered(self):
+        response = self.client.get(reverse("pets_form"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_missing_object_is_not_found(self):
+        response = self.client.get(reverse("pets_edit", kwargs={"id": self.pet.id + 1}))
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        "fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+)
+class RowFragmentCacheTest(TestCase):
+    """Test the cache of the rendered rows of the repository tables"""
+
+    def setUp(self):
+        caches["fragments"].clear()
+        fragment_metrics.reset()
+        Client.objects.bulk_create(
+            [
+                Client(name=f"Cliente {i:02d}", phone=54221555232, email="c@vetsoft.com")
+                for i in range(10)
+            ],
+        )
+
+    def test_unchanged_rows_are_served_from_the_cache(self):
+        first = self.client.get(reverse("clients_repo"))
+        self.assertEqual(fragment_metrics.snapshot()["misses"], 10)
+
+        second = self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(fragment_metrics.snapshot(), {"hits": 10, "misses": 10, "hit_ratio": 0.5})
+        # Only the masked CSRF tokens differ.
+        self.assertEqual(len(first.content), len(second.content))
+        self.assertContains(second, "Cliente 09")
+
+    def test_editing_a_row_renders_only_that_row(self):
+        self.client.get(reverse("clients_repo"))
+        client = Client.objects.get(name="Cliente 03")
+
+        client.update_client({"name": "Guido Carrillo"})
+        fragment_metrics.reset()
+        response = self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(fragment_metrics.snapshot()["misses"], 1)
+        self.assertEqual(fragment_metrics.snapshot()["hits"], 9)
+        self.assertContains(response, "Guido Carrillo")
+        self.assertNotContains(response, "Cliente 03")
+
+    def test_cached_rows_get_the_csrf_token_of_the_request(self):
+        HttpClient(enforce_csrf_checks=True).get(reverse("clients_repo"))
+        other = HttpClient(enforce_csrf_checks=True)
+
+        response = other.get(reverse("clients_repo"))
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode())
+
+        self.assertEqual(fragment_metrics.snapshot()["hits"], 10)
+        response = other.post(
+            reverse("clients_delete"),
+            {"client_id": Client.objects.first().id, "csrfmiddlewaretoken": token.group(1)},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_data_never_gets_the_csrf_token(self):
+        Product.objects.create(name="__csrf_token__", type="Perro", price=100)
+
+        response = self.client.get(reverse("products_repo"))
+
+        self.assertContains(response, "__csrf_token__")
+        self.assertNotContains(response, 'value="__csrf_token__"')
+
+    def test_products_rows_are_cached(self):
+        Product.objects.create(name="Alimento", type="Perro", price=100)
+
+        self.client.get(reverse("products_repo"))
+        response = self.client.get(reverse("products_repo"))
+
+        self.assertEqual(fragment_metrics.snapshot()["hits"], 1)
+        self.assertContains(response, "Alimento")
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=0)
+    def test_rows_are_always_rendered_when_disabled(self):
+        self.client.get(reverse("clients_repo"))
+        self.client.get(reverse("clients_repo"))
+
+        self.assertEqual(fragment_metrics.snapshot()["misses"], 20)
+
+
+class StaticFilesTest(TestCase):
+    """Test the fingerprinted, precompressed static files served by the app"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root.name,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {"BACKEND": "app.staticfiles.CompressedManifestStaticFilesStorage"},
+            },
+        )
+        cls.settings_override.enable()
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.static_root.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        # A new client loads the middleware, which lists the collected files.
+        self.client = HttpClient()
+        self.css_url = staticfiles_storage.url("vendor/bootstrap/css/bootstrap.min.css")
+
+    def read(self, response):
+        """Returns the content of a file response."""
+        return b"".join(response.streaming_content)
+
+    def test_pages_link_the_fingerprinted_assets(self):
+        response = self.client.get(reverse("home"))
+
+        self.assertRegex(self.css_url, r"bootstrap\.min\.[0-9a-f]{12}\.css$")
+        self.assertContains(response, self.css_url)
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+
+    def test_text_files_are_precompressed(self):
+        root = Path(self.static_root.name)
+
+        self.assertTrue((root / f"{self.css_url.removeprefix(settings.STATIC_URL)}.gz").exists())
+        self.assertFalse((root / "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2.gz").exists())
+
+    def test_fingerprinted_files_are_immutable(self):
+        response = self.client.get(self.css_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertNotIn("Content-Encoding", response)
+        self.assertTrue(self.read(response).startswith(b'@charset "UTF-8"'))
+
+    def test_gzip_variant_is_served_when_accepted(self):
+        plain = self.read(self.client.get(self.css_url))
+
+        response = self.client.get(self.css_url, headers={"accept-encoding": "gzip, br"})
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        compressed = self.read(response)
+        self.assertLess(len(compressed), len(plain) / 4)
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_css_references_are_fingerprinted(self):
+        url = staticfiles_storage.url("vendor/bootstrap-icons/bootstrap-icons.min.css")
+
+        content = self.read(self.client.get(url))
+
+        self.assertRegex(content.decode(), r'url\("fonts/bootstrap-icons\.[0-9a-f]{12}\.woff2')
+
+    def test_original_names_are_revalidated(self):
+        response = self.client.get(f"{settings.STATIC_URL}vendor/bootstrap/css/bootstrap.min.css")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("must-revalidate", response["Cache-Control"])
+
+    def test_unmodified_files_return_not_modified(self):
+        last_modified = self.client.get(self.css_url)["Last-Modified"]
+
+        response = self.client.get(self.css_url, headers={"if-modified-since": last_modified})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_files_are_not_found(self):
+        response = self.client.get(f"{settings.STATIC_URL}vendor/../../manage.py")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class CompressionTest(TestCase):
+    """Test the gzip compression of the responses"""
+
+    GZIP = {"accept-encoding": "gzip, deflate, br"}
+
+    def setUp(self):
+        compression_metrics.reset()
+        Client.objects.bulk_create(
+            [
+                Client(name=f"Cliente {i:03d}", phone=54221555232, email="c@vetsoft.com")
+                for i in range(200)
+            ],
+        )
+
+    def test_html_pages_are_compressed(self):
+        plain = self.client.get(reverse("clients_repo"))
+        response = self.client.get(reverse("clients_repo"), headers=self.GZIP)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(len(gzip.decompress(response.content)), len(plain.content))
+        snapshot = compression_metrics.snapshot()
+        self.assertEqual(snapshot["responses"], 1)
+        self.assertEqual(snapshot["original_bytes"], len(plain.content))
+        self.assertLess(snapshot["ratio"], 0.2)
+        self.assertGreater(snapshot["cpu_time"], 0)
+
+    @override_settings(COMPRESSION_MIN_SIZE=200)
+    def test_json_responses_are_compressed(self):
+        response = self.client.get(
+            reverse("clients_autocomplete"), {"q": "Cliente"}, headers=self.GZIP,
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))["results"]), 20)
+
+    def test_browsers_without_gzip_get_plain_responses(self):
+        response = self.client.get(reverse("clients_repo"))
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(compression_metrics.snapshot()["responses"], 0)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(
+            reverse("clients_autocomplete"), {"q": "Nadie"}, headers=self.GZIP,
+        )
+
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_exports_are_compressed_chunk_by_chunk(self):
+        plain = b"".join(self.client.get(reverse("clients_export"), {"format": "csv"}).streaming_content)
+
+        with self.settings(EXPORT_CHUNK_SIZE=50):
+            response = self.client.get(
+                reverse("clients_export"), {"format": "csv"}, headers=self.GZIP,
+            )
+            chunks = list(response.streaming_content)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response)
+        # The gzip header, one flushed chunk per batch of rows and the trailer.
+        self.assertGreaterEqual(len(chunks), 5)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), plain)
+        snapshot = compression_metrics.snapshot()
+        self.assertEqual(snapshot["original_bytes"], len(plain))
+        self.assertEqual(snapshot["compressed_bytes"], len(b"".join(chunks)))
+
+    def test_strong_etags_become_weak(self):
+        Client.objects.create(name="Guido Carrillo", phone=54221555232, email="g@vetsoft.com")
+
+        response = self.client.get(reverse("clients_repo"), headers=self.GZIP)
+
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = self.client.get(
+            reverse("clients_repo"), headers={**self.GZIP, "if-none-match": response["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_content_types_are_not_compressed(self):
+        request = RequestFactory().get("/", headers=self.GZIP)
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(b"\x89PNG" * 1000, content_type="image/png"),
+        )
+
+        response = middleware(request)
+
+        self.assertNotIn("Content-Encoding", response)
+
+
+class AsyncViewsTest(TestCase):
+    """Test the repository, search and export views under ASGI and WSGI"""
+
+    GZIP = {"accept-encoding": "gzip"}
+
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Juan Sebastian Veron",
+            phone=54221555232,
+            address="13 y 44",
+            email="brujita75@vetsoft.com",
+        )
+        Client.objects.create(name="Guido Carrillo", phone=54221232555, email="goleador@vetsoft.com")
+
+    async def read(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    async def test_repository_page(self):
+        response = await self.async_client.get(reverse("clients_repo"), {"page_size": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.name for c in response.context["page"]], ["Guido Carrillo"])
+        self.assertTrue(response.context["page"].has_next)
+
+    async def test_unchanged_repository_is_not_modified(self):
+        response = await self.async_client.get(reverse("clients_repo"))
+
+        response = await self.async_client.get(
+            reverse("clients_repo"), headers={"if-none-match": response["ETag"]},
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_search(self):
+        response = await self.async_client.get(reverse("search"), {"q": "guido"})
+
+        self.assertEqual([r.title for r in response.context["results"]], ["Guido Carrillo"])
+
+    async def test_export_streams_asynchronously(self):
+        with self.settings(EXPORT_CHUNK_SIZE=1):
+            response = await self.async_client.get(reverse("clients_export"), {"format": "ndjson"})
+            content = await self.read(response)
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(
+            [json.loads(line)["name"] for line in content.splitlines()],
+            ["Juan Sebastian Veron", "Guido Carrillo"],
+        )
+
+    async def test_compressed_export_is_a_single_gzip_stream(self):
+        plain = await self.read(await self.async_client.get(reverse("clients_export")))
+
+        response = await self.async_client.get(reverse("clients_export"), headers=self.GZIP)
+        compressed = await self.read(response)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed), plain)
+        self.assertEqual(compressed.count(b"\x1f\x8b"), 1)
+
+    def test_export_stays_synchronous_under_wsgi(self):
+        response = self.client.get(reverse("clients_export"))
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
+
+    async def test_asgi_requests_get_the_async_views(self):
+        for name, view in [
+            ("clients_repo", views.aclients_repository),
+            ("appointments_repo", views.aappointments_repository),
+            ("search", views.asearch),
+        ]:
+            response = await self.async_client.get(reverse(name))
+
+            self.assertEqual(response.resolver_match.func, view)
+            self.assertTrue(iscoroutinefunction(response.resolver_match.func))
+
+    def test_wsgi_requests_keep_the_sync_views(self):
+        for name, view in [
+            ("clients_repo", views.clients_repository),
+            ("appointments_repo", views.appointments_repository),
+            ("search", views.search),
+            ("clients_export", views.export),
+        ]:
+            response = self.client.get(reverse(name))
+
+            self.assertEqual(response.resolver_match.func, view)
+            self.assertFalse(iscoroutinefunction(response.resolver_match.func))
+
+    def test_async_urlconf_has_the_same_routes(self):
+        self.assertEqual(
+            [(str(p.pattern), p.name, p.default_args) for p in async_urlpatterns],
+            [(str(p.pattern), p.name, p.default_args) for p in urlpatterns],
+        )
+
+    def test_custom_middlewares_stay_async(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        for middleware in (AsyncViewsMiddleware, CompressionMiddleware, StaticFilesMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware(get_response)))
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTest(TestCase):
+    """Test the Server-Timing header and log line of every request"""
+
+    def setUp(self):
+        Client.objects.create(name="Guido Carrillo", phone=54221232555, email="goleador@vetsoft.com")
+
+    def timings(self, response):
+        return {
+            entry.split(";")[0].strip(): entry for entry in response["Server-Timing"].split(",")
+        }
+
+    def test_header_splits_sql_templates_and_python(self):
+        with self.assertNumQueries(2), self.assertLogs("app.timing", "INFO"):
+            response = self.client.get(reverse("clients_repo"))
+
+        timings = self.timings(response)
+        self.assertEqual(list(timings), ["db", "tpl", "view", "total"])
+        self.assertIn('desc="SQL (2)"', timings["db"])
+
+    def test_request_is_logged_as_json(self):
+        with self.assertLogs("app.timing", "INFO") as logs:
+            self.client.get(reverse("clients_repo"))
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "clients_repo")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["db_queries"], 2)
+        self.assertGreater(line["tpl_ms"], 0)
+        self.assertGreaterEqual(line["total_ms"], line["db_ms"] + line["tpl_ms"])
+
+    async def test_async_views_are_timed(self):
+        with self.assertLogs("app.timing", "INFO"):
+            response = await self.async_client.get(reverse("clients_repo"))
+
+        self.assertIn('desc="SQL (2)"', self.timings(response)["db"])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("clients_repo"))
+
+        self.assertNotIn("Server-Timing", response)
+
+
+class SlowQueryLogTest(TestCase):
+    """Test the slow query log and its manage.py slow_queries report"""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "slow.jsonl")
+        # Every statement is slow.
+        self.settings_override = override_settings(
+            SLOW_QUERY_THRESHOLD_MS=0.000001, SLOW_QUERY_LOG=self.path,
+        )
+        self.settings_override.enable()
+        Client.objects.create(name="Guido Carrillo", phone=54221232555, email="goleador@vetsoft.com")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tempdir.cleanup()
+
+    def entries(self):
+        return list(read_slow_query_log(self.path))
+
+    def test_queries_are_attributed_to_their_view(self):
+        self.client.get(reverse("clients_repo"))
+
+        entries = [entry for entry in self.entries() if entry["view"] == "clients_repo"]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["path"], "/clientes/")
+        self.assertIn("app/conditional.py", entries[0]["frame"])
+        self.assertIn("app_tablechange", entries[0]["fingerprint"])
+
+    def test_fast_queries_are_not_logged(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=60000):
+            self.client.get(reverse("clients_repo"))
+
+        self.assertEqual([entry for entry in self.entries() if entry["view"]], [])
+
+    def test_log_is_rotated(self):
+        with self.settings(SLOW_QUERY_LOG_MAX_BYTES=500, SLOW_QUERY_LOG=self.path + ".small"):
+            for _ in range(5):
+                list(Client.objects.all())
+
+            self.assertTrue(os.path.exists(process_log_path(self.path + ".small") + ".1"))
+            self.assertEqual(len(list(read_slow_query_log(self.path + ".small"))), 5)
+
+    def test_every_process_writes_its_own_file(self):
+        list(Client.objects.all())
+        with mock.patch("os.getpid", return_value=1):
+            list(Pet.objects.all())
+
+        with open(process_log_path(self.path, 1)) as file:
+            self.assertIn("app_pet", file.read())
+        fingerprints = " ".join(entry["fingerprint"] for entry in self.entries())
+        self.assertIn("app_client", fingerprints)
+        self.assertIn("app_pet", fingerprints)
+
+    def test_new_process_takes_over_the_files_of_an_exited_one(self):
+        # Above the largest pid of Linux, never a running process.
+        exited = process_log_path(self.path, 99999999)
+        for name in [exited, exited + ".1"]:
+            with open(name, "w") as file:
+                file.write(json.dumps({"duration_ms": 1, "fingerprint": name}) + "\n")
+
+        with mock.patch("os.getpid", return_value=2):
+            list(Pet.objects.all())
+
+        self.assertFalse(os.path.exists(exited))
+        self.assertTrue(os.path.exists(process_log_path(self.path, 2) + ".1"))
+        fingerprints = [entry["fingerprint"] for entry in self.entries()]
+        self.assertIn(exited, fingerprints)
+        self.assertIn(exited + ".1", fingerprints)
+
+    def test_command_reports_the_slowest_fingerprints(self):
+        path = os.path.join(self.tempdir.name, "report.jsonl")
+        with open(path, "w") as file:
+            for duration, sql, view in [
+                (300, "SELECT * FROM app_pet WHERE id = 1", "pets_repo"),
+                (200, "SELECT * FROM app_pet WHERE id = 2", "pets_form"),
+                (400, "SELECT * FROM app_client", "clients_repo"),
+            ]:
+                file.write(json.dumps({
+                    "duration_ms": duration, "fingerprint": fingerprint(sql), "view": view,
+                }) + "\n")
+            file.write('{"cut by a crash\n')
+
+        out = io.StringIO()
+        call_command("slow_queries", "--log", path, "--format", "json", stdout=out)
+
+        groups = json.loads(out.getvalue())
+        self.assertEqual([group["total_ms"] for group in groups], [500, 400])
+        self.assertEqual(groups[0]["fingerprint"], "SELECT * FROM app_pet WHERE id = ?")
+        self.assertEqual(groups[0]["views"], {"pets_repo": 1, "pets_form": 1})
+
+    def test_fingerprint_hides_the_values(self):
+        self.assertEqual(
+            fingerprint("SELECT *  FROM t WHERE id IN (%s, %s, %s) AND name = 'o''neil' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (?, ...) AND name = ? LIMIT ?",
+        )
+
+
+class MetricsTest(TestCase):
+    """Test the Prometheus /metrics endpoint"""
+
+    def setUp(self):
+        registry.store.clear()
+        registry.forget()
+        fragment_metrics.reset()
+        Client.objects.create(name="Guido Carrillo", phone=54221232555, email="goleador@vetsoft.com")
+
+    def samples(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        return dict(
+            line.rsplit(" ", 1) for line in response.content.decode().splitlines()
+            if not line.startswith("#")
+        )
+
+    def test_requests_are_counted_by_url_name(self):
+        self.client.get(reverse("clients_repo"))
+        self.client.get(reverse("clients_repo"))
+
+        samples = self.samples()
+
+        self.assertEqual(
+            samples['vetsoft_http_requests_total{method="GET",status="200",view="clients_repo"}'], "2",
+        )
+        self.assertEqual(samples['vetsoft_http_request_duration_seconds_count{view="clients_repo"}'], "2")
+        self.assertEqual(
+            samples['vetsoft_http_request_duration_seconds_bucket{le="+Inf",view="clients_repo"}'], "2",
+        )
+        self.assertIn('vetsoft_http_request_duration_seconds_bucket{le="0.005",view="clients_repo"}', samples)
+        self.assertGreater(int(samples["vetsoft_db_queries_total"]), 0)
+
+    def test_histogram_buckets_are_in_order(self):
+        registry.observe_request("home", "GET", 200, 0.3)
+
+        text = exposition(registry.store.read() | registry.pending)
+        bounds = re.findall(r'_bucket\{le="([^"]+)",view="home"\} (\d+)', text)
+
+        self.assertEqual(bounds[0], ("0.005", "0"))
+        self.assertEqual(bounds[6], ("0.5", "1"))
+        self.assertEqual(bounds[-1], ("+Inf", "1"))
+
+    def test_server_errors_are_counted(self):
+        registry.observe_request("clients_repo", "GET", 500, 0.1)
+
+        self.assertEqual(self.samples()['vetsoft_http_errors_total{view="clients_repo"}'], "1")
+
+    def test_rows_and_cache_hit_ratio(self):
+        fragment_metrics.record(3, 1)
+
+        samples = self.samples()
+
+        self.assertEqual(samples['vetsoft_model_rows{model="app.client"}'], "1")
+        self.assertEqual(samples["vetsoft_fragment_cache_hit_ratio"], "0.75")
+        self.assertEqual(samples['vetsoft_fragment_cache_requests_total{result="hit"}'], "3")
+
+    def test_unknown_methods_share_a_label(self):
+        self.client.generic("BREW", reverse("home"))
+        self.client.generic("PROPFIND", reverse("home"))
+
+        samples = self.samples()
+
+        self.assertEqual(samples['vetsoft_http_requests_total{method="other",status="200",view="home"}'], "2")
+        self.assertNotIn("BREW", "".join(samples))
+
+    def test_rows_are_counted_once_per_timeout(self):
+        with mock.patch("app.metrics.cache", LocMemCache("metrics", {})):
+            self.samples()
+            Client.objects.create(name="Juan Sebastian Veron", phone=54221555232, email="brujita75@vetsoft.com")
+
+            cached = self.samples()
+            with self.settings(METRICS_ROWS_TIMEOUT=0):
+                counted = self.samples()
+
+        self.assertEqual(cached['vetsoft_model_rows{model="app.client"}'], "1")
+        self.assertEqual(counted['vetsoft_model_rows{model="app.client"}'], "2")
+
+    def test_counters_of_every_process_are_summed(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "metrics.sqlite3")
+            for requests in (2, 3):
+                worker = MetricsRegistry(MetricsStore(path))
+                for _ in range(requests):
+                    worker.observe_request("home", "GET", 200, 0.01)
+                worker.flush(force=True)
+
+            values = MetricsStore(path).read()
+
+        self.assertEqual(values[("vetsoft_http_request_duration_seconds_count", (("view", "home"),))], 5)
+
+    def test_forked_worker_forgets_the_counters_of_the_master(self):
+        registry.inc("vetsoft_db_queries_total", 10)
+        fragment_metrics.record(5, 0)
+
+        registry.forget()
+        registry.flush(force=True)
+
+        self.assertEqual(registry.store.read(), {})
+
+
+class SeedDataTest(TestCase):
+    """Test the synthetic data of manage.py seed_data"""
+
+    def seed(self, **options):
+        return seed_data(
+            clients=20, pets_per_client=2, vets=3, appointments=100,
+            providers=5, products=5, medicines=5, start=date(2024, 1, 1), **options,
+        )
+
+    def test_rows_are_valid(self):
+        counts = self.seed()
+
+        self.assertEqual(counts[Client], 20)
+        self.assertEqual(counts[Pet], 40)
+        self.assertEqual(counts[Appointment], 100)
+        for model, schema in [
+            (Client, CLIENT_SCHEMA),
+            (Pet, PET_SCHEMA),
+            (Vet, VET_SCHEMA),
+            (Appointment, APPOINTMENT_SCHEMA),
+            (Provider, PROVIDER_SCHEMA),
+            (Product, PRODUCT_SCHEMA),
+            (Medicine, MEDICINE_SCHEMA),
+        ]:
+            errors = [error for error in schema.validate_many(model.objects.all()) if error]
+            self.assertEqual(errors, [], model.__name__)
+
+    def test_appointments_of_a_vet_do_not_overlap(self):
+        self.seed()
+
+        ends = {}
+        for appointment in Appointment.objects.order_by("vet", "date", "time"):
+            start = datetime.combine(appointment.date, appointment.time)
+            self.assertLess(start.weekday(), 5)
+            self.assertGreaterEqual(start, ends.get(appointment.vet_id, start))
+            ends[appointment.vet_id] = start + timedelta(minutes=appointment.duration)
+
+    def test_same_seed_gives_same_rows(self):
+        def rows(seed):
+            generator = Generator(seed, date(2024, 1, 1))
+            return list(generator.clients(10)), list(generator.appointments(10, [1, 2], [1]))
+
+        self.assertEqual(rows(1), rows(1))
+        self.assertNotEqual(rows(1), rows(2))
+
+    def test_rows_are_indexed_and_continue_the_ids(self):
+        existing = Client.objects.create(name="Juan Sebastian Veron", phone=54221555232, email="brujita@vetsoft.com")
+
+        self.seed(batch_size=7)
+
+        self.assertEqual(Client.objects.order_by("id").last().id, existing.id + 20)
+        client = Client.objects.order_by("id").last()
+        self.assertIn(client.id, [result.id for result in search(client.email.split("@")[0])])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("seed_data", "--clients", "5", "--appointments", "10", stdout=out)
+
+        self.assertIn("Citas", out.getvalue())
+        self.assertEqual(Appointment.objects.count(), 10)
@@ -1,8 +1,34 @@
+import http.client
+import io
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
 
+from app.audit import is_expected, plan_issues
+from app.availability import free_intervals, slot_starts
 from app.models import Client, Medicine, Pet, Product, Provider,object_to_querydict
+from app.server import WorkerServer, create_socket
+from app.testing import TestCase
+from app.validation import (
+    CLIENT_SCHEMA,
+    MEDICINE_SCHEMA,
+    PET_SCHEMA,
+    PRODUCT_SCHEMA,
+    Field,
+    Schema,
+    ends_with,
+    integer_between,
+    required,
+    starts_with,
+)
+from app.warmup import startup, warm_up
 
 
 class ClientModelTest(TestCase):
@@ -343,4 +369,289 @@ class ObjectToQueryDictTest(TestCase):
         self.assertEqual(query_dict.get("name"), "John")
         self.assertEqual(query_dict.get("age"), "30")
         self.assertEqual(query_dict.get("city"),"New York")
-        self.assertEqual(query_dict.get("email"), "john@example.com")
\ No newline at end of file
+        self.assertEqual(query_dict.get("email"), "john@example.com")
+
+
+class ValidationSchemaTest(TestCase):
+    """Test the declarative validation schemas."""
+
+    def test_validates_mapping(self):
+        errors = CLIENT_SCHEMA.validate(
+            {"name": "pepito12", "phone": "221555232", "email": "a@b@vetsoft.com"},
+        )
+
+        self.assertEqual(
+            errors,
+            {
+                "name": "El nombre solo puede contener letras y espacios",
+                "phone": "El teléfono debe comenzar con 54",
+                "email": "Por favor ingrese un email valido",
+            },
+        )
+
+    def test_validates_model_instance(self):
+        client = Client(
+            name="Juan Sebastian Veron",
+            phone=54221555232,
+            email="brujita75@yahoo.com",
+        )
+
+        self.assertEqual(
+            CLIENT_SCHEMA.validate(client),
+            {"email": "El email debe ser de dominio vetsoft.com"},
+        )
+
+    def test_instance_reads_foreign_key_ids(self):
+        pet = Pet(name="Fido", breed="Labrador", birthday=datetime.now().date())
+
+        self.assertEqual(
+            PET_SCHEMA.validate(pet),
+            {
+                "invalid_birthday": "Por favor ingrese una fecha de nacimiento valida.",
+                "client": "Por favor seleccione un cliente para la mascota.",
+            },
+        )
+
+    def test_validate_many_keeps_row_order(self):
+        past = str(datetime.now().date() - timedelta(days=1))
+        rows = [
+            {"name": "Fido", "breed": "Labrador", "birthday": past, "client": "1"},
+            {"name": "Rex", "breed": "", "birthday": "no es fecha", "client": "1"},
+        ]
+
+        self.assertEqual(
+            PET_SCHEMA.validate_many(rows),
+            [
+                {},
+                {
+                    "breed": "Por favor ingrese una raza para la mascota.",
+                    "invalid_birthday": "Por favor ingrese una fecha de nacimiento valida.",
+                },
+            ],
+        )
+
+    def test_non_numeric_values_are_errors(self):
+        self.assertEqual(
+            PRODUCT_SCHEMA.validate({"name": "Pelota", "type": "Juguete", "price": "abc"}),
+            {"price": "Por favor ingrese un precio mayor a 0."},
+        )
+        self.assertEqual(
+            MEDICINE_SCHEMA.validate({"name": "Ivermectina", "description": "Antiparasitario", "dose": "x"}),
+            {"dose": "La dosis debe estar entre 1 y 10."},
+        )
+
+    def test_combined_rules_report_the_first_failure(self):
+        schema = Schema(
+            code=Field(
+                required("Falta"),
+                starts_with('a"(', "Prefijo"),
+                integer_between(0, 99, "Rango"),
+                ends_with(")'", "Sufijo"),
+            ),
+        )
+
+        self.assertEqual(schema.validate({"code": "b\"()'"}), {"code": "Prefijo"})
+        self.assertEqual(schema.validate({"code": "a\"()'"}), {"code": "Rango"})
+        self.assertEqual(
+            CLIENT_SCHEMA.validate(
+                {"name": "Juan", "phone": "54" + "9" * 20, "email": "a@vetsoft.com"},
+            ),
+            {"phone": "El teléfono es demasiado largo"},
+        )
+
+
+class AvailabilitySweepTest(TestCase):
+    """Test the interval sweep of the availability engine."""
+
+    def test_free_intervals_subtract_appointments(self):
+        working = [(540, 780), (840, 1020)]  # 09:00-13:00, 14:00-17:00
+        busy = [(540, 570), (600, 660), (770, 860), (1000, 1030)]
+
+        self.assertEqual(
+            free_intervals(working, busy),
+            [(570, 600), (660, 770), (860, 1000)],
+        )
+
+    def test_free_intervals_without_appointments(self):
+        self.assertEqual(free_intervals([(540, 1020)], []), [(540, 1020)])
+
+    def test_free_intervals_with_nested_appointments(self):
+        self.assertEqual(
+            free_intervals([(540, 720)], [(540, 660), (570, 600)]),
+            [(660, 720)],
+        )
+
+    def test_slot_starts_fit_duration_on_grid(self):
+        self.assertEqual(slot_starts([(570, 640)], 30), [570, 585, 600])
+        self.assertEqual(slot_starts([(572, 640)], 30), [585, 600])
+        self.assertEqual(slot_starts([(570, 640)], 30, not_before=590), [600])
+
+
+class QueryPlanAuditTest(TestCase):
+    """Test the classification of the query plans of the audit."""
+
+    def test_scan_of_filtered_table_is_missing_index(self):
+        sql = 'SELECT "app_client"."id" FROM "app_client" WHERE "app_client"."email" = \'a\''
+
+        issues = plan_issues(sql, ["SCAN app_client"])
+
+        self.assertEqual(issues[0]["kind"], "missing_index")
+        self.assertEqual(issues[0]["columns"], ["email"])
+
+    def test_scan_without_filter_is_full_scan(self):
+        issues = plan_issues('SELECT "app_vet"."id" FROM "app_vet"', ["SCAN app_vet"])
+
+        self.assertEqual(issues[0]["kind"], "full_scan")
+
+    def test_index_scans_and_searches_are_fine(self):
+        plan = [
+            "SCAN app_client USING COVERING INDEX client_name_idx",
+            "SEARCH app_pet USING INTEGER PRIMARY KEY (rowid=?)",
+            "SCAN app_search VIRTUAL TABLE INDEX 0:M2",
+        ]
+
+        self.assertEqual(plan_issues("SELECT 1", plan), [])
+
+    def test_temp_btree_and_automatic_index(self):
+        plan = [
+            "SEARCH app_pet USING AUTOMATIC COVERING INDEX (breed=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ]
+
+        self.assertEqual(
+            [issue["kind"] for issue in plan_issues("SELECT 1", plan)],
+            ["missing_index", "temp_btree"],
+        )
+
+    def test_expected_issues(self):
+        self.assertTrue(is_expected("clients_export", {"kind": "full_scan"}))
+        self.assertFalse(is_expected("clients_repo", {"kind": "full_scan"}))
+        self.assertTrue(is_expected("search", {"kind": "temp_btree"}))
+
+
+class WorkerServerTest(TestCase):
+    """Test the threaded WSGI server of the workers of manage.py serve"""
+
+    def setUp(self):
+        self.socket = create_socket("127.0.0.1", 0, 16)
+        self.address = self.socket.getsockname()
+
+    def tearDown(self):
+        self.socket.close()
+
+    def serve(self, app, threads=2, max_requests=0, timeout=None):
+        """Runs a worker server in a thread, returns the server and the thread."""
+        server = WorkerServer(self.socket, app, threads, max_requests, timeout)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+        thread.start()
+        return server, thread
+
+    def get(self):
+        """Requests the root path, returns the status and the body."""
+        connection = http.client.HTTPConnection(*self.address, timeout=5)
+        connection.request("GET", "/")
+        response = connection.getresponse()
+        result = response.status, response.read()
+        connection.close()
+        return result
+
+    def test_serves_the_app(self):
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "2")])
+            return [b"ok"]
+
+        server, thread = self.serve(app)
+        try:
+            self.assertEqual(self.get(), (200, b"ok"))
+        finally:
+            server.stop()
+            thread.join(5)
+            server.server_close()
+
+    def test_requests_are_handled_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def app(environ, start_response):
+            # Both requests must be in progress at once to get past it.
+            barrier.wait()
+            start_response("200 OK", [("Content-Length", "0")])
+            return [b""]
+
+        server, thread = self.serve(app, threads=2)
+        try:
+            with ThreadPoolExecutor(2) as executor:
+                results = list(executor.map(lambda _: self.get()[0], range(2)))
+            self.assertEqual(results, [200, 200])
+        finally:
+            server.stop()
+            thread.join(5)
+            server.server_close()
+
+    def test_silent_connections_are_dropped(self):
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Length", "2")])
+            return [b"ok"]
+
+        server, thread = self.serve(app, threads=1, timeout=0.2)
+        idle = socket.create_connection(self.address)
+        try:
+            with mock.patch.object(server, "handle_error") as handle_error:
+                # The only thread is taken by the idle connection until it times out.
+                self.assertEqual(self.get(), (200, b"ok"))
+                self.assertEqual(idle.recv(1), b"")
+        finally:
+            idle.close()
+            server.stop()
+            thread.join(5)
+            server.server_close()
+
+        # The timeout isn't reported as an error with a traceback.
+        handle_error.assert_not_called()
+
+    def test_stops_after_max_requests(self):
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Length", "0")])
+            return [b""]
+
+        with self.assertLogs("app.server", "INFO") as logs:
+            server, thread = self.serve(app, max_requests=3)
+            for _ in range(3):
+                self.get()
+            thread.join(5)
+        server.server_close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(server.requests, 3)
+        self.assertIn("handled 3 requests", logs.output[0])
+
+
+class WarmUpTest(TestCase):
+    """Test the warm-up of the server processes"""
+
+    def test_compiles_every_template_of_the_app(self):
+        templates = list((Path(settings.BASE_DIR) / "app" / "templates").rglob("*.html"))
+
+        report = {phase: count for phase, count, _ in warm_up()}
+
+        self.assertEqual(report["templates"], len(templates))
+        cached = engines["django"].engine.template_loaders[0].get_template_cache
+        self.assertIn("clients/repository.html", cached)
+
+    def test_command_reports_every_phase(self):
+        out = io.StringIO()
+
+        call_command("warmup", stdout=out)
+
+        for label in ("Plantillas", "URLs", "Modelos", "Total"):
+            self.assertIn(label, out.getvalue())
+
+    def test_startup_logs_the_time_it_took(self):
+        with self.assertLogs("app.warmup", "INFO") as logs:
+            startup()
+
+        self.assertIn("warmed up in", logs.output[0])
+
+    def test_failed_warm_up_is_logged(self):
+        with mock.patch("app.warmup.PHASES", [("templates", mock.Mock(side_effect=RuntimeError))]):
+            with self.assertLogs("app.warmup", "ERROR"):
+                startup()
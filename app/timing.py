@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+# Timing of the request being handled, None outside ServerTimingMiddleware.
+current_timing = ContextVar("current_timing", default=None)
+
+
+class RequestTiming:
+    """Time a request spent in the database, rendering templates and in total."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        # Queries run while rendering (lazy querysets) count as database time.
+        self.template_db_time = 0.0
+        self.rendering = False
+
+    def record_query(self, execute, sql, params, many, context):
+        """Execute wrapper of the database connections, times every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if self.rendering:
+                self.template_db_time += duration
+
+    def instrument(self):
+        """Context manager timing the queries of every database connection."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.record_query))
+        return stack
+
+    def finish(self):
+        """Stops the clock, returns the durations in milliseconds."""
+        self.total = time.perf_counter() - self.start
+        template = self.template_time - self.template_db_time
+        return {
+            "db": self.db_time * 1000,
+            "tpl": template * 1000,
+            "view": max(self.total - self.db_time - template, 0.0) * 1000,
+            "total": self.total * 1000,
+        }
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the timing of the request."""
+
+    def render(self, context=None, request=None):
+        """Renders the template, timing it when the request is timed."""
+        timing = current_timing.get()
+        # Templates rendered by other templates (the rows of the tables) are
+        # part of the time of the outer one.
+        if timing is None or timing.rendering:
+            return super().render(context, request)
+
+        timing.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_time += time.perf_counter() - start
+            timing.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template engine, with templates timed by ServerTimingMiddleware."""
+
+    def from_string(self, template_code):
+        """Compiles a template from a string."""
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        """Loads a template by name."""
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def server_timing_header(durations, queries):
+    """Value of the Server-Timing header of the durations."""
+    return ", ".join(
+        [
+            f'db;dur={durations["db"]:.1f};desc="SQL ({queries})"',
+            f'tpl;dur={durations["tpl"]:.1f};desc="Templates"',
+            f'view;dur={durations["view"]:.1f};desc="Python"',
+            f'total;dur={durations["total"]:.1f}',
+        ],
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Measures where the time of every request goes: database queries (time
+    and count), template rendering and the rest of the Python code of the
+    view and middlewares. Adds them to the response as a Server-Timing
+    header, shown by the network panel of the browsers, and logs them as a
+    JSON line at INFO level.
+
+    Only enabled with SERVER_TIMING, otherwise Django leaves it out of the
+    middleware chain. The body of streamed responses (the exports) is
+    produced after the headers are sent, so it isn't measured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Times the handling of the request."""
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            with timing.instrument():
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        """Times the handling of the request under ASGI."""
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        # The connections are per thread: the wrappers go in the one the
+        # async views run their queries in.
+        instrumented = await sync_to_async(timing.instrument)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(instrumented.close)()
+            current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    def report(self, request, response, timing):
+        """Adds the Server-Timing header and logs the timing of the request."""
+        durations = timing.finish()
+        response.headers["Server-Timing"] = server_timing_header(durations, timing.queries)
+
+        match = getattr(request, "resolver_match", None)
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": match.url_name if match else None,
+                    "status": response.status_code,
+                    "db_queries": timing.queries,
+                    **{f"{name}_ms": round(value, 2) for name, value in durations.items()},
+                },
+            ),
+        )
+        return response
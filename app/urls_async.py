@@ -0,0 +1,27 @@
+from django.urls import path
+
+from . import urls, views
+
+# The async variants of the views, served to the requests of an ASGI server
+# (see app.routing.AsyncViewsMiddleware). The other routes, and every route
+# under WSGI, keep the sync views of app.urls.
+ASYNC_VIEWS = {
+    "search": views.asearch,
+    "clients_repo": views.aclients_repository,
+    "medicines_repo": views.amedicines_repository,
+    "pets_repo": views.apets_repository,
+    "vets_repo": views.avets_repository,
+    "providers_repo": views.aproviders_repository,
+    "products_repo": views.aproducts_repository,
+    "appointments_repo": views.aappointments_repository,
+}
+
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        view=ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        kwargs=pattern.default_args,
+        name=pattern.name,
+    )
+    for pattern in urls.urlpatterns
+]
@@ -0,0 +1,401 @@
+import re
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from functools import partial
+
+# Kinds of rules, see Schema._compile for what each one checks.
+REQUIRED = "required"
+MATCHES = "matches"
+STARTS_WITH = "starts_with"
+ENDS_WITH = "ends_with"
+CONTAINS = "contains"
+EMAIL = "email"
+INTEGER = "integer"
+INTEGER_BETWEEN = "integer_between"
+GREATER_THAN = "greater_than"
+NUMBER_BETWEEN = "number_between"
+ISO_DATE = "iso_date"
+ISO_TIME = "iso_time"
+PAST_DATE = "past_date"
+
+
+class Rule:
+    """
+    A check of a field value: its kind and the argument of the check (a
+    compiled regex, a prefix, the bounds of a range...). Reports message
+    under the field name, or under key when given.
+
+    pattern is a regular expression that only matches valid values, when
+    the rule has one, used by the schema to check many rules at once.
+    """
+
+    def __init__(self, kind, argument, message, key=None, pattern=None):
+        self.kind = kind
+        self.argument = argument
+        self.message = message
+        self.key = key
+        self.pattern = pattern
+
+
+def required(message):
+    """Fails when the value is missing or empty."""
+    return Rule(REQUIRED, None, message)
+
+
+def matches(pattern, message):
+    """Fails when the value doesn't match the regular expression."""
+    regex = re.compile(pattern)
+    # Groups or flags of the pattern would change when combined with others.
+    combinable = not regex.groups and regex.flags == re.UNICODE
+    return Rule(MATCHES, regex.match, message, pattern=pattern if combinable else None)
+
+
+def starts_with(prefix, message):
+    """Fails when the value doesn't start with the prefix."""
+    return Rule(STARTS_WITH, prefix, message, pattern=re.escape(prefix))
+
+
+def ends_with(suffix, message):
+    """Fails when the value doesn't end with the suffix."""
+    return Rule(ENDS_WITH, suffix, message, pattern=rf"(?s:.*){re.escape(suffix)}\Z")
+
+
+def contains(substring, message):
+    """Fails when the value doesn't contain the substring."""
+    return Rule(CONTAINS, substring, message, pattern=rf"(?s:.*){re.escape(substring)}")
+
+
+def email_address(message):
+    """Fails unless the value has exactly one "@" with something before it."""
+    return Rule(EMAIL, None, message, pattern=r"[^@]+@[^@]*\Z")
+
+
+def iso_date(message):
+    """Fails when the value isn't a date or an ISO formatted date."""
+    return Rule(ISO_DATE, None, message)
+
+
+def iso_time(message):
+    """Fails when the value isn't a time or an ISO formatted time."""
+    return Rule(ISO_TIME, None, message)
+
+
+def integer(message):
+    """Fails when the value can't be converted to an integer."""
+    return Rule(INTEGER, None, message, pattern=r"[0-9]+\Z")
+
+
+def integer_between(minimum, maximum, message):
+    """Fails when the value isn't an integer within [minimum, maximum]."""
+    # Numbers of up to digits digits are all within the range.
+    digits = len(str(maximum + 1)) - 1 if minimum <= 0 <= maximum else 0
+    pattern = rf"[0-9]{{1,{digits}}}\Z" if digits else None
+    return Rule(INTEGER_BETWEEN, (minimum, maximum), message, pattern=pattern)
+
+
+def greater_than(minimum, message):
+    """Fails when the value isn't a number greater than minimum."""
+    return Rule(GREATER_THAN, minimum, message)
+
+
+def number_between(minimum, maximum, message):
+    """Fails when the value isn't a number within [minimum, maximum]."""
+    return Rule(NUMBER_BETWEEN, (minimum, maximum), message)
+
+
+def past_date(message, key=None):
+    """Fails when the value isn't a date (or ISO date) before today."""
+    return Rule(PAST_DATE, None, message, key=key)
+
+
+def to_float(value):
+    """Converts a value to float, None if it isn't a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_integer(value):
+    """Converts a value to int, None if it isn't an integer."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_date(value):
+    """Converts an ISO string, date or datetime to a date, None if invalid."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def to_time(value):
+    """Converts an ISO string or time to a time, None if invalid."""
+    if isinstance(value, time):
+        return value
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Field:
+    """
+    A field of a schema and the rules checked on its value, in order.
+
+    The rules of an optional field are skipped when the value is empty.
+    """
+
+    def __init__(self, *rules, attr=None, optional=False):
+        self.rules = rules
+        self.attr = attr
+        self.optional = optional
+
+
+class Schema:
+    """
+    Declarative validation schema of a model.
+
+    Every field lists its rules in order and reports only the first one that
+    fails, under the field name or the key of the rule. A schema validates
+    mappings (e.g. request.POST) by field name and model instances by
+    attribute, without converting the instance to a mapping first.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.dated = any(
+            rule.kind is PAST_DATE for field in fields.values() for rule in field.rules
+        )
+        self._validate = self._compile()
+
+    def _compile(self):
+        """
+        Builds the validator of the schema, one closure over the rules of
+        every field with the check of each kind written inline: validating a
+        row makes no call per rule, and values that already are strings
+        (request.POST, CSV rows) aren't converted.
+
+        When every rule of a field has a pattern, they are combined into one
+        regex checked first: a value it matches passes all of them, the
+        rules are only checked one by one to find the first that fails.
+        """
+        by_name = []
+        by_attr = []
+        for name, field in self.fields.items():
+            missing = None
+            rules = []
+            for rule in field.rules:
+                if rule.kind is REQUIRED:
+                    missing = (rule.key or name, rule.message)
+                else:
+                    rules.append((rule.kind, rule.argument, rule.key or name, rule.message))
+            patterns = [rule.pattern for rule in field.rules if rule.kind is not REQUIRED]
+            combined = None
+            if patterns and None not in patterns:
+                combined = re.compile("".join(f"(?={pattern})" for pattern in patterns)).match
+            rules = tuple(rules)
+            by_name.append((name, missing, field.optional, combined, rules))
+            by_attr.append((field.attr or name, missing, field.optional, combined, rules))
+        by_name = tuple(by_name)
+        by_attr = tuple(by_attr)
+
+        def validate(data, today):
+            if data.__class__ is dict or isinstance(data, Mapping):
+                get = data.get
+                fields = by_name
+            else:
+                get = partial(getattr, data)
+                fields = by_attr
+            errors = {}
+            for key, missing, optional, combined, rules in fields:
+                value = get(key, "")
+                if value is None or value == "":
+                    if missing is not None:
+                        errors[missing[0]] = missing[1]
+                        continue
+                    if optional:
+                        continue
+                if not rules:
+                    continue
+                text = value if value.__class__ is str else str(value)
+                if combined is not None and combined(text) is not None:
+                    continue
+                # The number parsed by a previous rule of the field.
+                number = None
+                for kind, argument, error, message in rules:
+                    if kind is PAST_DATE:
+                        try:
+                            day = date.fromisoformat(text)
+                        except ValueError:
+                            day = to_date(text)
+                        valid = day is not None and day < today
+                    elif kind is INTEGER or kind is INTEGER_BETWEEN:
+                        if number is None:
+                            try:
+                                number = int(text)
+                            except ValueError:
+                                number = None
+                        valid = number is not None and (
+                            kind is INTEGER or argument[0] <= number <= argument[1]
+                        )
+                    elif kind is GREATER_THAN or kind is NUMBER_BETWEEN:
+                        if number is None:
+                            try:
+                                number = float(text)
+                            except ValueError:
+                                number = None
+                        if number is None:
+                            valid = False
+                        elif kind is GREATER_THAN:
+                            valid = number > argument
+                        else:
+                            valid = argument[0] <= number <= argument[1]
+                    elif kind is ISO_DATE:
+                        valid = to_date(text) is not None
+                    elif kind is ISO_TIME:
+                        valid = to_time(text) is not None
+                    elif kind is MATCHES:
+                        valid = argument(text) is not None
+                    elif kind is STARTS_WITH:
+                        valid = text.startswith(argument)
+                    elif kind is ENDS_WITH:
+                        valid = text.endswith(argument)
+                    elif kind is CONTAINS:
+                        valid = argument in text
+                    else:
+                        valid = text.count("@") == 1 and text[0] != "@"
+                    if not valid:
+                        errors[error] = message
+                        break
+            return errors
+
+        return validate
+
+    def validate(self, data):
+        """
+        Validates a mapping (e.g. request.POST) or a model instance, returns
+        a dict of error messages by field.
+        """
+        return self._validate(data, datetime.now().date() if self.dated else None)
+
+    def validate_many(self, rows):
+        """Validates many rows, returns the errors of each row in order."""
+        today = datetime.now().date() if self.dated else None
+        return [self._validate(row, today) for row in rows]
+
+
+# Range of the integer columns of SQLite, larger values can't be stored.
+INTEGER_MIN = -(2**63)
+INTEGER_MAX = 2**63 - 1
+
+# Length of an appointment in minutes.
+APPOINTMENT_MIN_DURATION = 5
+APPOINTMENT_MAX_DURATION = 240
+APPOINTMENT_DEFAULT_DURATION = 30
+
+CLIENT_SCHEMA = Schema(
+    name=Field(
+        required("Por favor ingrese un nombre"),
+        matches(r"^[a-zA-Z\s]+$", "El nombre solo puede contener letras y espacios"),
+    ),
+    phone=Field(
+        required("Por favor ingrese un teléfono"),
+        starts_with("54", "El teléfono debe comenzar con 54"),
+        integer("El teléfono debe ser un número"),
+        integer_between(INTEGER_MIN, INTEGER_MAX, "El teléfono es demasiado largo"),
+    ),
+    email=Field(
+        required("Por favor ingrese un email"),
+        email_address("Por favor ingrese un email valido"),
+        ends_with("@vetsoft.com", "El email debe ser de dominio vetsoft.com"),
+    ),
+)
+
+PET_SCHEMA = Schema(
+    name=Field(required("Por favor ingrese un nombre para la mascota.")),
+    breed=Field(required("Por favor ingrese una raza para la mascota.")),
+    birthday=Field(
+        required("Por favor ingrese una fecha de nacimiento para la mascota."),
+        past_date(
+            "Por favor ingrese una fecha de nacimiento valida.",
+            key="invalid_birthday",
+        ),
+    ),
+    client=Field(
+        required("Por favor seleccione un cliente para la mascota."),
+        attr="client_id",
+    ),
+)
+
+VET_SCHEMA = Schema(
+    name=Field(required("Por favor ingrese un nombre")),
+    phone=Field(required("Por favor ingrese un teléfono")),
+    email=Field(
+        required("Por favor ingrese un email"),
+        contains("@", "Por favor ingrese un email valido"),
+    ),
+)
+
+PROVIDER_SCHEMA = Schema(
+    name=Field(required("Por favor ingrese un nombre")),
+    email=Field(
+        required("Por favor ingrese un email"),
+        contains("@", "Por favor ingrese un email valido"),
+    ),
+    address=Field(required("Por favor ingrese una dirección")),
+)
+
+PRODUCT_SCHEMA = Schema(
+    name=Field(required("Por favor ingrese un nombre del producto.")),
+    type=Field(required("Por favor ingrese el tipo de producto.")),
+    price=Field(
+        required("Por favor ingrese el precio del producto."),
+        greater_than(0, "Por favor ingrese un precio mayor a 0."),
+    ),
+)
+
+APPOINTMENT_SCHEMA = Schema(
+    pet=Field(required("Por favor seleccione una mascota."), attr="pet_id"),
+    vet=Field(required("Por favor seleccione un veterinario."), attr="vet_id"),
+    date=Field(
+        required("Por favor seleccione una fecha."),
+        iso_date("Por favor seleccione una fecha válida."),
+    ),
+    time=Field(
+        required("Por favor seleccione una hora."),
+        iso_time("Por favor seleccione una hora válida."),
+    ),
+    duration=Field(
+        integer("La duración debe ser un número entero de minutos."),
+        number_between(
+            APPOINTMENT_MIN_DURATION,
+            APPOINTMENT_MAX_DURATION,
+            f"La duración debe estar entre {APPOINTMENT_MIN_DURATION} y "
+            f"{APPOINTMENT_MAX_DURATION} minutos.",
+        ),
+        optional=True,
+    ),
+)
+
+MEDICINE_SCHEMA = Schema(
+    name=Field(required("Por favor ingrese un nombre del medicamento.")),
+    description=Field(
+        required("Por favor ingrese la descripción del medicamento."),
+    ),
+    dose=Field(
+        required("Por favor ingrese la dosis del medicamento."),
+        number_between(1.0, 10.0, "La dosis debe estar entre 1 y 10."),
+    ),
+)
@@ -1,6 +1,31 @@
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render, reverse
 
+from . import search as search_index
+from .agenda import VIEWS as AGENDA_VIEWS
+from .agenda import Agenda
+from .autocomplete import suggestions
+from .availability import free_slots
+from .cache import cached_page
+from .conditional import conditional_object, conditional_repository
+from .db import serialized_writes
+from .exports import export_response
+from .filters import apply_filters
+from .imports import import_csv
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import collect, exposition
 from .models import Appointment, Client, Medicine, Pet, Product, Provider, Vet
+from .pagination import apaginate, paginate
+from .validation import (
+    APPOINTMENT_MAX_DURATION,
+    APPOINTMENT_MIN_DURATION,
+    INTEGER_MAX,
+    INTEGER_MIN,
+)
 
 
 def home(request):
@@ -10,12 +35,121 @@ def home(request):
     return render(request, "home.html")
 
 
+def export(request, resource):
+    """
+    Streams the rows of a resource as CSV or NDJSON.
+
+    The format is taken from the "format" query param and the rows can be
+    narrowed with the same filters as the repository page. Under ASGI the
+    rows are streamed with the async ORM.
+    """
+    return export_response(request, resource)
+
+
+def metrics(request):
+    """
+    Exposes the metrics of every process of the server in the Prometheus
+    text format.
+    """
+    return HttpResponse(exposition(collect()), content_type=METRICS_CONTENT_TYPE)
+
+
+IMPORTS = {
+    "clients": {
+        "title": "Importar Clientes",
+        "columns": "name, phone, email, address",
+        "repo": "clients_repo",
+    },
+    "pets": {
+        "title": "Importar Mascotas",
+        "columns": "name, breed, birthday, client",
+        "repo": "pets_repo",
+    },
+}
+
+
+def import_form(request, resource):
+    """
+    Handles the CSV import form of a resource.
+
+    The uploaded file is validated row by row, the valid rows are inserted in
+    batches and the errors of the invalid ones are listed by line.
+    """
+    context = {"resource": resource, **IMPORTS[resource]}
+
+    if request.method == "POST":
+        file = request.FILES.get("file")
+        if file is None:
+            context["errors"] = {"file": "Por favor seleccione un archivo CSV"}
+        else:
+            context["result"] = import_csv(resource, file)
+
+    return render(request, "imports/form.html", context)
+
+
+def autocomplete(request, resource):
+    """
+    Returns the objects of a resource whose name starts with the "q" query
+    param, as JSON for the autocomplete fields of the forms.
+    """
+    return JsonResponse(
+        {"results": suggestions(resource, request.GET.get("q", ""))},
+    )
+
+
+def search(request):
+    """Renders the results of the global search."""
+    query = request.GET.get("q", "").strip()
+    results = search_index.search(query) if query else []
+    return render(
+        request,
+        "search/results.html",
+        {"query": query, "results": results},
+    )
+
+
+async def asearch(request):
+    """
+    search under ASGI. The search runs raw FTS5 SQL, which has no async API,
+    so it runs in sync_to_async.
+    """
+    query = request.GET.get("q", "").strip()
+    results = await sync_to_async(search_index.search)(query) if query else []
+    return render(
+        request,
+        "search/results.html",
+        {"query": query, "results": results},
+    )
+
+
+@conditional_repository(Client)
+@cached_page(Client)
 def clients_repository(request):
     """Renders the clients repository page."""
-    clients = Client.objects.all()
-    return render(request, "clients/repository.html", {"clients": clients})
+    clients = apply_filters(request, Client.objects.all(), "clients")
+    page = paginate(request, clients, ordering=["name"])
+    return render(
+        request,
+        "clients/repository.html",
+        {"clients": page, "page": page},
+    )
+
+
+@conditional_repository(Client)
+@cached_page(Client)
+async def aclients_repository(request):
+    """clients_repository under ASGI, the page is fetched with the async ORM."""
+    clients = apply_filters(request, Client.objects.all(), "clients")
+    page = await apaginate(request, clients, ordering=["name"])
+    return render(
+        request,
+        "clients/repository.html",
+        {"clients": page, "page": page},
+    )
 
 
+@conditional_object(Client)
+@serialized_writes
 def clients_form(request, id=None):
     """
     Handles the client form submission and rendering.
@@ -50,6 +184,7 @@ def clients_form(request, id=None):
     return render(request, "clients/form.html", {"client": client})
 
 
+@serialized_writes
 def clients_delete(request):
     """
     Deletes a client.
@@ -63,13 +198,36 @@ def clients_delete(request):
     return redirect(reverse("clients_repo"))
 
 
+@conditional_repository(Medicine)
+@cached_page(Medicine)
 def medicines_repository(request):
     """Renders the medicines repository page."""
 
-    medicines = Medicine.objects.all()
-    return render(request, "medicines/repository.html", {"medicines": medicines})
+    medicines = apply_filters(request, Medicine.objects.all(), "medicines")
+    page = paginate(request, medicines, ordering=["name"])
+    return render(
+        request,
+        "medicines/repository.html",
+        {"medicines": page, "page": page},
+    )
+
 
+@conditional_repository(Medicine)
+@cached_page(Medicine)
+async def amedicines_repository(request):
+    """medicines_repository under ASGI, the page is fetched with the async ORM."""
 
+    medicines = apply_filters(request, Medicine.objects.all(), "medicines")
+    page = await apaginate(request, medicines, ordering=["name"])
+    return render(
+        request,
+        "medicines/repository.html",
+        {"medicines": page, "page": page},
+    )
+
+
+@conditional_object(Medicine)
+@serialized_writes
 def medicines_form(request, id=None):
     """
     Handles the medicines form submission and rendering.
@@ -103,6 +261,7 @@ def medicines_form(request, id=None):
     return render(request, "medicines/form.html", {"medicine": medicine})
 
 
+@serialized_writes
 def medicines_delete(request):
     """
     Deletes a medicine.
@@ -116,20 +275,34 @@ def medicines_delete(request):
     return redirect(reverse("medicines_repo"))
 
 
+@conditional_repository(Pet, Client)
+@cached_page(Pet, Client)
 def pets_repository(request):
     """Renders the pet repository page."""
 
-    pets = Pet.objects.all()
-    return render(request, "pets/repository.html", {"pets": pets})
+    pets = apply_filters(request, Pet.repository_rows(), "pets")
+    page = paginate(request, pets, ordering=["name"])
+    return render(request, "pets/repository.html", {"pets": page, "page": page})
+
+
+@conditional_repository(Pet, Client)
+@cached_page(Pet, Client)
+async def apets_repository(request):
+    """pets_repository under ASGI, the page is fetched with the async ORM."""
 
+    pets = apply_filters(request, Pet.repository_rows(), "pets")
+    page = await apaginate(request, pets, ordering=["name"])
+    return render(request, "pets/repository.html", {"pets": page, "page": page})
 
+
+@conditional_object(Pet, "client")
+@serialized_writes
 def pets_form(request, id=None):
     """
     Handles the pet form submission and rendering.
 
     This function processes both the GET and POST requests for the pet form.
     """
-    clients = Client.objects.all()
     if request.method == "POST":
         pet_id = request.POST.get("id", "")
         errors = {}
@@ -151,10 +324,11 @@ def pets_form(request, id=None):
         )
     pet = None
     if id is not None:
-        pet = get_object_or_404(Pet, pk=id)
-    return render(request, "pets/form.html", {"pet": pet, "clients": clients})
+        pet = get_object_or_404(Pet.objects.select_related("client"), pk=id)
+    return render(request, "pets/form.html", {"pet": pet})
 
 
+@serialized_writes
 def pets_delete(request):
     """
     Deletes a pet.
@@ -168,13 +342,28 @@ def pets_delete(request):
     return redirect(reverse("pets_repo"))
 
 
+@conditional_repository(Vet)
+@cached_page(Vet)
 def vets_repository(request):
     """Renders the vets repository page."""
 
-    vets = Vet.objects.all()
-    return render(request, "vets/repository.html", {"vets": vets})
+    vets = apply_filters(request, Vet.objects.all(), "vets")
+    page = paginate(request, vets, ordering=["name"])
+    return render(request, "vets/repository.html", {"vets": page, "page": page})
+
+
+@conditional_repository(Vet)
+@cached_page(Vet)
+async def avets_repository(request):
+    """vets_repository under ASGI, the page is fetched with the async ORM."""
 
+    vets = apply_filters(request, Vet.objects.all(), "vets")
+    page = await apaginate(request, vets, ordering=["name"])
+    return render(request, "vets/repository.html", {"vets": page, "page": page})
 
+
+@conditional_object(Vet)
+@serialized_writes
 def vets_form(request, id=None):
     """
     Handles the vet form submission and rendering.
@@ -208,6 +397,7 @@ def vets_form(request, id=None):
     return render(request, "vets/form.html", {"vet": vet})
 
 
+@serialized_writes
 def vets_delete(request):
     """
     Deletes a vet.
@@ -221,13 +411,84 @@ def vets_delete(request):
     return redirect(reverse("vets_repo"))
 
 
+def vets_availability(request):
+    """
+    Returns the free appointment slots of the vets as JSON.
+
+    Accepts the "vet" (repeatable, all the vets by default), "from", "to"
+    (ISO dates, "to" defaults to "from") and "duration" (minutes) query
+    params.
+    """
+    try:
+        start = date.fromisoformat(request.GET.get("from", ""))
+        end = date.fromisoformat(request.GET.get("to", "") or start.isoformat())
+        duration = int(request.GET.get("duration", "") or 0)
+        requested = [int(vet_id) for vet_id in request.GET.getlist("vet") if vet_id]
+    except ValueError:
+        return JsonResponse({"error": "Parámetros inválidos"}, status=400)
+
+    if any(not INTEGER_MIN <= vet_id <= INTEGER_MAX for vet_id in requested):
+        return JsonResponse({"error": "Parámetros inválidos"}, status=400)
+
+    if end < start or (end - start).days >= settings.AVAILABILITY_MAX_DAYS:
+        return JsonResponse({"error": "Rango de fechas inválido"}, status=400)
+
+    if duration and not (
+        APPOINTMENT_MIN_DURATION <= duration <= APPOINTMENT_MAX_DURATION
+    ):
+        return JsonResponse({"error": "Duración inválida"}, status=400)
+
+    vets = Vet.objects.all()
+    if requested:
+        vets = vets.filter(id__in=requested)
+    slots = free_slots(vets.values_list("id", flat=True), start, end, duration)
+
+    return JsonResponse(
+        {
+            "vets": [
+                {
+                    "id": vet_id,
+                    "days": {
+                        day.isoformat(): [f"{slot:%H:%M}" for slot in day_slots]
+                        for day, day_slots in days.items()
+                    },
+                }
+                for vet_id, days in slots.items()
+            ],
+        },
+    )
+
+
+@conditional_repository(Provider)
+@cached_page(Provider)
 def providers_repository(request):
     """Renders the provider repository page."""
 
-    providers = Provider.objects.all()
-    return render(request, "providers/repository.html", {"providers": providers})
+    providers = apply_filters(request, Provider.objects.all(), "providers")
+    page = paginate(request, providers, ordering=["name"])
+    return render(
+        request,
+        "providers/repository.html",
+        {"providers": page, "page": page},
+    )
+
+
+@conditional_repository(Provider)
+@cached_page(Provider)
+async def aproviders_repository(request):
+    """providers_repository under ASGI, the page is fetched with the async ORM."""
+
+    providers = apply_filters(request, Provider.objects.all(), "providers")
+    page = await apaginate(request, providers, ordering=["name"])
+    return render(
+        request,
+        "providers/repository.html",
+        {"providers": page, "page": page},
+    )
 
 
+@conditional_object(Provider)
+@serialized_writes
 def providers_form(request, id=None):
     """
     Handles the provider form submission and rendering.
@@ -261,6 +522,7 @@ def providers_form(request, id=None):
     return render(request, "providers/form.html", {"provider": provider})
 
 
+@serialized_writes
 def providers_delete(request):
     """
     Deletes a provider.
@@ -274,13 +536,36 @@ def providers_delete(request):
     return redirect(reverse("providers_repo"))
 
 
+@conditional_repository(Product)
+@cached_page(Product)
 def products_repository(request):
     """Renders the product repository page."""
 
-    products = Product.objects.all()
-    return render(request, "products/repository.html", {"products": products})
+    products = apply_filters(request, Product.objects.all(), "products")
+    page = paginate(request, products, ordering=["name"])
+    return render(
+        request,
+        "products/repository.html",
+        {"products": page, "page": page},
+    )
+
 
+@conditional_repository(Product)
+@cached_page(Product)
+async def aproducts_repository(request):
+    """products_repository under ASGI, the page is fetched with the async ORM."""
 
+    products = apply_filters(request, Product.objects.all(), "products")
+    page = await apaginate(request, products, ordering=["name"])
+    return render(
+        request,
+        "products/repository.html",
+        {"products": page, "page": page},
+    )
+
+
+@conditional_object(Product)
+@serialized_writes
 def products_form(request, id=None):
     """
     Handles the product form submission and rendering.
@@ -312,6 +597,7 @@ def products_form(request, id=None):
     return render(request, "products/form.html", {"product": product})
 
 
+@serialized_writes
 def products_delete(request):
     """
     Deletes a product.
@@ -325,25 +611,68 @@ def products_delete(request):
     return redirect(reverse("products_repo"))
 
 
+@conditional_repository(Appointment, Pet, Vet)
+@cached_page(Appointment, Pet, Vet)
 def appointments_repository(request):
     """Renders the appointments repository page."""
 
-    appointments = Appointment.objects.all()
+    appointments = apply_filters(
+        request, Appointment.repository_rows(), "appointments",
+    )
+    page = paginate(request, appointments, ordering=["date", "time"])
+    return render(
+        request,
+        "appointments/repository.html",
+        {"appointments": page, "page": page},
+    )
+
+
+@conditional_repository(Appointment, Pet, Vet)
+@cached_page(Appointment, Pet, Vet)
+async def aappointments_repository(request):
+    """appointments_repository under ASGI, the page is fetched with the async ORM."""
+
+    appointments = apply_filters(
+        request, Appointment.repository_rows(), "appointments",
+    )
+    page = await apaginate(request, appointments, ordering=["date", "time"])
     return render(
         request,
         "appointments/repository.html",
-        {"appointments": appointments},
+        {"appointments": page, "page": page},
     )
 
 
+def appointments_agenda(request):
+    """
+    Renders the agenda of the appointments of a day or a week, grouped by vet.
+
+    Accepts the "view" ("day" or "week", the default) and "date" (ISO date,
+    today by default) query params.
+    """
+    view = request.GET.get("view", "week")
+    if view not in AGENDA_VIEWS:
+        view = "week"
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+    except ValueError:
+        day = date.today()
+
+    return render(
+        request,
+        "appointments/agenda.html",
+        {"agenda": Agenda(day, view), "today": date.today()},
+    )
+
+
+@conditional_object(Appointment, "pet", "vet")
+@serialized_writes
 def appointments_form(request, id=None):
     """
     Handles the appointments form submission and rendering.
 
     This function processes both the GET and POST requests for the appointments form.
     """
-    pets = Pet.objects.all()
-    vets = Vet.objects.all()
     if request.method == "POST":
         appointment_id = request.POST.get("id", "")
         errors = {}
@@ -353,7 +682,7 @@ def appointments_form(request, id=None):
             saved, errors = Appointment.save_appointment(request.POST)
         else:
             appointment = get_object_or_404(Appointment, pk=appointment_id)
-            appointment.update_appointment(request.POST)
+            saved, errors = appointment.update_appointment(request.POST)
 
         if saved:
             return redirect(reverse("appointments_repo"))
@@ -365,14 +694,13 @@ def appointments_form(request, id=None):
         )
     appointment = None
     if id is not None:
-        appointment = get_object_or_404(Appointment, pk=id)
-    return render(
-        request,
-        "appointments/form.html",
-        {"appointment": appointment, "pets": pets, "vets": vets},
-    )
+        appointment = get_object_or_404(
+            Appointment.objects.select_related("pet", "vet"), pk=id,
+        )
+    return render(request, "appointments/form.html", {"appointment": appointment})
 
 
+@serialized_writes
 def appointments_delete(request):
     """
     Deletes a appointment.
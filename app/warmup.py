@@ -0,0 +1,115 @@
+"""
+Warm-up of a server process before it accepts requests.
+
+Django compiles the templates, the URL patterns and the metadata of the
+models on first use, which makes the first request of every process several
+times slower than the next ones. warm_up does that work at startup instead:
+with the cached template loader the compiled templates are kept for the life
+of the process, and the workers forked from a preloaded master inherit them.
+"""
+
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.template import engines
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+
+def project_template_names():
+    """
+    Names of the templates of the project apps, the ones of installed
+    packages (e.g. the admin) are compiled when first used.
+    """
+    engine = engines["django"].engine
+    names = set()
+    # The cached loader wraps the loaders that find the files.
+    loaders = [
+        inner
+        for loader in engine.template_loaders
+        for inner in getattr(loader, "loaders", [loader])
+    ]
+    for loader in loaders:
+        for directory in loader.get_dirs():
+            directory = str(directory)
+            if not directory.startswith(str(settings.BASE_DIR)):
+                continue
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory).replace(os.sep, "/"))
+    return sorted(names)
+
+
+def warm_templates():
+    """Compiles every template of the project, returns how many."""
+    engine = engines["django"]
+    names = project_template_names()
+    for name in names:
+        engine.get_template(name)
+    return len(names)
+
+
+def warm_urls():
+    """
+    Resolves the links of the navbar with the WSGI and the ASGI urlconfs,
+    returns how many.
+    """
+    from .context_processors import links
+
+    for link in links:
+        for urlconf in (settings.ROOT_URLCONF, settings.ASYNC_ROOT_URLCONF):
+            resolve(link["href"], urlconf)
+    return len(links)
+
+
+def warm_models():
+    """Builds the metadata and the base query of every model, returns how many."""
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+        str(model._default_manager.all().query)
+    return len(models)
+
+
+PHASES = [
+    ("templates", warm_templates),
+    ("urls", warm_urls),
+    ("models", warm_models),
+]
+
+
+def warm_up():
+    """Runs every phase, returns a list of (phase, count, seconds)."""
+    report = []
+    for phase, warm in PHASES:
+        start = time.perf_counter()
+        count = warm()
+        report.append((phase, count, time.perf_counter() - start))
+    return report
+
+
+def startup():
+    """
+    Warms up the process from the WSGI / ASGI entry point and logs the time
+    it took. A failure is logged and the process serves anyway, the broken
+    template or URL fails on first use as it would without the warm-up.
+    """
+    start = time.perf_counter()
+    try:
+        report = warm_up()
+    except Exception:
+        logger.exception("Warm-up of process %s failed", os.getpid())
+        return
+    logger.info(
+        "Process %s warmed up in %.1f ms: %s",
+        os.getpid(),
+        (time.perf_counter() - start) * 1000,
+        ", ".join(
+            f"{count} {phase} ({seconds * 1000:.1f} ms)" for phase, count, seconds in report
+        ),
+    )
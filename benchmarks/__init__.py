@@ -0,0 +1,14 @@
+"""
+Micro-benchmarks of the app, run them from the project root with
+`python -m benchmarks.<name>`.
+"""
+
+import os
+
+import django
+
+
+def setup():
+    """Configures Django so the benchmarks can import the app."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vetsoft.settings")
+    django.setup()
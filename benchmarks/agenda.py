@@ -0,0 +1,71 @@
+"""
+Times the weekly agenda page of a busy clinic with years of appointment
+history, on a throwaway in-memory test database.
+"""
+
+import timeit
+from datetime import date, time, timedelta
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client as HttpClient  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from app.models import Appointment, Client, Pet, Vet  # noqa: E402
+
+VETS = 20
+YEARS = 3
+APPOINTMENTS_PER_DAY = 12
+
+
+def seed(end):
+    """Creates the vets and YEARS of appointments up to the given date."""
+    client = Client.objects.create(name="Juan", phone=54221555232, email="j@vetsoft.com")
+    pet = Pet.objects.create(name="Fido", breed="Labrador", birthday="2020-01-01", client=client)
+    vets = Vet.objects.bulk_create(
+        [Vet(name=f"Vet {i}", phone="221555232", email=f"vet{i}@vetsoft.com") for i in range(VETS)],
+    )
+
+    start = end - timedelta(days=365 * YEARS)
+    appointments = []
+    day = start
+    while day <= end:
+        for vet in vets:
+            for slot in range(APPOINTMENTS_PER_DAY):
+                appointments.append(
+                    Appointment(
+                        pet=pet, vet=vet, date=day, time=time(8 + slot), duration=30,
+                    ),
+                )
+        if len(appointments) >= 50000:
+            Appointment.objects.bulk_create(appointments, batch_size=5000)
+            appointments = []
+        day += timedelta(days=1)
+    Appointment.objects.bulk_create(appointments, batch_size=5000)
+
+
+def main():
+    """Runs the benchmark."""
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    today = date.today()
+    seed(today + timedelta(days=7))
+
+    http = HttpClient()
+    url = reverse("appointments_agenda")
+    params = {"view": "week", "date": today.isoformat()}
+    runs = timeit.repeat(lambda: http.get(url, params), number=1, repeat=20)
+    print(
+        f"Weekly agenda of {VETS} vets, {Appointment.objects.count()} appointments: "
+        f"best {min(runs) * 1000:.1f} ms, median "
+        f"{sorted(runs)[len(runs) // 2] * 1000:.1f} ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
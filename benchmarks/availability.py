@@ -0,0 +1,70 @@
+"""
+Times free_slots for 50 vets over 30 days with a full agenda of
+appointments, on a throwaway in-memory test database.
+"""
+
+import random
+import timeit
+from datetime import date, time, timedelta
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from app.availability import free_slots  # noqa: E402
+from app.models import Appointment, Client, Pet, Vet  # noqa: E402
+
+VETS = 50
+DAYS = 30
+APPOINTMENTS_PER_DAY = 10
+
+
+def seed(start):
+    """Creates the vets and their appointments."""
+    random.seed(0)
+    client = Client.objects.create(name="Juan", phone=54221555232, email="j@vetsoft.com")
+    pet = Pet.objects.create(name="Fido", breed="Labrador", birthday="2020-01-01", client=client)
+    vets = Vet.objects.bulk_create(
+        [Vet(name=f"Vet {i}", phone="221555232", email=f"vet{i}@vetsoft.com") for i in range(VETS)],
+    )
+
+    appointments = []
+    for vet in vets:
+        for day in range(DAYS):
+            starts = random.sample(range(9 * 4, 17 * 4 - 2), APPOINTMENTS_PER_DAY)
+            for quarter in starts:
+                appointments.append(
+                    Appointment(
+                        pet=pet,
+                        vet=vet,
+                        date=start + timedelta(days=day),
+                        time=time(quarter // 4, quarter % 4 * 15),
+                        duration=30,
+                    ),
+                )
+    Appointment.objects.bulk_create(appointments, batch_size=5000)
+    return [vet.id for vet in vets]
+
+
+def main():
+    """Runs the benchmark."""
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    start = date.today() + timedelta(days=1)
+    vet_ids = seed(start)
+    end = start + timedelta(days=DAYS - 1)
+
+    runs = timeit.repeat(lambda: free_slots(vet_ids, start, end), number=1, repeat=20)
+    print(
+        f"{VETS} vets, {DAYS} days, {Appointment.objects.count()} appointments: "
+        f"best {min(runs) * 1000:.1f} ms, median "
+        f"{sorted(runs)[len(runs) // 2] * 1000:.1f} ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
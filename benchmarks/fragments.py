@@ -0,0 +1,57 @@
+"""
+Times a 5k-row clients table with and without the row fragment cache, after
+one client is edited, on a throwaway test database.
+"""
+
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client as HttpClient  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from app.fragments import fragment_metrics  # noqa: E402
+from app.models import Client  # noqa: E402
+
+ROWS = 5000
+REPEAT = 10
+
+
+def edit_and_get(http, url, params):
+    """Edits a client and renders the table."""
+    client = Client.objects.order_by("?").first()
+    client.address = f"Calle {client.id}"
+    client.save()
+    http.get(url, params)
+
+
+def main():
+    """Runs the benchmark."""
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    Client.objects.bulk_create(
+        [Client(name=f"Cliente {i:05d}", phone=54221555232, email="c@vetsoft.com") for i in range(ROWS)],
+    )
+
+    http = HttpClient()
+    url = reverse("clients_repo")
+    params = {"page_size": ROWS}
+    # Without the page cache, so every request renders the table.
+    with override_settings(REPOSITORY_CACHE_TIMEOUT=0, REPOSITORY_MAX_PAGE_SIZE=ROWS):
+        for label, timeout in (("without fragments", 0), ("with fragments", 3600)):
+            with override_settings(FRAGMENT_CACHE_TIMEOUT=timeout):
+                http.get(url, params)
+                fragment_metrics.reset()
+                runs = timeit.repeat(lambda: edit_and_get(http, url, params), number=1, repeat=REPEAT)
+            print(
+                f"{ROWS} rows {label:>17}: best {min(runs) * 1000:.1f} ms, median "
+                f"{sorted(runs)[len(runs) // 2] * 1000:.1f} ms {fragment_metrics.snapshot()}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compares the requests per second of `manage.py runserver` and
+`manage.py serve` on the repository pages.
+
+Every server gets a fresh database file with ROWS rows per repository, the
+rendered page cache disabled so every request renders its page, and
+CLIENTS client processes requesting the pages for DURATION seconds.
+"""
+
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CLIENTS = 16
+DURATION = 10
+ROWS = 2000
+PORT = 8123
+
+PAGES = [
+    "/clientes/",
+    "/mascotas/",
+    "/veterinarios/",
+    "/productos/",
+    "/citas/",
+]
+
+SERVERS = {
+    "runserver": ["runserver", "--noreload", f"127.0.0.1:{PORT}"],
+    "serve": ["serve", f"127.0.0.1:{PORT}"],
+}
+
+SEED = f"""
+from app.models import Appointment, Client, Pet, Product, Vet
+clients = Client.objects.bulk_create(
+    [Client(name=f"Cliente {{i}}", phone=54221555232, email="c@vetsoft.com") for i in range({ROWS})],
+)
+pets = Pet.objects.bulk_create(
+    [Pet(name=f"Mascota {{i}}", breed="Labrador", birthday="2020-01-01", client=c) for i, c in enumerate(clients)],
+)
+vets = Vet.objects.bulk_create(
+    [Vet(name=f"Vet {{i}}", phone="221555232", email="v@vetsoft.com") for i in range({ROWS})],
+)
+Product.objects.bulk_create(
+    [Product(name=f"Producto {{i}}", type="Alimento", price=100) for i in range({ROWS})],
+)
+Appointment.objects.bulk_create(
+    [Appointment(pet=p, vet=vets[0], date="2030-01-01", time=f"{{i // 60 % 24:02d}}:{{i % 60:02d}}") for i, p in enumerate(pets[:1440])],
+)
+"""
+
+
+def client(results):
+    """Requests the pages in turn for DURATION seconds, reports (requests, errors)."""
+    deadline = time.monotonic() + DURATION
+    requests = errors = 0
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+        try:
+            connection.request("GET", PAGES[requests % len(PAGES)])
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+        finally:
+            connection.close()
+        requests += 1
+    results.put((requests, errors))
+
+
+def wait_for_port():
+    """Waits until the server accepts connections."""
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The server didn't start")
+
+
+def run(name, command, env):
+    """Benchmarks a server, prints its requests per second."""
+    server = subprocess.Popen(
+        [sys.executable, "manage.py", *command],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port()
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        clients = [context.Process(target=client, args=(results,)) for _ in range(CLIENTS)]
+        for process in clients:
+            process.start()
+        requests, errors = (sum(values) for values in zip(*(results.get() for _ in clients)))
+        for process in clients:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{name:>10}: {requests / DURATION:8.1f} requests/s {errors:5d} errors")
+
+
+def main():
+    """Runs the benchmark for every server."""
+    print(f"{CLIENTS} clients, {DURATION} s, {ROWS} rows, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "DATABASE_PATH": str(Path(directory) / "db.sqlite3"),
+            "CACHE_LOCATION": str(Path(directory) / "cache"),
+            "REPOSITORY_CACHE_TIMEOUT": "0",
+            "SQLITE_PRODUCTION": "True",
+        }
+        subprocess.run([sys.executable, "manage.py", "migrate", "-v", "0"], env=env, check=True)
+        subprocess.run([sys.executable, "manage.py", "shell", "-c", SEED], env=env, check=True)
+        for name, command in SERVERS.items():
+            run(name, command, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compares the concurrent read/write throughput of the default SQLite
+configuration and the production profile (SQLITE_PRODUCTION=True).
+
+Every profile gets a fresh database file in a temporary directory and
+WORKERS processes that, for DURATION seconds, run request-like units of
+work: a repository page read most of the time, a client insert otherwise,
+closing old connections after each unit like the request_finished signal
+does.
+"""
+
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORKERS = 8
+DURATION = 5
+WRITE_RATIO = 0.2
+ROWS = 5000
+
+PROFILES = {
+    "default": {"SQLITE_PRODUCTION": "False"},
+    "production": {"SQLITE_PRODUCTION": "True"},
+}
+
+
+def worker(path, results):
+    """Runs units of work for DURATION seconds, reports (reads, writes, errors)."""
+    from benchmarks import setup
+
+    os.environ["DATABASE_PATH"] = path
+    setup()
+
+    from django.db import OperationalError, close_old_connections
+
+    from app.models import Client
+
+    rng = random.Random(os.getpid())
+    deadline = time.monotonic() + DURATION
+    reads = writes = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < WRITE_RATIO:
+                Client.objects.create(
+                    name="Cliente", phone=54221555232, email="c@vetsoft.com",
+                )
+                writes += 1
+            else:
+                list(Client.objects.order_by("name", "id")[:50])
+                reads += 1
+        except OperationalError:
+            errors += 1
+        close_old_connections()
+    results.put((reads, writes, errors))
+
+
+def run(profile, env):
+    """Benchmarks a profile on a new database, returns the totals."""
+    os.environ.update(env)
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "db.sqlite3")
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "-v", "0"],
+            env={**os.environ, "DATABASE_PATH": path},
+            check=True,
+        )
+        subprocess.run(
+            [sys.executable, "manage.py", "shell", "-c", SEED],
+            env={**os.environ, "DATABASE_PATH": path},
+            check=True,
+        )
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(path, results))
+            for _ in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        totals = [sum(values) for values in zip(*(results.get() for _ in processes))]
+        for process in processes:
+            process.join()
+
+    reads, writes, errors = totals
+    print(
+        f"{profile:>10}: {reads / DURATION:8.0f} reads/s {writes / DURATION:7.0f} writes/s "
+        f"{errors:5d} 'database is locked' errors",
+    )
+
+
+SEED = f"""
+from app.models import Client
+Client.objects.bulk_create(
+    [Client(name=f"Cliente {{i}}", phone=54221555232, email="c@vetsoft.com") for i in range({ROWS})],
+)
+"""
+
+
+def main():
+    """Runs the benchmark for every profile."""
+    print(f"{WORKERS} workers, {DURATION} s, {WRITE_RATIO:.0%} writes")
+    for profile, env in PROFILES.items():
+        run(profile, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Compares the validation schemas with the previous validate_*
+functions, which parsed the regex and the date on every call and validated
+updates by converting the instance to a QueryDict.
+"""
+
+import re
+import timeit
+from datetime import datetime
+
+from benchmarks import setup
+
+setup()
+
+from app.models import Client, object_to_querydict  # noqa: E402
+from app.validation import CLIENT_SCHEMA, PET_SCHEMA  # noqa: E402
+
+ROWS = 10_000
+
+
+def legacy_validate_client(data):
+    """validate_client as it was before the schemas."""
+    errors = {}
+
+    name = data.get("name", "")
+    phone = data.get("phone", "")
+    email = data.get("email", "")
+
+    if name == "":
+        errors["name"] = "Por favor ingrese un nombre"
+    elif not re.match(r"^[a-zA-Z\s]+$", name):
+        errors["name"] = "El nombre solo puede contener letras y espacios"
+
+    if phone == "":
+        errors["phone"] = "Por favor ingrese un teléfono"
+    elif not str(phone).startswith("54"):
+        errors["phone"] = "El teléfono debe comenzar con 54"
+    else:
+        try:
+            int(phone)
+        except ValueError:
+            errors["phone"] = "El teléfono debe ser un número"
+    if email == "":
+        errors["email"] = "Por favor ingrese un email"
+    elif (
+        email.count("@") == 0
+        or email.split("@")[0] == ""
+        or len(email.split("@")) > 2
+    ):
+        errors["email"] = "Por favor ingrese un email valido"
+    elif not email.endswith("@vetsoft.com"):
+        errors["email"] = "El email debe ser de dominio vetsoft.com"
+
+    return errors
+
+
+def legacy_validate_pet(data):
+    """validate_pet as it was before the schemas."""
+    errors = {}
+
+    name = data.get("name", "")
+    breed = data.get("breed", "")
+    birthday = data.get("birthday", "")
+    client = data.get("client", "")
+
+    if not name:
+        errors["name"] = "Por favor ingrese un nombre para la mascota."
+    if not breed:
+        errors["breed"] = "Por favor ingrese una raza para la mascota."
+    if not birthday:
+        errors["birthday"] = "Por favor ingrese una fecha de nacimiento para la mascota."
+    if not client:
+        errors["client"] = "Por favor seleccione un cliente para la mascota."
+
+    today = datetime.now().date()
+    if isinstance(birthday, str) and birthday != "":
+        birthday = datetime.fromisoformat(birthday).date()
+    if birthday >= today:
+        errors["invalid_birthday"] = "Por favor ingrese una fecha de nacimiento valida."
+
+    return errors
+
+
+def report(label, legacy, schema):
+    """
+    Prints the best of 20 runs of both versions of a case and the speedup.
+    The runs alternate, so a slow moment of the machine hits both alike.
+    """
+    legacy_runs = []
+    schema_runs = []
+    for _ in range(20):
+        legacy_runs.append(timeit.timeit(legacy, number=1))
+        schema_runs.append(timeit.timeit(schema, number=1))
+    legacy, schema = min(legacy_runs), min(schema_runs)
+    print(
+        f"{label:<28} legacy {legacy * 1000:8.1f} ms   "
+        f"schema {schema * 1000:8.1f} ms   x{legacy / schema:.1f}",
+    )
+
+
+def main():
+    """Runs the benchmark."""
+    clients = [
+        {
+            "name": "Juan Sebastian Veron",
+            "phone": f"5422155{i:04d}",
+            "email": f"cliente{i}@vetsoft.com",
+        }
+        for i in range(ROWS)
+    ]
+    pets = [
+        {"name": "Fido", "breed": "Labrador", "birthday": "2020-01-01", "client": "1"}
+        for _ in range(ROWS)
+    ]
+    instances = [Client(address="13 y 44", **client) for client in clients]
+
+    print(f"{ROWS} rows per case\n")
+    report(
+        "clients (mapping)",
+        lambda: [legacy_validate_client(row) for row in clients],
+        lambda: [CLIENT_SCHEMA.validate(row) for row in clients],
+    )
+    report(
+        "clients (validate_many)",
+        lambda: [legacy_validate_client(row) for row in clients],
+        lambda: CLIENT_SCHEMA.validate_many(clients),
+    )
+    report(
+        "clients (update instance)",
+        lambda: [legacy_validate_client(object_to_querydict(obj)) for obj in instances],
+        lambda: CLIENT_SCHEMA.validate_many(instances),
+    )
+    report(
+        "pets (validate_many)",
+        lambda: [legacy_validate_pet(row) for row in pets],
+        lambda: PET_SCHEMA.validate_many(pets),
+    )
+
+
+if __name__ == "__main__":
+    main()
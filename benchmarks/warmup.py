@@ -0,0 +1,67 @@
+"""
+Times the first request of every repository page in a fresh process, with
+and without the startup warm-up, on a throwaway test database.
+"""
+
+import subprocess
+import sys
+import time
+
+PAGES = [
+    "/clientes/",
+    "/mascotas/",
+    "/veterinarios/",
+    "/productos/",
+    "/citas/",
+    "/medicamentos/",
+    "/proveedores/",
+]
+
+RUNS = 5
+
+
+def child(warm):
+    """Runs in the fresh process: prints the time of the first requests."""
+    from benchmarks import setup
+
+    setup()
+
+    from django.db import connection
+    from django.test import Client as HttpClient
+    from django.test.utils import override_settings, setup_test_environment
+
+    from app.warmup import warm_up
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    if warm:
+        warm_up()
+
+    http = HttpClient()
+    with override_settings(REPOSITORY_CACHE_TIMEOUT=0):
+        start = time.perf_counter()
+        for page in PAGES:
+            http.get(page)
+        print(time.perf_counter() - start)
+
+
+def main():
+    """Runs the benchmark."""
+    for label, warm in (("cold", ""), ("warmed up", "warm")):
+        runs = [
+            float(subprocess.check_output(
+                [sys.executable, "-m", "benchmarks.warmup", "--child", warm], text=True,
+            ))
+            for _ in range(RUNS)
+        ]
+        print(
+            f"first request of {len(PAGES)} pages, {label:>9}: best "
+            f"{min(runs) * 1000:.1f} ms, median {sorted(runs)[len(runs) // 2] * 1000:.1f} ms",
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2:3] == ["warm"])
+    else:
+        main()
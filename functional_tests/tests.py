@@ -545,7 +545,8 @@ class PetCreateEditTestCase(PlaywrightTestCase):
         self.page.get_by_label("Nombre").fill("Pocchi")
         self.page.get_by_label("Raza").fill("Shiba")
         self.page.get_by_label("Fecha de nacimiento").fill("2021-01-01")
-        self.page.get_by_label("Dueño").select_option(label="duenio")
+        self.page.get_by_label("Dueño").fill("duen")
+        self.page.get_by_role("option", name="duenio").click()
         self.page.get_by_role("button", name="Guardar").click()
 
         expect(self.page.locator("tbody")).to_contain_text("Pocchi")
@@ -46,7 +46,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app.metrics.MetricsMiddleware",
+    "app.routing.AsyncViewsMiddleware",
+    "app.timing.ServerTimingMiddleware",
+    "app.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "app.compression.CompressionMiddleware",
+    "app.staticfiles.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,12 +63,27 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "vetsoft.urls"
 
+# The requests of an ASGI server (vetsoft.asgi) are routed with this urlconf,
+# to the async variants of the repository and search views, see
+# app.routing.AsyncViewsMiddleware.
+ASYNC_ROOT_URLCONF = "vetsoft.urls_async"
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # The Django engine, with the render time of the templates measured
+        # for the Server-Timing header.
+        "BACKEND": "app.timing.TimedDjangoTemplates",
+        "NAME": "django",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Templates are compiled once per process and kept in memory, see
+            # app.warmup. The development server reloads them when they change.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    ["django.template.loaders.app_directories.Loader"],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -82,11 +103,35 @@ WSGI_APPLICATION = "vetsoft.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": "app.sqlite3",
+        "NAME": os.getenv("DATABASE_PATH", BASE_DIR / "db.sqlite3"),
     },
 }
 
+# Production SQLite profile
+# Opt-in with SQLITE_PRODUCTION=True. WAL journaling lets readers work while a
+# write is in progress and synchronous=NORMAL only syncs at checkpoints (safe
+# with WAL), busy_timeout (ms) makes writers wait for the lock instead of
+# failing with "database is locked", and connections are kept open between
+# requests. The pragmas are applied to every new connection by
+# app.signals.configure_sqlite.
+
+SQLITE_PRODUCTION = os.getenv("SQLITE_PRODUCTION", "False") == "True"
+
+SQLITE_PRAGMAS = {}
+
+if SQLITE_PRODUCTION:
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        # Negative values are KiB: 64 MB of page cache per connection.
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    }
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("CONN_MAX_AGE", 600))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -126,7 +171,195 @@ CSRF_TRUSTED_ORIGINS = ["https://vetsoft-grupo-8.onrender.com"]
 
 STATIC_URL = "static/"
 
+# collectstatic copies the assets (Bootstrap and Bootstrap Icons are vendored
+# in app/static/vendor) to STATIC_ROOT with the hash of their content in the
+# file names and writes gzip variants of the text files. The app serves them
+# itself with app.staticfiles.StaticFilesMiddleware.
+
+STATIC_ROOT = os.getenv("STATIC_ROOT", BASE_DIR / "staticfiles")
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "app.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+# Response compression
+# HTML, JSON and CSV responses of at least COMPRESSION_MIN_SIZE bytes (and
+# every streamed one) are gzipped for the browsers that accept it, see
+# app.compression.CompressionMiddleware.
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_TYPES = [
+    "text/html",
+    "application/json",
+    "text/csv",
+    "application/x-ndjson",
+]
+
+# Server
+# manage.py serve forks SERVER_WORKERS processes of SERVER_THREADS threads,
+# each one replaced after SERVER_MAX_REQUESTS requests (plus up to
+# SERVER_MAX_REQUESTS_JITTER, 0 never), see app.server. Connections that send
+# nothing for SERVER_TIMEOUT seconds are closed, so slow or silent clients
+# don't hold the threads.
+
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", 4))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 1000))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 100))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", 10))
+
+# Server timing
+# With SERVER_TIMING=True every response gets a Server-Timing header with the
+# time spent in SQL queries, templates and Python, also logged as a JSON line
+# by the app.timing logger. Disabled, it costs nothing.
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "False") == "True"
+
+# Slow queries
+# SQL statements that take SLOW_QUERY_THRESHOLD_MS or more (0 disables the
+# log) are written as JSON lines with the view that ran them, see
+# app.slow_queries. Every process writes its own file next to SLOW_QUERY_LOG
+# (slow_queries-<pid>.jsonl), rotated at SLOW_QUERY_LOG_MAX_BYTES keeping
+# SLOW_QUERY_LOG_BACKUPS old files. A new worker takes over the files of an
+# exited one, so there are as many files as processes running at once.
+# `manage.py slow_queries` sums up the files of every process.
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", BASE_DIR / "logs" / "slow_queries.jsonl")
+
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+
+# Metrics
+# /metrics exposes the request, database, cache and write counters in the
+# Prometheus text format, see app.metrics. Every process adds its counters to
+# the SQLite file METRICS_DB at most every METRICS_FLUSH_INTERVAL seconds, so
+# the ones of every worker are summed. The rows of every table are counted
+# at most every METRICS_ROWS_TIMEOUT seconds (0 on every request of /metrics).
+
+METRICS_DB = os.getenv("METRICS_DB", BASE_DIR / ".metrics.sqlite3")
+
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+METRICS_ROWS_TIMEOUT = int(os.getenv("METRICS_ROWS_TIMEOUT", 60))
+
+# Logging
+# Messages of the app (the server processes, their warm-up time, retried
+# writes) of LOG_LEVEL or above go to the console.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "app": {"format": "[%(asctime)s] %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "app"},
+    },
+    "loggers": {
+        "app": {
+            "handlers": ["console"],
+            "level": LOG_LEVEL,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Write transactions
+# Mutating views run in BEGIN IMMEDIATE transactions (see app.db); when the
+# database stays locked past the busy timeout they are retried up to
+# WRITE_RETRY_ATTEMPTS times, waiting a random delay of up to
+# WRITE_RETRY_BACKOFF * 2 ** attempt seconds (at most WRITE_RETRY_MAX_BACKOFF).
+
+WRITE_RETRY_ATTEMPTS = int(os.getenv("WRITE_RETRY_ATTEMPTS", 5))
+
+WRITE_RETRY_BACKOFF = float(os.getenv("WRITE_RETRY_BACKOFF", 0.05))
+
+WRITE_RETRY_MAX_BACKOFF = float(os.getenv("WRITE_RETRY_MAX_BACKOFF", 1.0))
+
+# Cache
+# The default cache is shared by every process of the server (the rendered
+# repository pages are invalidated for all of them at once). The fragments
+# cache keeps the rendered rows of the repository tables in the memory of
+# each process, their keys include the update time of the row so they never
+# need to be invalidated.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+    },
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragments",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("FRAGMENT_CACHE_MAX_ENTRIES", 50000)),
+        },
+    },
+}
+
+# Build version
+# Identifies the deployed code in the keys of the cached pages and the ETags
+# of the repository pages (see app.cache.build_version), together with a
+# hash of the templates and of the manifest of the static files. Set it on
+# every deploy (e.g. to the git commit) so changes to the Python code don't
+# serve pages rendered by the previous one.
+
+BUILD_VERSION = os.getenv("BUILD_VERSION", "")
+
+# Repository pages
+# Rendered repository pages are cached for REPOSITORY_CACHE_TIMEOUT seconds
+# (0 disables the cache) under the versions of the models they display, see
+# app.cache.cached_page.
+
+REPOSITORY_CACHE_TIMEOUT = int(os.getenv("REPOSITORY_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Rendered rows of the repository tables are cached for FRAGMENT_CACHE_TIMEOUT
+# seconds (0 disables the cache), see app.fragments.render_rows.
+
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Rows per page of the keyset paginated repository views, the page_size query
+# param can override it up to REPOSITORY_MAX_PAGE_SIZE.
+
+REPOSITORY_PAGE_SIZE = int(os.getenv("REPOSITORY_PAGE_SIZE", 50))
+
+REPOSITORY_MAX_PAGE_SIZE = int(os.getenv("REPOSITORY_MAX_PAGE_SIZE", 500))
+
+# Exports
+# Rows fetched from the database and serialized per chunk of the streaming
+# CSV / NDJSON exports.
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Imports
+# Rows validated and inserted per transaction by the CSV imports.
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+
+# Autocomplete
+# Maximum number of suggestions returned by the autocomplete endpoints.
+
+AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", 20))
+
+# Vets availability
+# Schedule of the vets without working hours of their own, as
+# (weekday, start, end) with Monday as 0.
+
+VET_DEFAULT_WORKING_HOURS = [
+    (weekday, "09:00", "17:00") for weekday in range(5)
+]
+
+AVAILABILITY_MAX_DAYS = 62
@@ -0,0 +1,10 @@
+"""
+URL configuration of the requests served by an ASGI server, see
+ASYNC_ROOT_URLCONF. The same routes as vetsoft.urls, with the async views of
+app.urls_async.
+"""
+
+from django.contrib import admin
+from django.urls import include, path
+
+urlpatterns = [path("admin/", admin.site.urls), path("", include("app.urls_async"))]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vetsoft.settings")
 
 application = get_wsgi_application()
+
+# Compile the templates, URLs and models before the first request.
+from app.warmup import startup  # noqa: E402
+
+startup()